@@ -16,9 +16,27 @@ def create_app(config_class=Config):
     app.logger = logger
 
     # --- Initialize Extensions and Services ---
+    from . import metrics
+    metrics.init_app(app)
+
     from . import database
     database.init_app(app)
 
+    from . import migrations
+    migrations.init_app(app)
+
+    from . import passwords
+    passwords.init_app(app)
+
+    from . import services
+    services.init_app(app)
+
+    from . import prewarm
+    prewarm.init_app(app)
+
+    from . import generation_cache
+    generation_cache.init_app(app)
+
     # --- Register Blueprints ---
     from . import auth
     app.register_blueprint(auth.bp)
@@ -0,0 +1,105 @@
+# File: app/analysis.py
+# Pure aggregation helpers for the comment analysis routes.
+# Kept free of Flask and network access so they can be benchmarked and reused.
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+SENTIMENT_LABELS = ('positive', 'neutral', 'negative')
+EMOTIONS = ('sadness', 'joy', 'fear', 'disgust', 'anger')
+
+
+def is_analyzable(comment_text: str, min_length: int) -> bool:
+    """Skips comments too short or without any letters/digits to be worth an NLU call."""
+    clean_comment = comment_text.strip()
+    return len(clean_comment) >= min_length and any(c.isalnum() for c in clean_comment)
+
+def aggregate_sentiment(analysis_results: Iterable[Optional[Dict]],
+                        weights: Optional[Iterable[int]] = None) -> Tuple[Dict, Dict, int]:
+    """
+    Folds per-comment NLU sentiment/emotion results into label counts and
+    average emotion scores. Failed analyses (None) are ignored. `weights`, when
+    given, says how many comments each result stands for (see dedup.dedupe_comments).
+    Returns (sentiment_counts, emotion_averages, analyzed_count).
+    """
+    sentiment_counts = {label: 0 for label in SENTIMENT_LABELS}
+    emotion_totals = {emotion: 0 for emotion in EMOTIONS}
+    analyzed_count = 0
+
+    for analysis_result, weight in zip(analysis_results, weights if weights is not None else repeat(1)):
+        if not analysis_result:
+            continue
+        analyzed_count += weight
+        sentiment_label = analysis_result.get('sentiment', {}).get('document', {}).get('label', 'neutral')
+        sentiment_counts[sentiment_label] += weight
+        emotions = analysis_result.get('emotion', {}).get('document', {}).get('emotion', {})
+        for emotion, score in emotions.items():
+            if emotion in emotion_totals: emotion_totals[emotion] += score * weight
+
+    final_emotions = {e: t / analyzed_count for e, t in emotion_totals.items()} if analyzed_count else {}
+    return sentiment_counts, final_emotions, analyzed_count
+
+def merge_sentiment(counts: Dict, emotions: Dict, count: float,
+                    new_counts: Dict, new_emotions: Dict, new_count: int,
+                    new_weight: float = 1.0) -> Tuple[Dict, Dict, float]:
+    """
+    Combines two aggregate_sentiment() results as if their comments had been
+    aggregated together: counts add up, emotion averages are count-weighted.
+    Each of the new comments counts `new_weight` times, so a full set of new
+    comments can be folded into a sample at that sample's rate.
+    """
+    new_count = new_count * new_weight
+    total = count + new_count
+    merged_counts = {label: _round_count(counts.get(label, 0) + new_counts.get(label, 0) * new_weight)
+                     for label in SENTIMENT_LABELS}
+    merged_emotions = {
+        e: (emotions.get(e, 0) * count + new_emotions.get(e, 0) * new_count) / total
+        for e in EMOTIONS if e in emotions or e in new_emotions
+    } if total else {}
+    return merged_counts, merged_emotions, _round_count(total)
+
+def _round_count(value: float):
+    """Weighted counts keep two decimals; whole ones stay ints."""
+    value = round(value, 2)
+    return int(value) if float(value).is_integer() else value
+
+def comment_drift_exceeded(recorded_count: int, current_count: int, threshold: float, min_drift: int = 5) -> bool:
+    """
+    True when a video's comment count moved enough since an analysis to make it
+    stale: by more than `threshold` (a fraction of the recorded count), and
+    never for fewer than `min_drift` comments, so tiny videos don't churn.
+    """
+    drift = abs(current_count - recorded_count)
+    return drift >= min_drift and drift > threshold * recorded_count
+
+def extract_comment_themes(analysis: Dict) -> Set[str]:
+    """Relevant concepts and entities of one comment, title-cased."""
+    comment_themes = set()
+    comment_themes.update([c['text'].title() for c in analysis.get('concepts', []) if c['relevance'] > 0.6])
+    comment_themes.update([e['text'].title() for e in analysis.get('entities', []) if e['relevance'] > 0.5])
+    return comment_themes
+
+def build_theme_clusters(themes_with_comments: Dict[str, List[str]],
+                         comment_weights: Optional[Dict[str, int]] = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Turns a theme -> comments mapping into up to 5 clusters (themes shared by
+    more than one comment) and up to 3 outliers, largest first. A comment in
+    `comment_weights` counts as that many comments (its near-duplicates).
+    """
+    comment_weights = comment_weights or {}
+
+    def size(comments):
+        return sum(comment_weights.get(c, 1) for c in comments)
+
+    sorted_themes = sorted(themes_with_comments.items(), key=lambda item: size(item[1]), reverse=True)
+    clusters, outliers = [], []
+
+    for theme, associated_comments in sorted_themes:
+        entry = {'summary': theme, 'comments': associated_comments, 'comment_count': size(associated_comments)}
+        if entry['comment_count'] > 1 and len(clusters) < 5:
+            clusters.append(entry)
+        elif len(outliers) < 5:
+            outliers.append(entry)
+
+    cluster_summaries = {c['summary'] for c in clusters}
+    outliers = [o for o in outliers if o['summary'] not in cluster_summaries]
+    return clusters, outliers[:3]
@@ -1,8 +1,7 @@
 # File: app/auth.py (Updated)
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, flash
-import bcrypt
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, flash, current_app
 from functools import wraps
-from . import database, services # Changed: import services
+from . import database, passwords, ratelimit
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -18,6 +17,50 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def rate_limited(charge=True):
+    """
+    Enforces the per-user limits configured in RATE_LIMITS for the wrapped endpoint.
+    Every request counts against the per-minute window. The endpoint's configured
+    'cost' (default 1) is charged to the daily budget up front, unless `charge` is
+    False: the view then calls charge_rate_limit() itself once the request is
+    valid and missed the cache, so rejected requests and cache hits cost nothing.
+    Apply it below @login_required so session['user_id'] is always present.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            limits = ratelimit.get_limits(current_app.config, request.endpoint)
+            if limits:
+                allowed, retry_after = ratelimit.limiter.admit(session['user_id'], request.endpoint, limits)
+                if not allowed:
+                    return _rate_limit_exceeded(retry_after)
+                if charge and (limited := charge_rate_limit()):
+                    return limited
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def charge_rate_limit(units=None):
+    """
+    Charges `units` (default: the endpoint's configured 'cost') to the user's
+    daily budget for the current endpoint. Returns a 429 response if the budget
+    is spent, else None.
+    """
+    limits = ratelimit.get_limits(current_app.config, request.endpoint)
+    if not limits:
+        return None
+    units = limits.get('cost', 1) if units is None else units
+    allowed, retry_after = ratelimit.limiter.charge(
+        database.get_db(), session['user_id'], request.endpoint, limits, max(1, units))
+    return None if allowed else _rate_limit_exceeded(retry_after)
+
+def _rate_limit_exceeded(retry_after):
+    current_app.logger.warning(f"Rate limit hit for user {session['user_id']} on {request.endpoint}")
+    return jsonify({
+        'error': 'Rate limit exceeded. Please try again later.',
+        'retry_after': retry_after
+    }), 429, {'Retry-After': str(retry_after)}
+
 # --- Page Routes (Unchanged) ---
 @bp.route('/login')
 def login():
@@ -57,6 +100,7 @@ def api_register():
     # --- CHANGED: Use real service to get channel data ---
     channel_data = {}
     if channel_url:
+        from . import services  # Only registration talks to YouTube
         try:
             channel_data = services.get_youtube_channel_details(channel_url)
             if not channel_data:
@@ -65,7 +109,10 @@ def api_register():
         except Exception as e:
             return jsonify({'error': f'Channel verification failed: {e}'}), 500
 
-    user_id = database.create_user_with_channel(email, password, channel_url, channel_data)
+    try:
+        user_id = database.create_user_with_channel(email, password, channel_url, channel_data)
+    except passwords.PasswordQueueFull:
+        return jsonify({'error': 'Server is busy, please try again shortly.'}), 503
     if not user_id:
         return jsonify({'error': 'Account creation failed'}), 500
         
@@ -79,6 +126,28 @@ def api_register():
         
     return jsonify(response_data), 201
 
+def _upgrade_password_hash(user, password):
+    """
+    Transparently upgrades a hash made with an older, cheaper cost. The new hash
+    is stored once the pool has made it, so the login doesn't wait for a second
+    bcrypt; best effort, the next login tries again.
+    """
+    app = current_app._get_current_object()
+    user_id, previous_hash = user['id'], user['password_hash']
+
+    def store(future):
+        try:
+            with app.app_context():
+                # Unless the password was changed in the meantime
+                database.update_user_password_hash(user_id, future.result(), previous_hash)
+        except Exception as e:
+            app.logger.warning(f"Skipped password rehash for user {user_id}: {e}")
+
+    try:
+        passwords.hash_password_in_background(password).add_done_callback(store)
+    except Exception as e:
+        app.logger.warning(f"Skipped password rehash for user {user_id}: {e}")
+
 @bp.route('/api/login', methods=['POST'])
 def api_login():
     data = request.get_json()
@@ -89,7 +158,15 @@ def api_login():
         return jsonify({'error': 'Email and password required'}), 400
         
     user = database.get_user_by_email(email)
-    if user and bcrypt.checkpw(password.encode('utf-8'), user['password_hash']):
+    try:
+        is_valid = bool(user) and passwords.verify_password(password, user['password_hash'])
+    except passwords.PasswordQueueFull:
+        return jsonify({'error': 'Server is busy, please try again shortly.'}), 503, {'Retry-After': '1'}
+
+    if is_valid and passwords.needs_rehash(user['password_hash']):
+        _upgrade_password_hash(user, password)
+
+    if is_valid:
         session['user_id'] = user['id']
         session['user_email'] = user['email']
         return jsonify({'message': 'Login successful'})
@@ -0,0 +1,139 @@
+# File: app/circuitbreaker.py
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is temporarily unavailable, retry in {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker around one upstream service.
+
+    closed    -> calls flow; consecutive failures (or calls slower than
+                 slow_call_threshold) are counted
+    open      -> calls fail fast with CircuitOpenError for reset_timeout seconds
+    half_open -> up to half_open_max_calls trial calls are let through; one
+                 success closes the breaker, one failure re-opens it. Trials
+                 that report nothing for reset_timeout seconds count as failed
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30,
+                 slow_call_threshold: Optional[float] = None, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, failure_threshold: int, reset_timeout: float,
+                  slow_call_threshold: Optional[float], half_open_max_calls: int):
+        with self._lock:
+            self.failure_threshold = failure_threshold
+            self.reset_timeout = reset_timeout
+            self.slow_call_threshold = slow_call_threshold
+            self.half_open_max_calls = half_open_max_calls
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected outright."""
+        return self.state == self.OPEN
+
+    def retry_after(self) -> int:
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0
+            return max(1, int(self.reset_timeout - (time.monotonic() - self._opened_at)) + 1)
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_calls = 0
+                logger.info(f"Circuit '{self.name}' half-open, probing upstream")
+            if self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                self._trial_started_at = time.monotonic()
+                return True
+            if time.monotonic() - self._trial_started_at >= self.reset_timeout:
+                # The trial's caller never recorded an outcome; without this the
+                # breaker would stay half-open with no slot left for good
+                logger.warning(f"Circuit '{self.name}' trial call never reported back, re-opening")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            return False
+
+    def record_success(self, elapsed: Optional[float] = None):
+        if elapsed is not None and self.slow_call_threshold and elapsed > self.slow_call_threshold:
+            logger.warning(f"Circuit '{self.name}' slow call ({elapsed:.1f}s), counting as failure")
+            self.record_failure()
+            return
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed, upstream recovered")
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.error(f"Circuit '{self.name}' opened after {self._failures} failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, fn: Callable, *args, is_failure: Optional[Callable[[Exception], bool]] = None, **kwargs):
+        """
+        Runs fn through the breaker. Exceptions for which is_failure returns False
+        (e.g. a 404 for a missing video) are re-raised without counting against the upstream.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if is_failure is None or is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success(time.perf_counter() - start)
+        return result
+
+    def snapshot(self) -> dict:
+        state = self.state
+        with self._lock:
+            failures = self._failures
+        return {'state': state, 'consecutive_failures': failures, 'retry_after': self.retry_after()}
@@ -0,0 +1,201 @@
+# File: app/comment_pipeline.py
+# Comment analysis shared by the API routes and the background prewarmer:
+# filter, collapse near-duplicates, analyze through the shared comment store,
+# then aggregate into the stored sentiment and theme-cluster payloads.
+# Transcript windows go through the same store (see transcript_analysis).
+# Needs an app context (config, database) but no request or session.
+from itertools import islice
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from flask import current_app
+
+from . import database, services, metrics, analysis, dedup, comment_store, transcripts
+
+# Comments fetched per analysis and the shortest comment each tool considers
+SENTIMENT_SAMPLE = 50
+SENTIMENT_MIN_LENGTH = 10
+THEME_SAMPLE = 80
+THEME_MIN_LENGTH = 15
+
+
+def analyze_comments(comment_texts):
+    """
+    NLU results for each comment (None where analysis failed) plus the number of
+    NLU calls made. Results are shared between tools through the comment store;
+    only comments never seen before are sent to NLU. Stops early once NLU fails
+    fast, so the result list may be shorter than the input.
+    """
+    text_hashes = [database.comment_text_hash(text) for text in comment_texts]
+    stored = database.get_comment_analyses(text_hashes)
+    results, fresh, nlu_calls = [], {}, 0
+    for comment_text, text_hash in zip(comment_texts, text_hashes):
+        result = stored.get(text_hash) or fresh.get(text_hash)
+        metrics.record_cache('comment_analysis', result is not None)
+        if result is None:
+            if services.nlu_breaker.is_open:
+                break  # Stop walking comments once NLU starts failing fast
+            nlu_calls += 1
+            result = services.get_nlu_service().analyze_comment(comment_text)
+            if result:
+                fresh[text_hash] = result
+        results.append(result)
+    if fresh:
+        database.save_comment_analyses(fresh)
+    return results, nlu_calls
+
+def group_comments(comment_texts):
+    """Index groups of near-duplicate comments, so each group is sent to NLU once."""
+    if not current_app.config.get('COMMENT_DEDUP_ENABLED', True):
+        return [[i] for i in range(len(comment_texts))]
+    return dedup.group_near_duplicates(comment_texts,
+                                       threshold=current_app.config.get('COMMENT_DEDUP_THRESHOLD', 0.8))
+
+def run_comment_pipeline(video_id, comment_threads, min_length):
+    """
+    Filters a video's comments, analyzes one representative per near-duplicate
+    group and records every comment's result in the video's per-comment store.
+    Returns (groups, results, nlu_calls): groups are (representative text, weight)
+    pairs and results[i] belongs to groups[i]; results may be shorter than groups
+    if NLU started failing fast.
+    """
+    comments = [c for c in comment_threads if analysis.is_analyzable(c['text'], min_length)]
+    index_groups = group_comments([c['text'] for c in comments])
+    results, nlu_calls = analyze_comments([comments[group[0]]['text'] for group in index_groups])
+
+    per_comment = [None] * len(comments)
+    for group, result in zip(index_groups, results):
+        for i in group:
+            per_comment[i] = result  # Duplicates share their representative's analysis
+    if any(per_comment):
+        database.merge_comment_results(video_id, comment_store.CommentResults.from_analyses(comments, per_comment))
+
+    return [(comments[group[0]]['text'], len(group)) for group in index_groups], results, nlu_calls
+
+# --- Stored analyses ---
+def sentiment_analysis(video_id, comments) -> Tuple[Optional[Dict], Dict]:
+    """
+    (payload or None if nothing could be analyzed, metadata) of a full sentiment pass.
+    Only a complete pass gets a watermark, so only it can be refreshed incrementally.
+    """
+    groups, analysis_results, nlu_calls = run_comment_pipeline(video_id, comments, SENTIMENT_MIN_LENGTH)
+    sentiment_counts, final_emotions, analyzed_count = analysis.aggregate_sentiment(
+        analysis_results, [weight for _, weight in groups])
+    metadata = {'comments_analyzed': analyzed_count, 'nlu_calls': nlu_calls}
+    if analyzed_count == 0:
+        return None, metadata
+    if len(analysis_results) == len(groups):
+        metadata['watermark'] = services.comment_watermark(comments)
+    return {"sentiment_data": sentiment_counts, "emotion_data": final_emotions}, metadata
+
+def sample_rate(metadata: Dict) -> float:
+    """
+    The fraction of the video's comments a stored sentiment analysis stands for.
+    A full pass analyzes the SENTIMENT_SAMPLE most relevant comments out of the
+    commentCount recorded with it (1.0 when that is unknown); a refresh keeps
+    the rate of the analysis it was folded into.
+    """
+    if 'sample_rate' in metadata:
+        return metadata['sample_rate']
+    analyzed, population = metadata.get('comments_analyzed', 0), metadata.get('comment_count')
+    if not population or analyzed >= population:
+        return 1.0
+    return analyzed / population
+
+def refresh_sentiment(video_id, previous, new_comments) -> Tuple[Optional[Dict], Dict]:
+    """
+    Brings a stored sentiment analysis up to date by analyzing only the comments
+    posted after its watermark and folding them into its aggregates. Those are
+    every new comment, while the stored analysis is a sample, so they are
+    weighted by its sample rate rather than outweighing it.
+    Returns (None, metadata) if NLU stopped part-way, since advancing the
+    watermark then would lose comments.
+    """
+    groups, analysis_results, nlu_calls = run_comment_pipeline(video_id, new_comments, SENTIMENT_MIN_LENGTH)
+    metadata = {'nlu_calls': nlu_calls, 'new_comments': len(new_comments)}
+    if len(analysis_results) < len(groups):
+        return None, metadata
+
+    rate = sample_rate(previous['metadata'])
+    new_counts, new_emotions, new_count = analysis.aggregate_sentiment(analysis_results, [weight for _, weight in groups])
+    sentiment_counts, final_emotions, analyzed_count = analysis.merge_sentiment(
+        previous['data']['sentiment_data'], previous['data'].get('emotion_data', {}),
+        previous['metadata'].get('comments_analyzed', 0), new_counts, new_emotions, new_count, new_weight=rate)
+    metadata['comments_analyzed'] = analyzed_count
+    metadata['sample_rate'] = rate
+    metadata['watermark'] = services.comment_watermark(new_comments, previous['metadata']['watermark'])
+    return {"sentiment_data": sentiment_counts, "emotion_data": final_emotions}, metadata
+
+def theme_cluster_analysis(video_id, comments) -> Tuple[Optional[Dict], Dict]:
+    """(payload or None if no themes were found, metadata) of a theme-clustering pass."""
+    themes_with_comments = defaultdict(list)
+    comment_weights = {}
+
+    groups, theme_results, nlu_calls = run_comment_pipeline(video_id, comments, THEME_MIN_LENGTH)
+    for (comment_text, weight), theme_result in zip(groups, theme_results):
+        comment_weights[comment_text] = weight
+        if theme_result:
+            for theme in analysis.extract_comment_themes(theme_result):
+                themes_with_comments[theme].append(comment_text)
+
+    metadata = {'comments_analyzed': len(comments), 'nlu_calls': nlu_calls}
+    if not themes_with_comments:
+        return None, metadata
+    clusters, outliers = analysis.build_theme_clusters(themes_with_comments, comment_weights)
+    return {"clusters": clusters, "outliers": outliers, "total_analyzed": len(comments)}, metadata
+
+def transcript_analysis(video_id) -> Tuple[Optional[Dict], Dict]:
+    """
+    Sentiment, emotions and themes over a stored transcript's timeline. Segments
+    stream out of the store into NLU-sized windows that are analyzed in batches;
+    each window's result is cached like a comment's, so re-analysis only pays for
+    windows never seen before. Returns (None, metadata) if NLU stopped part-way.
+    """
+    config = current_app.config
+    max_windows = config.get('TRANSCRIPT_MAX_WINDOWS', 200)
+    batch_size = config.get('TRANSCRIPT_ANALYSIS_BATCH', 20)
+    timeline = transcripts.TranscriptTimeline()
+    window_iter = transcripts.windows(database.iter_transcript_segments(video_id),
+                                      max_chars=config.get('TRANSCRIPT_WINDOW_CHARS', 1500),
+                                      max_ms=config.get('TRANSCRIPT_WINDOW_SECONDS', 120) * 1000)
+    metadata = {'nlu_calls': 0, 'windows': 0, 'truncated': False}
+    while metadata['windows'] < max_windows:
+        batch = list(islice(window_iter, min(batch_size, max_windows - metadata['windows'])))
+        if not batch:
+            break
+        results, nlu_calls = analyze_comments([window.text for window in batch])
+        metadata['nlu_calls'] += nlu_calls
+        if len(results) < len(batch):
+            return None, metadata
+        for window, result in zip(batch, results):
+            timeline.add(window, result)
+        metadata['windows'] += len(batch)
+    else:
+        metadata['truncated'] = next(window_iter, None) is not None
+
+    summary = timeline.summary()
+    if not summary['windows_analyzed']:
+        return None, metadata
+    return summary, metadata
+
+def is_fresh(previous: Dict, comment_count: Optional[int], config) -> bool:
+    """
+    Whether a stored analysis (see database.get_latest_analysis) can still be
+    served, given the video's current commentCount (None if unknown). It stays
+    fresh while the count has barely moved since it was recorded; analyses
+    without a recorded count, or with the current count unknown, use the plain TTL.
+    """
+    if previous['age_hours'] >= config.get('ANALYSIS_MAX_CACHE_HOURS', 24 * 7):
+        return False
+    recorded_count = previous['metadata'].get('comment_count')
+    if recorded_count is None or comment_count is None:
+        return previous['age_hours'] < config.get('ANALYSIS_CACHE_HOURS', 24)
+    return not analysis.comment_drift_exceeded(recorded_count, comment_count,
+                                               config.get('ANALYSIS_COMMENT_DRIFT_THRESHOLD', 0.05),
+                                               config.get('ANALYSIS_COMMENT_DRIFT_MIN', 5))
+
+def with_comment_count(metadata: Dict, comment_count: Optional[int]) -> Dict:
+    """Records the commentCount an analysis was computed at, when known."""
+    if comment_count is not None:
+        metadata['comment_count'] = comment_count
+    return metadata
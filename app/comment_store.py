@@ -0,0 +1,221 @@
+# File: app/comment_store.py
+# Per-comment analysis results of one video, held column-wise in NumPy arrays
+# so re-aggregations and drill-downs run locally without refetching or NLU calls.
+# Stored in SQLite as a single compressed .npz blob (see database.merge_comment_results).
+import io
+import hashlib
+import warnings
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from .analysis import EMOTIONS, extract_comment_themes
+
+SENTIMENT_LABELS = ('negative', 'neutral', 'positive')  # Stored as codes 0, 1, 2
+_LABEL_CODES = {label: code for code, label in enumerate(SENTIMENT_LABELS)}
+PERIODS = ('day', 'week', 'month')
+
+
+def _np():
+    # NumPy costs ~80ms to import, so only pay for it when a result set is touched
+    import numpy
+    return numpy
+
+def author_hash(author_key: str) -> str:
+    """Short stable pseudonym for a comment author; raw names and channel ids are not stored."""
+    return hashlib.sha1((author_key or '').encode('utf-8')).hexdigest()[:16]
+
+def _epoch_seconds(timestamp: str) -> int:
+    if not timestamp:
+        return 0
+    try:
+        return int(datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        return 0
+
+
+class CommentResults:
+    """
+    Columns, one row per comment:
+      comment_ids (str), author_hashes (str), published (int64 epoch seconds),
+      scores (float32 sentiment score), labels (int8 code into SENTIMENT_LABELS),
+      emotions (float32, one column per analysis.EMOTIONS entry, NaN if missing).
+    Themes are ragged, so they are kept CSR-style: the themes of row i are
+    theme_vocab[theme_ids[theme_offsets[i]:theme_offsets[i + 1]]].
+    """
+
+    ARRAYS = ('comment_ids', 'author_hashes', 'published', 'scores', 'labels', 'emotions',
+              'theme_vocab', 'theme_offsets', 'theme_ids')
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self):
+        return len(self.comment_ids)
+
+    # --- Building ---
+    @classmethod
+    def from_analyses(cls, comments: Sequence[Dict], results: Sequence[Optional[Dict]]) -> 'CommentResults':
+        """
+        Builds the columns from comment records (see services.get_youtube_comment_threads)
+        and their NLU results. Comments whose analysis failed (None) are left out.
+        """
+        np = _np()
+        rows = [(c, r) for c, r in zip(comments, results) if r]
+        vocab: Dict[str, int] = {}
+        theme_offsets, theme_ids = [0], []
+        emotions = np.full((len(rows), len(EMOTIONS)), np.nan, dtype=np.float32)
+        scores = np.zeros(len(rows), dtype=np.float32)
+        labels = np.zeros(len(rows), dtype=np.int8)
+
+        for i, (comment, result) in enumerate(rows):
+            document = result.get('sentiment', {}).get('document', {})
+            scores[i] = document.get('score', 0.0)
+            labels[i] = _LABEL_CODES.get(document.get('label', 'neutral'), _LABEL_CODES['neutral'])
+            emotion_scores = result.get('emotion', {}).get('document', {}).get('emotion', {})
+            for j, emotion in enumerate(EMOTIONS):
+                if emotion in emotion_scores:
+                    emotions[i, j] = emotion_scores[emotion]
+            for theme in sorted(extract_comment_themes(result)):
+                theme_ids.append(vocab.setdefault(theme, len(vocab)))
+            theme_offsets.append(len(theme_ids))
+
+        return cls(
+            comment_ids=np.array([c['comment_id'] or '' for c, _ in rows], dtype=str),
+            author_hashes=np.array([author_hash(c.get('author_key')) for c, _ in rows], dtype=str),
+            published=np.array([_epoch_seconds(c.get('published_at')) for c, _ in rows], dtype=np.int64),
+            scores=scores,
+            labels=labels,
+            emotions=emotions,
+            theme_vocab=np.array(list(vocab), dtype=str),
+            theme_offsets=np.array(theme_offsets, dtype=np.int32),
+            theme_ids=np.array(theme_ids, dtype=np.int32),
+        )
+
+    # --- Combining ---
+    def take(self, indices) -> 'CommentResults':
+        """The given rows, in the given order."""
+        np = _np()
+        indices = np.asarray(indices, dtype=np.int64)
+        lengths = np.diff(self.theme_offsets)[indices]
+        theme_ids = [self.theme_ids[self.theme_offsets[i]:self.theme_offsets[i + 1]] for i in indices]
+        return CommentResults(
+            comment_ids=self.comment_ids[indices],
+            author_hashes=self.author_hashes[indices],
+            published=self.published[indices],
+            scores=self.scores[indices],
+            labels=self.labels[indices],
+            emotions=self.emotions[indices],
+            theme_vocab=self.theme_vocab,
+            theme_offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int32),
+            theme_ids=np.concatenate(theme_ids).astype(np.int32) if theme_ids else np.zeros(0, dtype=np.int32),
+        )
+
+    def merge(self, newer: 'CommentResults') -> 'CommentResults':
+        """Rows of both; a comment present in both keeps the row from `newer`."""
+        np = _np()
+        kept = self.take(np.flatnonzero(~np.isin(self.comment_ids, newer.comment_ids)))
+        vocab = {theme: i for i, theme in enumerate(kept.theme_vocab.tolist())}
+        remap = np.array([vocab.setdefault(theme, len(vocab)) for theme in newer.theme_vocab.tolist()], dtype=np.int32)
+        return CommentResults(
+            comment_ids=np.concatenate([kept.comment_ids, newer.comment_ids]),
+            author_hashes=np.concatenate([kept.author_hashes, newer.author_hashes]),
+            published=np.concatenate([kept.published, newer.published]),
+            scores=np.concatenate([kept.scores, newer.scores]),
+            labels=np.concatenate([kept.labels, newer.labels]),
+            emotions=np.concatenate([kept.emotions, newer.emotions]),
+            theme_vocab=np.array(list(vocab), dtype=str),
+            theme_offsets=np.concatenate([kept.theme_offsets, newer.theme_offsets[1:] + kept.theme_offsets[-1]]),
+            theme_ids=np.concatenate([kept.theme_ids, remap[newer.theme_ids]]).astype(np.int32),
+        )
+
+    # --- Serialization ---
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        _np().savez_compressed(buffer, **{name: getattr(self, name) for name in self.ARRAYS})
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> 'CommentResults':
+        with _np().load(io.BytesIO(blob), allow_pickle=False) as arrays:
+            return cls(**{name: arrays[name] for name in cls.ARRAYS})
+
+    # --- Queries ---
+    def theme_matrix(self):
+        """Boolean rows x themes membership matrix."""
+        np = _np()
+        matrix = np.zeros((len(self), len(self.theme_vocab)), dtype=bool)
+        rows = np.repeat(np.arange(len(self)), np.diff(self.theme_offsets))
+        matrix[rows, self.theme_ids] = True
+        return matrix
+
+    def mask(self, label: Optional[str] = None, theme: Optional[str] = None, min_score: Optional[float] = None,
+             max_score: Optional[float] = None, since: Optional[int] = None, until: Optional[int] = None):
+        """Row filter for drill-downs; every criterion left as None matches everything."""
+        np = _np()
+        selected = np.ones(len(self), dtype=bool)
+        if label is not None:
+            selected &= self.labels == _LABEL_CODES.get(label, -1)
+        if theme is not None:
+            theme_index = np.flatnonzero(self.theme_vocab == theme)
+            selected &= self.theme_matrix()[:, theme_index[0]] if theme_index.size else False
+        if min_score is not None:
+            selected &= self.scores >= min_score
+        if max_score is not None:
+            selected &= self.scores <= max_score
+        if since is not None:
+            selected &= self.published >= since
+        if until is not None:
+            selected &= self.published < until
+        return selected
+
+    def summarize(self, selected=None) -> Dict:
+        """Sentiment counts, mean score and mean emotions over the selected rows (all by default)."""
+        np = _np()
+        if selected is None:
+            selected = np.ones(len(self), dtype=bool)
+        count = int(selected.sum())
+        label_counts = np.bincount(self.labels[selected], minlength=len(SENTIMENT_LABELS))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN emotion columns just stay NaN
+            emotion_means = np.nanmean(self.emotions[selected], axis=0) if count else np.full(len(EMOTIONS), np.nan)
+        return {
+            'comments': count,
+            'sentiment_data': {label: int(label_counts[code]) for code, label in enumerate(SENTIMENT_LABELS)},
+            'mean_score': float(self.scores[selected].mean()) if count else None,
+            'emotion_data': {e: float(v) for e, v in zip(EMOTIONS, emotion_means) if not np.isnan(v)},
+        }
+
+    def group_by_period(self, period: str = 'day', selected=None) -> List[Dict]:
+        """summarize() per calendar day, Monday-based week or month of publication, oldest first."""
+        np = _np()
+        if selected is None:
+            selected = np.ones(len(self), dtype=bool)
+        days = self.published // 86400
+        if period == 'week':
+            days = (days + 3) // 7 * 7 - 3  # Monday-based weeks (1970-01-01 was a Thursday)
+        buckets = days.astype('datetime64[D]')
+        if period == 'month':
+            buckets = buckets.astype('datetime64[M]')
+        groups = []
+        for bucket in np.unique(buckets[selected]):
+            summary = self.summarize(selected & (buckets == bucket))
+            summary['period'] = str(bucket)
+            groups.append(summary)
+        return groups
+
+    def group_by_theme(self, selected=None, limit: int = 20) -> List[Dict]:
+        """summarize() per theme, most discussed first."""
+        np = _np()
+        if selected is None:
+            selected = np.ones(len(self), dtype=bool)
+        matrix = self.theme_matrix() & selected[:, None]
+        counts = matrix.sum(axis=0)
+        groups = []
+        for index in np.argsort(-counts, kind='stable')[:limit]:
+            if counts[index] == 0:
+                break
+            summary = self.summarize(matrix[:, index])
+            summary['theme'] = str(self.theme_vocab[index])
+            groups.append(summary)
+        return groups
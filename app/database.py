@@ -1,17 +1,72 @@
 # File: app/database.py (Updated)
 import sqlite3
-import bcrypt
 import json
+import time
+import hashlib
 import click
+from datetime import datetime
 from flask import current_app, g
 from flask.cli import with_appcontext
+from . import passwords, metrics, comment_store, transcripts
+
+class TimedCursor(sqlite3.Cursor):
+    """sqlite3 cursor that reports each statement it runs to the metrics registry."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            metrics.observe_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            metrics.observe_query(sql, time.perf_counter() - start)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            metrics.observe_query(sql_script, time.perf_counter() - start)
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements, direct or through a cursor, are reported to the metrics registry."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            metrics.observe_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            metrics.observe_query(sql, time.perf_counter() - start)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            metrics.observe_query(sql_script, time.perf_counter() - start)
 
 def get_db():
     """Connect to the application's configured database."""
     if 'db' not in g:
         g.db = sqlite3.connect(
             current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            factory=TimedConnection
         )
         g.db.row_factory = sqlite3.Row
     return g.db
@@ -55,7 +110,7 @@ def get_user_by_id(user_id):
 
 def create_user_with_channel(email, password, channel_url=None, channel_data=None):
     db = get_db()
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    password_hash = passwords.hash_password(password)
     channel_data = channel_data or {}
     try:
         cursor = db.cursor()
@@ -80,6 +135,19 @@ def create_user_with_channel(email, password, channel_url=None, channel_data=Non
     except sqlite3.IntegrityError:
         return None
 
+def update_user_password_hash(user_id, password_hash, previous_hash=None):
+    """
+    Replaces a user's stored hash, e.g. after upgrading it to the current cost.
+    With previous_hash, only if that is still the stored one.
+    """
+    db = get_db()
+    if previous_hash is None:
+        db.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
+    else:
+        db.execute('UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+                   (password_hash, user_id, previous_hash))
+    db.commit()
+
 def update_user_channel(user_id, channel_url, channel_info):
     """Updated to handle the proper field mapping from services.get_youtube_channel_details()"""
     db = get_db()
@@ -111,53 +179,119 @@ def update_user_channel(user_id, channel_url, channel_info):
 # --- Video Cache Functions (Optional - for performance) ---
 def cache_user_videos(user_id, videos_data):
     """
-    Cache video data to reduce API calls.
-    This is optional but recommended for production use.
+    Cache video data to reduce API calls, replacing the user's previous catalog.
+    Only videos whose record changed are rewritten; the rest just get a new
+    cached_at, so an unchanged catalog keeps its version (see get_catalog_state).
     """
     db = get_db()
-    # Clear existing cached videos for this user
-    db.execute('DELETE FROM cached_videos WHERE user_id = ?', (user_id,))
-    
-    # Insert new video data
+    stored = {row['video_id']: tuple(row) for row in db.execute(
+        f'SELECT {CACHED_VIDEO_COLUMNS} FROM cached_videos WHERE user_id = ?', (user_id,)
+    ).fetchall()}
     for video in videos_data:
-        db.execute('''
-            INSERT INTO cached_videos 
-            (user_id, video_id, title, thumbnail_url, published_at, view_count, 
-             like_count, comment_count, duration, has_captions, cached_at) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-        ''', (
-            user_id,
+        # Exactly as the columns store and return them, so unchanged records compare equal
+        values = (
             video['video_id'],
             video['title'],
+            video.get('description') or '',
             video['thumbnail_url'],
             video['published_at'],
             video['view_count'],
-            video.get('like_count', 0),
+            video.get('like_count') or 0,
             video['comment_count'],
-            video.get('duration', ''),
-            video.get('has_captions', False)
-        ))
-    
+            video.get('duration') or '',
+            video.get('duration_seconds') or 0,
+            json.dumps(video.get('tags') or []),
+            video.get('category_id'),
+            video.get('default_language'),
+            int(bool(video.get('has_captions')))
+        )
+        if stored.pop(video['video_id'], None) != values:
+            db.execute(f'''
+                INSERT OR REPLACE INTO cached_videos (user_id, {CACHED_VIDEO_COLUMNS}, cached_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+            ''', (user_id, *values))
+    # Videos that dropped out of the latest uploads
+    db.executemany('DELETE FROM cached_videos WHERE user_id = ? AND video_id = ?',
+                   [(user_id, video_id) for video_id in stored])
+    db.execute("UPDATE cached_videos SET cached_at = datetime('now') WHERE user_id = ?", (user_id,))
     db.commit()
 
+# The columns of a services.get_youtube_channel_videos() record
+CACHED_VIDEO_COLUMNS = ('video_id, title, description, thumbnail_url, published_at, view_count, like_count, '
+                        'comment_count, duration, duration_seconds, tags, category_id, default_language, has_captions')
+
 def get_cached_user_videos(user_id, max_age_hours=24):
     """
-    Get cached videos if they're not too old.
+    Get cached videos, shaped like fresh ones from YouTube, if they're not too old.
+    Pass max_age_hours=None to accept the cached catalog regardless of age.
     Returns None if cache is stale or empty.
     """
     db = get_db()
-    videos = db.execute('''
-        SELECT * FROM cached_videos 
+    age_clause = f"AND datetime(cached_at, '+{int(max_age_hours)} hours') > datetime('now')" if max_age_hours is not None else ''
+    videos = db.execute(f'''
+        SELECT {CACHED_VIDEO_COLUMNS} FROM cached_videos 
         WHERE user_id = ? 
-        AND datetime(cached_at, '+{} hours') > datetime('now')
+        {age_clause}
         ORDER BY published_at DESC
-    '''.format(max_age_hours), (user_id,)).fetchall()
+    ''', (user_id,)).fetchall()
     
     if videos:
         # Convert to list of dicts
-        return [dict(video) for video in videos]
+        return [dict(video, tags=json.loads(video['tags'] or '[]'), has_captions=bool(video['has_captions']))
+                for video in videos]
     return None
 
+def get_catalog_videos(user_id):
+    """Every cached video of the user regardless of age, for the posting-time profile."""
+    db = get_db()
+    return [dict(row) for row in db.execute(
+        'SELECT published_at, view_count, like_count, comment_count FROM cached_videos WHERE user_id = ?', (user_id,)
+    ).fetchall()]
+
+def _catalog_digest(user_id, columns):
+    """Hash of the given columns of the user's cached videos, or None if nothing is cached."""
+    db = get_db()
+    rows = db.execute(f'SELECT {columns} FROM cached_videos WHERE user_id = ? ORDER BY video_id', (user_id,)).fetchall()
+    if not rows:
+        return None
+    return hashlib.sha1(json.dumps([tuple(row) for row in rows]).encode('utf-8')).hexdigest()
+
+def get_catalog_state(user_id):
+    """
+    (version, cached_at) of the user's cached catalog, or (None, None) if nothing
+    is cached. The version is a hash of the cached records, so it only changes
+    when their content does; cached_at is when the catalog was last fetched, as
+    a naive UTC datetime.
+    """
+    version = _catalog_digest(user_id, CACHED_VIDEO_COLUMNS)
+    if version is None:
+        return None, None
+    cached_at = get_db().execute('SELECT MAX(cached_at) FROM cached_videos WHERE user_id = ?', (user_id,)).fetchone()[0]
+    return version, datetime.fromisoformat(cached_at)
+
+def get_catalog_version(user_id):
+    """
+    Hash of what the posting-time profile is computed from (see get_catalog_videos),
+    so a refetch that only changes titles or thumbnails keeps the stored profile.
+    None if nothing is cached.
+    """
+    return _catalog_digest(user_id, 'video_id, published_at, view_count, like_count, comment_count')
+
+def get_posting_profile(user_id, catalog_version):
+    """The stored posting-time profile, if it was computed from this catalog version."""
+    db = get_db()
+    row = db.execute('SELECT profile FROM posting_profiles WHERE user_id = ? AND catalog_version = ?',
+                     (user_id, catalog_version)).fetchone()
+    return json.loads(row['profile']) if row else None
+
+def save_posting_profile(user_id, catalog_version, profile):
+    db = get_db()
+    db.execute(
+        "INSERT OR REPLACE INTO posting_profiles (user_id, catalog_version, profile, computed_at) VALUES (?, ?, ?, datetime('now'))",
+        (user_id, catalog_version, json.dumps(profile))
+    )
+    db.commit()
+
 # --- Analysis Functions ---
 def save_analysis_data(user_id, analysis_type, video_url, video_id, title, data, metadata):
     db = get_db()
@@ -169,27 +303,238 @@ def save_analysis_data(user_id, analysis_type, video_url, video_id, title, data,
 
 def get_recent_analyses(user_id, limit=5):
     db = get_db()
-    analyses = db.execute('SELECT * FROM analyses WHERE user_id = ? ORDER BY created_at DESC LIMIT ?', (user_id, limit)).fetchall()
+    analyses = db.execute('SELECT * FROM analyses WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?', (user_id, limit)).fetchall()
     return analyses
 
+# created_at as stored (not converted to datetime), so it round-trips through page cursors exactly
+ANALYSIS_SUMMARY_COLUMNS = 'id, type, title, video_id, video_url, CAST(created_at AS TEXT) AS created_at'
+
+def get_analyses_page(user_id, limit, after=None, analysis_type=None, include_data=False):
+    """
+    One page of the user's analyses, newest first. `after` is the (created_at, id)
+    of the last row of the previous page: the seek starts right there in
+    idx_analyses_user_history instead of skipping rows like OFFSET would.
+    """
+    db = get_db()
+    columns = ANALYSIS_SUMMARY_COLUMNS + (', data' if include_data else '')
+    clauses, parameters = ['user_id = ?'], [user_id]
+    if after is not None:
+        clauses.append('(analyses.created_at, id) < (?, ?)')
+        parameters.extend(after)
+    if analysis_type:
+        clauses.append('type = ?')
+        parameters.append(analysis_type)
+    return db.execute(
+        # Qualified: a bare created_at in ORDER BY would mean the text alias and defeat the index
+        f"SELECT {columns} FROM analyses WHERE {' AND '.join(clauses)} "
+        f"ORDER BY analyses.created_at DESC, id DESC LIMIT ?",
+        (*parameters, limit)
+    ).fetchall()
+
+def iter_analyses(user_id, analysis_type=None, page_size=500, include_data=True):
+    """All of the user's analyses, newest first, fetched page by page so memory stays constant."""
+    after = None
+    while True:
+        rows = get_analyses_page(user_id, page_size, after, analysis_type, include_data)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = (rows[-1]['created_at'], rows[-1]['id'])
+
+def get_analyses_version(user_id):
+    """
+    (count, newest id, newest created_at) of the user's analyses: changes whenever
+    one is saved or deleted. Read from idx_analyses_user_history alone.
+    """
+    db = get_db()
+    row = db.execute('SELECT COUNT(*), MAX(id), CAST(MAX(created_at) AS TEXT) FROM analyses WHERE user_id = ?',
+                     (user_id,)).fetchone()
+    return row[0], row[1], datetime.fromisoformat(row[2]) if row[2] else None
+
 def get_dashboard_stats(user_id):
     db = get_db()
     total_analyses = db.execute('SELECT COUNT(*) FROM analyses WHERE user_id = ?', (user_id,)).fetchone()[0]
     analyses_by_type = db.execute('SELECT type, COUNT(*) FROM analyses WHERE user_id = ? GROUP BY type', (user_id,)).fetchall()
     return {'total_analyses': total_analyses, 'analyses_by_type': {row['type']: row['COUNT(*)'] for row in analyses_by_type}}
 
+# --- Comment Analysis Functions ---
+def comment_text_hash(comment_text):
+    return hashlib.sha1(comment_text.encode('utf-8')).hexdigest()
+
+def get_comment_analyses(text_hashes):
+    """Stored NLU results for the given comment hashes, as {text_hash: result}."""
+    db = get_db()
+    hashes = list(dict.fromkeys(text_hashes))
+    found = {}
+    for start in range(0, len(hashes), 500):  # Stay under SQLite's bound-parameter limit
+        chunk = hashes[start:start + 500]
+        rows = db.execute(
+            f'SELECT text_hash, result FROM comment_analyses WHERE text_hash IN ({",".join("?" * len(chunk))})', chunk
+        ).fetchall()
+        found.update((row['text_hash'], json.loads(row['result'])) for row in rows)
+    return found
+
+def save_comment_analyses(results):
+    """Stores {text_hash: result} NLU responses."""
+    db = get_db()
+    db.executemany('INSERT OR REPLACE INTO comment_analyses (text_hash, result) VALUES (?, ?)',
+                   [(text_hash, json.dumps(result)) for text_hash, result in results.items()])
+    db.commit()
+
+def get_comment_results(video_id):
+    """The video's stored per-comment results as a comment_store.CommentResults, or None."""
+    db = get_db()
+    row = db.execute('SELECT arrays FROM video_comment_results WHERE video_id = ?', (video_id,)).fetchone()
+    return comment_store.CommentResults.from_bytes(row['arrays']) if row else None
+
+def get_comment_results_updated_at(video_id):
+    """When the video's stored per-comment results last changed (naive UTC), or None; skips the arrays."""
+    db = get_db()
+    row = db.execute('SELECT CAST(updated_at AS TEXT) FROM video_comment_results WHERE video_id = ?',
+                     (video_id,)).fetchone()
+    return datetime.fromisoformat(row[0]) if row else None
+
+def merge_comment_results(video_id, results):
+    """Adds freshly analyzed comments to the video's stored results (re-analyzed comments are replaced)."""
+    db = get_db()
+    db.commit()
+    # Read, merge and write under the write lock, so two analyses of the video
+    # finishing together can't each overwrite the other's comments
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        existing = get_comment_results(video_id)
+        merged = existing.merge(results) if existing is not None else results
+        db.execute('''
+            INSERT INTO video_comment_results (video_id, comment_count, arrays, updated_at)
+            VALUES (?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))  -- Milliseconds: it versions /api/comment-results
+            ON CONFLICT(video_id) DO UPDATE SET
+                comment_count = excluded.comment_count, arrays = excluded.arrays, updated_at = excluded.updated_at
+        ''', (video_id, len(merged), merged.to_bytes()))
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return merged
+
+def user_knows_video(user_id, video_id):
+    """True if the user has analyzed the video or it is in their cached channel catalog."""
+    db = get_db()
+    return db.execute('''
+        SELECT 1 FROM analyses WHERE user_id = ? AND video_id = ?
+        UNION ALL
+        SELECT 1 FROM cached_videos WHERE user_id = ? AND video_id = ?
+        LIMIT 1
+    ''', (user_id, video_id, user_id, video_id)).fetchone() is not None
+
+# --- Transcript Functions ---
+def save_transcript(video_id, language, segments):
+    """
+    Stores a transcript from an iterable of transcripts.Segment one compressed
+    block at a time, replacing any previous copy. Returns its transcripts row.
+    """
+    db = get_db()
+    db.execute('DELETE FROM transcripts WHERE video_id = ?', (video_id,))
+    db.execute('DELETE FROM transcript_blocks WHERE video_id = ?', (video_id,))
+    segment_count = duration_ms = text_chars = stored_bytes = 0
+    block_start = -1
+    try:
+        for block in transcripts.blocks(segments):
+            data = transcripts.encode_block(block)
+            block_end = max(s.end_ms for s in block)
+            # Keys must increase even if a cue starts out of order
+            block_start = max(block[0].start_ms, block_start + 1)
+            db.execute('INSERT INTO transcript_blocks (video_id, start_ms, end_ms, segment_count, data) VALUES (?, ?, ?, ?, ?)',
+                       (video_id, block_start, block_end, len(block), data))
+            segment_count += len(block)
+            duration_ms = max(duration_ms, block_end)
+            text_chars += sum(len(s.text) for s in block)
+            stored_bytes += len(data)
+    except Exception:
+        db.rollback()  # Never leave a half-written transcript behind
+        raise
+    db.execute('''
+        INSERT INTO transcripts (video_id, language, segment_count, duration_ms, text_chars, stored_bytes)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (video_id, language, segment_count, duration_ms, text_chars, stored_bytes))
+    db.commit()
+    return get_transcript_info(video_id)
+
+def get_transcript_info(video_id):
+    db = get_db()
+    return db.execute('SELECT * FROM transcripts WHERE video_id = ?', (video_id,)).fetchone()
+
+def iter_transcript_segments(video_id, start_ms=0):
+    """
+    Yields the stored segments that start at or after start_ms, in order. Seeks
+    with the block index and reads one block per query, so memory stays at a
+    single decompressed block however long the transcript is.
+    """
+    for _, segment in iter_transcript_positions(video_id, start_ms):
+        yield segment
+
+def iter_transcript_positions(video_id, start_ms=0, position=None):
+    """
+    Like iter_transcript_segments, but yields (position, segment) pairs, where
+    a position is (the block's start_ms key, index within the block) and names
+    exactly one segment, even among segments that start at the same time.
+    With `position`, iteration starts at that segment instead of at start_ms.
+    """
+    db = get_db()
+    if position is not None:
+        first_block, skip, start_ms = position[0], position[1], None
+    else:
+        first_block = db.execute('SELECT MAX(start_ms) FROM transcript_blocks WHERE video_id = ? AND start_ms <= ?',
+                                 (video_id, start_ms)).fetchone()[0]
+        skip = 0
+    block = db.execute('''
+        SELECT start_ms, data FROM transcript_blocks WHERE video_id = ? AND start_ms >= ? ORDER BY start_ms LIMIT 1
+    ''', (video_id, first_block if first_block is not None else 0)).fetchone()
+    if position is not None and block is not None and block['start_ms'] != first_block:
+        skip = 0  # The position's block is gone; carry on from the next one
+    while block is not None:
+        for index, segment in enumerate(transcripts.decode_block(block['data'])):
+            if index >= skip and (start_ms is None or segment.start_ms >= start_ms):
+                yield (block['start_ms'], index), segment
+        skip = 0
+        block = db.execute('''
+            SELECT start_ms, data FROM transcript_blocks WHERE video_id = ? AND start_ms > ? ORDER BY start_ms LIMIT 1
+        ''', (video_id, block['start_ms'])).fetchone()
+
+def get_latest_analysis(user_id, video_id, analysis_type):
+    """The newest analysis of this type for the video regardless of age, with its metadata and age, or None."""
+    db = get_db()
+    row = db.execute('''
+        SELECT id, data, metadata, created_at, (julianday('now') - julianday(created_at)) * 24 AS age_hours FROM analyses
+        WHERE user_id = ? AND video_id = ? AND type = ?
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    ''', (user_id, video_id, analysis_type)).fetchone()
+    if not row:
+        return None
+    return {'id': row['id'], 'data': json.loads(row['data']), 'metadata': json.loads(row['metadata'] or '{}'),
+            'created_at': row['created_at'], 'age_hours': row['age_hours']}
+
+def renew_analysis(analysis_id, metadata):
+    """Marks a stored analysis as current as of now, with new metadata, in place rather than as a new row."""
+    db = get_db()
+    db.execute("UPDATE analyses SET created_at = datetime('now'), metadata = ? WHERE id = ?",
+               (json.dumps(metadata), analysis_id))
+    db.commit()
+
 def get_cached_analysis(user_id, video_id, analysis_type, max_age_hours=24):
     """
     Get a cached analysis if it's not too old.
+    Pass max_age_hours=None to accept the latest analysis regardless of age.
     Returns the parsed data if found, otherwise None.
     """
     db = get_db()
+    age_clause = f"AND datetime(created_at, '+{int(max_age_hours)} hours') > datetime('now')" if max_age_hours is not None else ''
     analysis = db.execute(f'''
         SELECT data, created_at FROM analyses
         WHERE user_id = ? 
         AND video_id = ? 
         AND type = ?
-        AND datetime(created_at, '+{max_age_hours} hours') > datetime('now')
+        {age_clause}
         ORDER BY created_at DESC
         LIMIT 1
     ''', (user_id, video_id, analysis_type)).fetchone()
@@ -197,4 +542,136 @@ def get_cached_analysis(user_id, video_id, analysis_type, max_age_hours=24):
     if analysis:
         # The 'data' column is stored as a JSON string, so we need to parse it.
         return json.loads(analysis['data'])
-    return None
\ No newline at end of file
+    return None
+
+# --- Generation Cache Functions ---
+def get_generation(key, max_age_days=30):
+    """A cached generation by exact key (see generation_cache.cache_key), counting the hit."""
+    db = get_db()
+    row = db.execute(
+        "SELECT key, scope, subject, result, created_at FROM generation_cache WHERE key = ? AND created_at >= datetime('now', ?)",
+        (key, f'-{int(max_age_days)} days')
+    ).fetchone()
+    if row:
+        db.execute("UPDATE generation_cache SET hits = hits + 1, last_hit_at = datetime('now') WHERE key = ?", (key,))
+        db.commit()
+    return row
+
+def get_recent_generations(limit, max_age_days=30):
+    """The most recently used cached generations, most recent first."""
+    db = get_db()
+    return db.execute(
+        "SELECT key, scope, subject, result, created_at FROM generation_cache WHERE created_at >= datetime('now', ?) "
+        "ORDER BY last_hit_at DESC LIMIT ?",
+        (f'-{int(max_age_days)} days', limit)
+    ).fetchall()
+
+def save_generation(key, scope, subject, result):
+    db = get_db()
+    db.execute(
+        'INSERT OR REPLACE INTO generation_cache (key, scope, subject, result) VALUES (?, ?, ?, ?)',
+        (key, scope, subject, result)
+    )
+    db.commit()
+
+# --- Background Job Functions ---
+def get_channel_owners(user_ids=None):
+    """Active users with a verified, linked channel, optionally limited to the given ids."""
+    db = get_db()
+    query = 'SELECT * FROM users WHERE channel_verified AND is_active AND channel_id IS NOT NULL'
+    params = list(user_ids or [])
+    if params:
+        query += f' AND id IN ({",".join("?" * len(params))})'
+    return db.execute(query + ' ORDER BY id', params).fetchall()
+
+def claim_job(name, lease_minutes, min_interval_minutes=0):
+    """
+    Takes the job's lease unless another process holds it, or the last run
+    started less than min_interval_minutes ago. Returns the claim (the run's
+    start time, which renew_job and release_job check), or None if not taken.
+    """
+    db = get_db()
+    db.execute('INSERT OR IGNORE INTO background_jobs (name) VALUES (?)', (name,))
+    cursor = db.execute('''
+        UPDATE background_jobs SET lease_until = datetime('now', ?),
+            last_run_at = strftime('%Y-%m-%d %H:%M:%f', 'now')  -- Milliseconds: it identifies the claim
+        WHERE name = ?
+        AND (lease_until IS NULL OR lease_until <= datetime('now'))
+        AND (last_run_at IS NULL OR last_run_at <= datetime('now', ?))
+    ''', (f'+{int(lease_minutes)} minutes', name, f'-{int(min_interval_minutes)} minutes'))
+    db.commit()
+    if cursor.rowcount != 1:
+        return None
+    return db.execute('SELECT CAST(last_run_at AS TEXT) FROM background_jobs WHERE name = ?', (name,)).fetchone()[0]
+
+def renew_job(name, lease_minutes, claim):
+    """Extends the lease by lease_minutes from now; False if it has lapsed or another run has claimed it since."""
+    db = get_db()
+    cursor = db.execute('''
+        UPDATE background_jobs SET lease_until = datetime('now', ?)
+        WHERE name = ? AND last_run_at = ? AND lease_until > datetime('now')
+    ''', (f'+{int(lease_minutes)} minutes', name, claim))
+    db.commit()
+    return cursor.rowcount == 1
+
+def release_job(name, summary, claim=None):
+    """Gives the lease back and records the run's summary; with a claim, only if the lease is still that run's."""
+    db = get_db()
+    if claim is None:
+        db.execute('UPDATE background_jobs SET lease_until = NULL, last_summary = ? WHERE name = ?',
+                   (json.dumps(summary), name))
+    else:
+        db.execute('UPDATE background_jobs SET lease_until = NULL, last_summary = ? WHERE name = ? AND last_run_at = ?',
+                   (json.dumps(summary), name, claim))
+    db.commit()
+
+def get_job_usage(name):
+    """(quota_used, nlu_used) of the job today (UTC); the counters reset each day."""
+    db = get_db()
+    db.execute('''
+        UPDATE background_jobs SET budget_day = date('now'), quota_used = 0, nlu_used = 0
+        WHERE name = ? AND (budget_day IS NULL OR budget_day != date('now'))
+    ''', (name,))
+    db.commit()
+    row = db.execute('SELECT quota_used, nlu_used FROM background_jobs WHERE name = ?', (name,)).fetchone()
+    return (row['quota_used'], row['nlu_used']) if row else (0, 0)
+
+def add_job_usage(name, quota_units, nlu_calls):
+    db = get_db()
+    db.execute('UPDATE background_jobs SET quota_used = quota_used + ?, nlu_used = nlu_used + ? WHERE name = ?',
+               (quota_units, nlu_calls, name))
+    db.commit()
+
+# --- Maintenance Functions ---
+def get_analyses_for_retention(before_id=None, limit=1000):
+    """A batch of analyses by descending id (insertion order, so newest first), with their payloads."""
+    db = get_db()
+    clause = 'WHERE id < ?' if before_id is not None else ''
+    return db.execute(
+        f'SELECT id, user_id, video_id, type, created_at, data, length(data) + length(IFNULL(metadata, \'\')) AS size '
+        f'FROM analyses {clause} ORDER BY id DESC LIMIT ?',
+        (before_id, limit) if before_id is not None else (limit,)
+    ).fetchall()
+
+def delete_analyses(ids):
+    """Deletes analyses by id in one short transaction."""
+    db = get_db()
+    db.executemany('DELETE FROM analyses WHERE id = ?', [(i,) for i in ids])
+    db.commit()
+
+def get_storage_stats():
+    """Page size, page counts and auto-vacuum mode of the database file."""
+    db = get_db()
+    return {name: db.execute(f'PRAGMA {name}').fetchone()[0]
+            for name in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum')}
+
+def incremental_vacuum(pages):
+    """Returns up to `pages` free pages to the filesystem (auto_vacuum = INCREMENTAL only)."""
+    db = get_db()
+    # Run through executescript: every step of the statement frees one page, and execute() only takes the first
+    db.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+
+def analyze_database():
+    db = get_db()
+    db.execute('ANALYZE')
+    db.commit()
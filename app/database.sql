@@ -1,4 +1,10 @@
 -- File: app/database.sql (Updated)
+-- Space freed by deleted rows can be returned to the filesystem (see app/maintenance.py);
+-- only takes effect on an empty database, existing ones are converted by database_migration.py
+PRAGMA auto_vacuum = INCREMENTAL;
+-- The schema below is that of the last migration in app/migrations.py (SCHEMA_VERSION)
+PRAGMA user_version = 3;
+
 -- Users table with comprehensive channel information
 CREATE TABLE users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -38,25 +44,117 @@ CREATE TABLE cached_videos (
     user_id INTEGER NOT NULL,
     video_id TEXT NOT NULL,
     title TEXT NOT NULL,
+    description TEXT,  -- First 200 characters
     thumbnail_url TEXT,
     published_at TEXT,
     view_count INTEGER DEFAULT 0,
     like_count INTEGER DEFAULT 0,
     comment_count INTEGER DEFAULT 0,
     duration TEXT,
+    duration_seconds INTEGER DEFAULT 0,
+    tags TEXT,  -- JSON list, first 5 tags
+    category_id TEXT,
+    default_language TEXT,
     has_captions BOOLEAN DEFAULT FALSE,
     cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
     UNIQUE(user_id, video_id)  -- Prevent duplicate cache entries
 );
 
+-- Best posting weekdays and hours per channel (see app/posting_times.py), recomputed when the catalog changes
+CREATE TABLE posting_profiles (
+    user_id INTEGER PRIMARY KEY,
+    catalog_version TEXT NOT NULL,  -- database.get_catalog_version() the profile was computed from
+    profile TEXT NOT NULL,          -- JSON
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- One NLU result per distinct comment text, shared by the sentiment and theme tools
+CREATE TABLE comment_analyses (
+    text_hash TEXT PRIMARY KEY,  -- SHA-1 of the comment text
+    result TEXT NOT NULL,        -- JSON NLU response (sentiment, emotion, concepts, entities)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-comment analysis results of a video, stored column-wise (see app/comment_store.py)
+CREATE TABLE video_comment_results (
+    video_id TEXT PRIMARY KEY,
+    comment_count INTEGER NOT NULL,
+    arrays BLOB NOT NULL,  -- Compressed .npz of the CommentResults columns
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Video transcripts, stored as compressed blocks of timed segments (see app/transcripts.py)
+CREATE TABLE transcripts (
+    video_id TEXT PRIMARY KEY,  -- Present only once every block is stored
+    language TEXT,
+    segment_count INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    text_chars INTEGER NOT NULL,
+    stored_bytes INTEGER NOT NULL,
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE transcript_blocks (
+    video_id TEXT NOT NULL,
+    start_ms INTEGER NOT NULL,  -- Start of the block's first segment; the key doubles as the seek index
+    end_ms INTEGER NOT NULL,
+    segment_count INTEGER NOT NULL,
+    data BLOB NOT NULL,         -- zlib-compressed segments
+    PRIMARY KEY (video_id, start_ms)
+);
+
+-- Per-user daily cost budgets for rate-limited endpoints
+CREATE TABLE rate_limits (
+    user_id INTEGER NOT NULL,
+    endpoint TEXT NOT NULL,
+    day TEXT NOT NULL,  -- UTC date, YYYY-MM-DD
+    cost_used INTEGER DEFAULT 0,
+    PRIMARY KEY (user_id, endpoint, day),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Lease, daily budget usage and last result of periodic background jobs (e.g. prewarming)
+CREATE TABLE background_jobs (
+    name TEXT PRIMARY KEY,
+    lease_until TIMESTAMP,         -- A run holds the job until then
+    last_run_at TIMESTAMP,
+    last_summary TEXT,             -- JSON report of the last run
+    budget_day TEXT,               -- UTC date the usage counters belong to
+    quota_used INTEGER DEFAULT 0,  -- YouTube quota units
+    nlu_used INTEGER DEFAULT 0     -- NLU calls
+);
+
+-- Generated scripts, reused for identical and near-identical requests (see app/generation_cache.py)
+CREATE TABLE generation_cache (
+    key TEXT PRIMARY KEY,    -- Hash of the normalized prompt, model and parameters
+    scope TEXT NOT NULL,     -- Hash of the model and parameters; near-duplicates only match within it
+    subject TEXT NOT NULL,   -- Normalized text near-duplicate lookups compare (the script topic)
+    result TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    hits INTEGER DEFAULT 0
+);
+
+-- IAM bearer tokens shared by all worker processes (see app/iam.py)
+CREATE TABLE iam_tokens (
+    key TEXT PRIMARY KEY,  -- Hash of the IAM URL and API key
+    access_token TEXT,
+    issued_at REAL,        -- Unix time
+    expires_at REAL,       -- Unix time, from the real expires_in
+    lease_until REAL       -- A process refreshing the token holds it until then
+);
+
 -- Indexes for better performance
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_channel_id ON users(channel_id);
-CREATE INDEX idx_analyses_user_id ON analyses(user_id);
+CREATE INDEX idx_analyses_user_history ON analyses(user_id, created_at, id, type);  -- Keyset pages, type filter read from the index
 CREATE INDEX idx_analyses_created_at ON analyses(created_at);
+CREATE INDEX idx_analyses_video_latest ON analyses(user_id, video_id, type, created_at);  -- Newest analysis of a video
 CREATE INDEX idx_cached_videos_user_id ON cached_videos(user_id);
 CREATE INDEX idx_cached_videos_cached_at ON cached_videos(cached_at);
+CREATE INDEX idx_generation_cache_last_hit ON generation_cache(last_hit_at);
 
 -- Triggers to update timestamps (optional but helpful)
 CREATE TRIGGER update_users_timestamp 
@@ -0,0 +1,112 @@
+# File: app/dedup.py
+# Near-duplicate detection for comment text: MinHash signatures over character
+# shingles, bucketed with LSH banding. Kept free of Flask like analysis.py.
+import re
+import zlib
+import random
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+_PRIME = (1 << 32) + 15  # Smallest prime above the 32-bit crc32 range
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize(text: str) -> str:
+    """Lower-cases and collapses punctuation/emoji runs, so 'FIRST!!!' and 'first' compare equal."""
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """Hashed character `size`-grams of already normalized text."""
+    if len(text) <= size:
+        return {zlib.crc32(text.encode('utf-8'))}
+    return {zlib.crc32(text[i:i + size].encode('utf-8')) for i in range(len(text) - size + 1)}
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """
+    Fixed family of `bands * rows` universal hash functions. Two texts share an
+    LSH bucket when all `rows` minimums of some band agree, which happens with
+    probability 1 - (1 - J^rows)^bands for Jaccard similarity J.
+    """
+
+    def __init__(self, bands: int = 8, rows: int = 4, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(bands * rows)]
+
+    def signature(self, hashed_shingles: Set[int]) -> List[int]:
+        values = list(hashed_shingles)
+        return [min([(a * h + b) % _PRIME for h in values]) for a, b in self._params]
+
+    def band_keys(self, signature: Sequence[int]) -> List[Tuple]:
+        rows = self.rows
+        return [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+
+_default_hasher = MinHasher()
+
+
+def group_near_duplicates(comments: Sequence[str], threshold: float = 0.8, shingle_size: int = 5,
+                          hasher: Optional[MinHasher] = None) -> List[List[int]]:
+    """
+    Groups the indexes of near-duplicate comments, in order of first appearance.
+    The first index of each group is its representative.
+
+    Exact matches after normalization are grouped directly. LSH only proposes
+    candidate pairs; a pair is merged when the exact Jaccard similarity of
+    their shingle sets reaches `threshold`.
+    """
+    hasher = hasher or _default_hasher
+
+    # Exact duplicates (after normalization) never need hashing
+    order: List[str] = []
+    members: Dict[str, List[int]] = {}
+    for index, comment in enumerate(comments):
+        key = normalize(comment)
+        if key not in members:
+            members[key] = []
+            order.append(key)
+        members[key].append(index)
+
+    parent = list(range(len(order)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    shingle_sets = [shingles(key, shingle_size) for key in order]
+    buckets: Dict[Tuple, List[int]] = {}
+    for i, shingle_set in enumerate(shingle_sets):
+        compared = set()
+        for band_key in hasher.band_keys(hasher.signature(shingle_set)):
+            for j in buckets.setdefault(band_key, []):
+                if j in compared:
+                    continue
+                compared.add(j)
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j and jaccard(shingle_set, shingle_sets[j]) >= threshold:
+                    # Keep the earlier comment as the group's root/representative
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+            buckets[band_key].append(i)
+
+    groups: Dict[int, List[int]] = {}
+    for i, key in enumerate(order):
+        groups.setdefault(find(i), []).extend(members[key])
+    return [sorted(indexes) for _, indexes in sorted(groups.items())]
+
+def dedupe_comments(comments: Sequence[str], threshold: float = 0.8, shingle_size: int = 5,
+                    hasher: Optional[MinHasher] = None) -> List[Tuple[str, int]]:
+    """
+    Collapses near-duplicate comments. Returns (representative, weight) pairs in
+    order of first appearance, where weight is how many comments the
+    representative stands for; the weights always sum to len(comments).
+    """
+    return [(comments[group[0]], len(group))
+            for group in group_near_duplicates(comments, threshold, shingle_size, hasher)]
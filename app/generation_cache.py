@@ -0,0 +1,140 @@
+# File: app/generation_cache.py
+# Reuses generated text for repeated requests: exact hits by normalized
+# (prompt, model, parameters) and, optionally, near-duplicate hits by the
+# Jaccard similarity of the request's subject (the script topic) over
+# character shingles, within the same model and parameters and only with the
+# same numbers in it. Each process keeps an LRU of recent entries in memory
+# in front of the generation_cache table.
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+from flask import current_app
+
+from . import database, dedup, metrics
+
+SHINGLE_SIZE = 3  # Topics are short; 3-grams still separate "python tips" from "java tips"
+_NUMBER = re.compile(r'\d+')  # "laptops 2024" and "laptops 2025" are near-identical strings but different topics
+
+
+class CachedGeneration(NamedTuple):
+    text: str
+    subject: str
+    match: str  # 'exact' or 'similar'
+
+
+class _Entry(NamedTuple):
+    scope: str
+    subject: str
+    text: str
+    shingles: Set[int]
+    numbers: Tuple[str, ...]
+    created_at: datetime  # Naive UTC, like the table's
+
+
+def _hash(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+def scope_key(model_id: str, params: Optional[Dict] = None) -> str:
+    """Identifies the model and parameters; near-duplicate matches never cross scopes."""
+    return _hash(model_id or '', params or {})
+
+def cache_key(prompt: str, model_id: str, params: Optional[Dict] = None) -> str:
+    """Identical for prompts that only differ in case, punctuation and spacing."""
+    return _hash(dedup.normalize(prompt), model_id or '', params or {})
+
+
+class GenerationCache:
+    """
+    LRU of up to `max_entries` generations in front of the generation_cache
+    table. Exact misses fall through to the table; near-duplicate lookups scan
+    the in-memory entries, which are warmed from the most recently used rows.
+    """
+
+    def __init__(self, max_entries: int = 256, similarity: Optional[float] = None, max_age_days: int = 30):
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.max_age_days = max_age_days
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._warmed = False
+
+    def _remember(self, key: str, scope: str, subject: str, text: str, created_at: datetime):
+        with self._lock:
+            self._entries[key] = _Entry(scope, subject, text, dedup.shingles(subject, SHINGLE_SIZE),
+                                        tuple(_NUMBER.findall(subject)), created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _warm(self):
+        if self._warmed:
+            return
+        self._warmed = True
+        for row in reversed(database.get_recent_generations(self.max_entries, self.max_age_days)):
+            self._remember(row['key'], row['scope'], row['subject'], row['result'], row['created_at'])
+
+    def _oldest_allowed(self) -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=self.max_age_days)
+
+    def get(self, key: str, scope: str, subject: Optional[str] = None) -> Optional[CachedGeneration]:
+        """The cached generation for `key`, else the most similar one for `subject` within `scope`."""
+        self._warm()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.created_at < self._oldest_allowed():
+                del self._entries[key]  # Expired in memory as it has in the table
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+        if entry is None:
+            row = database.get_generation(key, self.max_age_days)
+            if row:
+                self._remember(row['key'], row['scope'], row['subject'], row['result'], row['created_at'])
+                entry = self._entries.get(key)
+        if entry:
+            metrics.record_cache('generation', True)
+            return CachedGeneration(entry.text, entry.subject, 'exact')
+
+        similar = self._most_similar(scope, dedup.normalize(subject)) if subject and self.similarity else None
+        metrics.record_cache('generation', similar is not None)
+        return similar
+
+    def _most_similar(self, scope: str, subject: str) -> Optional[CachedGeneration]:
+        wanted = dedup.shingles(subject, SHINGLE_SIZE)
+        numbers = tuple(_NUMBER.findall(subject))
+        oldest = self._oldest_allowed()
+        best_key, best_score = None, self.similarity
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry.scope == scope and entry.numbers == numbers and entry.created_at >= oldest:
+                    score = dedup.jaccard(wanted, entry.shingles)
+                    if score >= best_score:
+                        best_key, best_score = key, score
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            entry = self._entries[best_key]
+        return CachedGeneration(entry.text, entry.subject, 'similar')
+
+    def put(self, key: str, scope: str, subject: str, text: str):
+        subject = dedup.normalize(subject)
+        database.save_generation(key, scope, subject, text)
+        self._remember(key, scope, subject, text, datetime.now(timezone.utc).replace(tzinfo=None))
+
+
+def get_cache() -> Optional[GenerationCache]:
+    """The current app's generation cache, or None when GENERATION_CACHE_ENABLED is off."""
+    return current_app.extensions.get('generation_cache')
+
+def init_app(app):
+    if app.config.get('GENERATION_CACHE_ENABLED', True):
+        app.extensions['generation_cache'] = GenerationCache(
+            max_entries=app.config.get('GENERATION_CACHE_SIZE', 256),
+            similarity=app.config.get('GENERATION_CACHE_SIMILARITY'),
+            max_age_days=app.config.get('GENERATION_CACHE_DAYS', 30),
+        )
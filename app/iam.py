@@ -0,0 +1,183 @@
+# File: app/iam.py
+# IBM Cloud IAM bearer tokens shared by every thread and worker process.
+# The current token is kept in the iam_tokens table, so one process refreshes
+# it for all of them, and a background thread in each process renews it well
+# before its real expires_in runs out: requests only ever wait on IAM for the
+# very first token. Opens its own SQLite connections instead of
+# database.get_db(), because the refresher runs outside any app context.
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Callable, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Token(NamedTuple):
+    value: str
+    issued_at: float
+    expires_at: float
+
+    def refresh_at(self, fraction: float) -> float:
+        """When `fraction` of the token's lifetime has passed."""
+        return self.issued_at + (self.expires_at - self.issued_at) * fraction
+
+
+def token_key(iam_url: str, api_key: str) -> str:
+    """Identifies a credential in the shared table without storing the API key itself."""
+    return hashlib.sha256(f'{iam_url}\n{api_key}'.encode('utf-8')).hexdigest()
+
+
+class TokenStore:
+    """
+    The iam_tokens table. With no database file (None or ':memory:') nothing is
+    shared and every process keeps its own token; database errors degrade the same way.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path if path and path != ':memory:' else None
+
+    def _execute(self, sql: str, parameters=()) -> Optional[Tuple[list, int]]:
+        """(rows, rowcount) of one committed statement, or None if nothing is shared."""
+        if self.path is None:
+            return None
+        try:
+            conn = sqlite3.connect(self.path, timeout=5)
+            try:
+                with conn:
+                    cursor = conn.execute(sql, parameters)
+                    return cursor.fetchall(), cursor.rowcount
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"IAM token store unavailable, using a per-process token: {e}")
+            return None
+
+    def load(self, key: str) -> Optional[Token]:
+        result = self._execute('SELECT access_token, issued_at, expires_at FROM iam_tokens '
+                               'WHERE key = ? AND access_token IS NOT NULL', (key,))
+        return Token(*result[0][0]) if result and result[0] else None
+
+    def save(self, key: str, token: Token):
+        """Stores a fresh token and gives up the refresh lease."""
+        self._execute('''
+            INSERT INTO iam_tokens (key, access_token, issued_at, expires_at, lease_until) VALUES (?, ?, ?, ?, NULL)
+            ON CONFLICT (key) DO UPDATE SET access_token = excluded.access_token, issued_at = excluded.issued_at,
+                                            expires_at = excluded.expires_at, lease_until = NULL
+        ''', (key, token.value, token.issued_at, token.expires_at))
+
+    def claim_refresh(self, key: str, lease_seconds: float) -> bool:
+        """Takes the right to refresh this token unless another process holds it."""
+        now = time.time()
+        result = self._execute('''
+            INSERT INTO iam_tokens (key, lease_until) VALUES (?, ?)
+            ON CONFLICT (key) DO UPDATE SET lease_until = excluded.lease_until
+            WHERE iam_tokens.lease_until IS NULL OR iam_tokens.lease_until <= ?
+        ''', (key, now + lease_seconds, now))
+        return result is None or result[1] == 1
+
+    def release(self, key: str):
+        self._execute('UPDATE iam_tokens SET lease_until = NULL WHERE key = ?', (key,))
+
+
+class TokenProvider:
+    """
+    Hands out the current token for one credential. `fetch` asks IAM for a new
+    one and returns (access_token, expires_in) or None on failure. Tokens are
+    renewed once `refresh_fraction` of their lifetime has passed and never handed
+    out within `min_validity` seconds of expiring. `lease_seconds` must outlast the
+    slowest fetch, or a second process may refresh at the same time.
+    """
+
+    def __init__(self, fetch: Callable[[], Optional[Tuple[str, int]]], store: TokenStore, key: str,
+                 refresh_fraction: float = 0.8, min_validity: float = 60, retry_seconds: float = 30,
+                 lease_seconds: float = 60):
+        self.fetch = fetch
+        self.store = store
+        self.key = key
+        self.refresh_fraction = refresh_fraction
+        self.min_validity = min_validity
+        self.retry_seconds = retry_seconds
+        self.lease_seconds = lease_seconds
+        self._token: Optional[Token] = None
+        self._lock = threading.Lock()
+        self._refresher_pid = None
+
+    def get_token(self) -> Optional[str]:
+        token = self._usable()
+        if token is None:
+            with self._lock:  # One thread per process goes to IAM; the others wait for its token
+                token = self._usable() or self._refresh(wait=True)
+        self._start_refresher()
+        return token.value if token else None
+
+    def _latest(self) -> Optional[Token]:
+        """The newer of this process's token and the shared one."""
+        stored = self.store.load(self.key)
+        if stored and (self._token is None or stored.expires_at > self._token.expires_at):
+            self._token = stored
+        return self._token
+
+    def _usable(self) -> Optional[Token]:
+        token = self._token
+        if token is None or time.time() >= token.expires_at - self.min_validity:
+            token = self._latest()
+        return token if token and time.time() < token.expires_at - self.min_validity else None
+
+    def _refresh(self, wait: bool = False) -> Optional[Token]:
+        """
+        Fetches a new token under the shared lease. If another process holds the
+        lease, returns None, or with `wait` polls for its token until the lease
+        would have lapsed and then fetches regardless.
+        """
+        if not self.store.claim_refresh(self.key, self.lease_seconds):
+            if not wait:
+                return None
+            deadline = time.time() + self.lease_seconds
+            while time.time() < deadline:
+                time.sleep(0.1)
+                token = self._usable()
+                if token:
+                    return token
+        issued_at = time.time()
+        try:
+            result = self.fetch()
+        except Exception:
+            self.store.release(self.key)
+            raise
+        if result is None:
+            self.store.release(self.key)
+            return None
+        value, expires_in = result
+        token = Token(value, issued_at, issued_at + expires_in)
+        self.store.save(self.key, token)
+        self._token = token
+        return token
+
+    def _start_refresher(self):
+        """Starts this process's refresher thread; per pid, so forked workers each get their own."""
+        if self._refresher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._refresher_pid == os.getpid():
+                return
+            self._refresher_pid = os.getpid()
+        threading.Thread(target=self._refresh_loop, name='iam-token-refresher', daemon=True).start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                token = self._latest()
+                due = token.refresh_at(self.refresh_fraction) if token else time.time()
+                if time.time() >= due:
+                    token = self._refresh()
+                    # None: IAM failed, or another process is refreshing and its token is picked up next time
+                    due = token.refresh_at(self.refresh_fraction) if token else time.time() + self.retry_seconds
+            except Exception:
+                # The refresher lives as long as the process; an unexpected error only delays the next attempt
+                logger.exception("IAM token refresh failed")
+                due = time.time() + self.retry_seconds
+            time.sleep(max(1.0, due - time.time()))
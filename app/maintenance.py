@@ -0,0 +1,129 @@
+# File: app/maintenance.py
+# Keeps the analyses table from growing without bound: every cache miss and
+# every generated script or calendar stores a full payload, and nothing else
+# ever deletes one. A pass applies ANALYSIS_RETENTION, collapses identical
+# payloads, hands the freed pages back to the filesystem and refreshes the
+# query planner's statistics. Run it from cron with `python maintain.py`; a
+# lease in background_jobs makes sure two runs never overlap.
+import time
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from flask import current_app
+
+from . import database
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'maintenance'
+LEASE_MINUTES = 60
+AUTO_VACUUM_INCREMENTAL = 2  # PRAGMA auto_vacuum value
+
+
+class Retention:
+    """
+    Decides which analyses go, fed newest row first. It only remembers the
+    payload digests kept so far per (user, video, type), so memory grows with
+    the number of groups rather than rows.
+    """
+
+    def __init__(self, rules: Dict[str, Dict], default: Dict, now: Optional[datetime] = None):
+        self.rules = rules
+        self.default = default
+        self.now = now or datetime.now(timezone.utc).replace(tzinfo=None)  # created_at is naive UTC
+        self._kept = defaultdict(set)
+
+    def verdict(self, row) -> Optional[str]:
+        """Why the row goes ('expired', 'duplicate' or 'excess'), or None if it is kept."""
+        rule = self.rules.get(row['type'], self.default)
+        max_age_days = rule.get('max_age_days')
+        if max_age_days is not None and row['created_at'] < self.now - timedelta(days=max_age_days):
+            return 'expired'
+        kept = self._kept[(row['user_id'], row['video_id'], row['type'])]
+        digest = hashlib.blake2b(row['data'].encode('utf-8'), digest_size=16).digest()
+        if digest in kept:
+            return 'duplicate'  # A newer row of the group has the same payload
+        if len(kept) >= max(1, rule.get('keep_latest', 1)):
+            return 'excess'
+        kept.add(digest)
+        return None
+
+
+def run_maintenance(dry_run: bool = False, vacuum: bool = True) -> Dict:
+    """
+    One retention and compaction pass over the analyses table. With `dry_run`
+    the rows that would go are counted but nothing is deleted or vacuumed.
+    Returns a report of what was deleted, the space reclaimed and the time spent.
+    """
+    config = current_app.config
+    if not database.claim_job(JOB_NAME, LEASE_MINUTES):
+        return {'skipped': 'another run holds the lease'}
+
+    before = database.get_storage_stats()
+    summary = {'dry_run': dry_run, 'scanned': 0, 'deleted': 0, 'deleted_bytes': 0,
+               'reasons': {'expired': 0, 'duplicate': 0, 'excess': 0}, 'by_type': {}, 'seconds': {}}
+    try:
+        start = time.perf_counter()
+        _apply_retention(Retention(config.get('ANALYSIS_RETENTION', {}),
+                                   config.get('ANALYSIS_RETENTION_DEFAULT', {'keep_latest': 10, 'max_age_days': None})),
+                         config.get('MAINTENANCE_BATCH_SIZE', 500), dry_run, summary)
+        summary['seconds']['retention'] = round(time.perf_counter() - start, 3)
+
+        if not dry_run:
+            start = time.perf_counter()
+            summary['vacuum'] = _vacuum(config.get('MAINTENANCE_VACUUM_PAGES', 2000)) if vacuum else 'skipped'
+            summary['seconds']['vacuum'] = round(time.perf_counter() - start, 3)
+
+            start = time.perf_counter()
+            database.analyze_database()
+            summary['seconds']['analyze'] = round(time.perf_counter() - start, 3)
+    finally:
+        after = database.get_storage_stats()
+        summary['storage'] = {
+            'file_bytes_before': before['page_count'] * before['page_size'],
+            'file_bytes_after': after['page_count'] * after['page_size'],
+            'reclaimed_bytes': (before['page_count'] - after['page_count']) * after['page_size'],
+            'free_bytes': after['freelist_count'] * after['page_size'],  # Reused by SQLite, but not returned
+        }
+        database.release_job(JOB_NAME, summary)
+    logger.info(f"Maintenance finished: {summary}")
+    return summary
+
+def _apply_retention(retention: Retention, batch_size: int, dry_run: bool, summary: Dict):
+    """Walks the table newest first in batches, deleting each batch's losers in its own short transaction."""
+    before_id = None
+    while True:
+        rows = database.get_analyses_for_retention(before_id, batch_size)
+        if not rows:
+            return
+        doomed = []
+        for row in rows:
+            reason = retention.verdict(row)
+            if reason:
+                doomed.append(row['id'])
+                summary['reasons'][reason] += 1
+                summary['by_type'][row['type']] = summary['by_type'].get(row['type'], 0) + 1
+                summary['deleted_bytes'] += row['size']
+        if doomed and not dry_run:
+            database.delete_analyses(doomed)
+        summary['scanned'] += len(rows)
+        summary['deleted'] += len(doomed)
+        before_id = rows[-1]['id']
+
+def _vacuum(step_pages: int):
+    """Frees the free pages a few at a time, so other connections get the write lock in between."""
+    stats = database.get_storage_stats()
+    if stats['auto_vacuum'] != AUTO_VACUUM_INCREMENTAL:
+        return 'skipped: auto_vacuum is not INCREMENTAL (run database_migration.py)'
+    steps = 0
+    while stats['freelist_count']:
+        free_pages = stats['freelist_count']
+        database.incremental_vacuum(step_pages)
+        steps += 1
+        stats = database.get_storage_stats()
+        if stats['freelist_count'] >= free_pages:
+            break
+    return {'steps': steps}
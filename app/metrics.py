@@ -0,0 +1,253 @@
+# File: app/metrics.py
+import os
+import re
+import json
+import time
+import atexit
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from flask import Blueprint, Response, g, request
+from .circuitbreaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('metrics', __name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name -> (type, help text)
+METRICS = {
+    'alice_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status.'),
+    'alice_http_request_errors_total': ('counter', 'HTTP requests that ended in a 5xx response.'),
+    'alice_http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint.'),
+    'alice_upstream_calls_total': ('counter', 'Upstream API calls by upstream, operation and outcome (ok/error/rejected).'),
+    'alice_upstream_duration_seconds': ('histogram', 'Upstream API call latency.'),
+    'alice_db_query_duration_seconds': ('histogram', 'SQLite statement latency by statement and table.'),
+    'alice_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit/miss).'),
+}
+
+
+class Registry:
+    """
+    In-process store of counters and histograms.
+
+    For multi-process servers each process periodically dumps its values to
+    <METRICS_DIR>/metrics_<pid>.json; the /metrics handler sums every dump
+    with its own live values, so any worker can answer a scrape.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> float
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._metrics_dir = None
+        self._flush_interval = 10
+        self._last_flush = 0.0
+
+    def configure(self, metrics_dir=None, flush_interval=10, buckets=None):
+        self._metrics_dir = metrics_dir
+        self._flush_interval = flush_interval
+        if buckets:
+            self.buckets = tuple(buckets)
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+
+    def inc(self, name, labels, amount=1.0):
+        key = (name, _freeze(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, _freeze(labels))
+        with self._lock:
+            state = self._histograms.get(key)
+            if state is None:
+                state = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    # --- Multiprocess support ---
+    def _dump(self):
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'counters': [[n, list(l), v] for (n, l), v in self._counters.items()],
+                'histograms': [[n, list(l), list(s)] for (n, l), s in self._histograms.items()],
+            }
+
+    def maybe_flush(self, force=False):
+        if not self._metrics_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self._flush_interval:
+            return
+        self._last_flush = now
+        path = os.path.join(self._metrics_dir, f'metrics_{os.getpid()}.json')
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._dump(), f)
+            os.replace(tmp_path, path)  # Atomic, so readers never see half a file
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def _collect(self):
+        """Merges this process's live values with the other processes' snapshots."""
+        dumps = [self._dump()]
+        if self._metrics_dir:
+            own_file = f'metrics_{os.getpid()}.json'
+            for filename in os.listdir(self._metrics_dir):
+                if not filename.endswith('.json') or filename == own_file:
+                    continue
+                try:
+                    with open(os.path.join(self._metrics_dir, filename)) as f:
+                        dumps.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        counters, histograms = {}, {}
+        for dump in dumps:
+            if tuple(dump['buckets']) != self.buckets:
+                continue  # Snapshot from a differently configured process
+            for name, labels, value in dump['counters']:
+                key = (name, _freeze_pairs(labels))
+                counters[key] = counters.get(key, 0.0) + value
+            for name, labels, state in dump['histograms']:
+                key = (name, _freeze_pairs(labels))
+                merged = histograms.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+                for i, v in enumerate(state):
+                    merged[i] += v
+        return counters, histograms
+
+    def render(self) -> str:
+        """Formats all metrics in the Prometheus text exposition format."""
+        counters, histograms = self._collect()
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            if metric_type == 'counter':
+                for (n, labels), value in sorted(counters.items()):
+                    if n == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+            else:
+                for (n, labels), state in sorted(histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, state):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_format_labels(labels + (("le", _format_value(bound)),))} {cumulative}')
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {state[-1]}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(state[-2])}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {state[-1]}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _freeze(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _freeze_pairs(pairs) -> tuple:
+    return tuple((k, v) for k, v in pairs)
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (f'{k}="{_escape_label_value(v)}"' for k, v in labels)
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+registry = Registry()
+
+
+# --- Recording Helpers ---
+@contextmanager
+def track_upstream(upstream: str, operation: str):
+    """
+    Times one upstream call and counts it as ok or error, or as rejected when
+    its breaker failed it fast (those never reach the upstream, so aren't timed).
+    """
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except CircuitOpenError:
+        outcome = 'rejected'
+        raise
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        labels = {'upstream': upstream, 'operation': operation}
+        if outcome != 'rejected':
+            registry.observe('alice_upstream_duration_seconds', labels, time.perf_counter() - start)
+        registry.inc('alice_upstream_calls_total', dict(labels, outcome=outcome))
+
+_STATEMENT_PATTERN = re.compile(
+    r'^\s*(?:(UPDATE)\s+(\w+)|(SELECT|INSERT|DELETE|REPLACE)\b.*?\b(?:FROM|INTO)\s+(\w+))',
+    re.IGNORECASE | re.DOTALL
+)
+
+def observe_query(sql: str, elapsed: float):
+    match = _STATEMENT_PATTERN.match(sql)
+    if match:
+        statement = (match.group(1) or match.group(3)).lower()
+        table = (match.group(2) or match.group(4)).lower()
+    else:
+        statement, table = (sql.split(None, 1) or ['unknown'])[0].lower(), ''
+    registry.observe('alice_db_query_duration_seconds', {'statement': statement, 'table': table}, elapsed)
+
+def record_cache(cache: str, hit: bool):
+    registry.inc('alice_cache_requests_total', {'cache': cache, 'result': 'hit' if hit else 'miss'})
+
+
+# --- Flask Integration ---
+def _start_timer():
+    g._metrics_start = time.perf_counter()
+
+def _record_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is not None:
+        endpoint = request.endpoint or 'unmatched'
+        registry.observe('alice_http_request_duration_seconds', {'endpoint': endpoint}, time.perf_counter() - start)
+        registry.inc('alice_http_requests_total',
+                     {'endpoint': endpoint, 'method': request.method, 'status': response.status_code})
+        if response.status_code >= 500:
+            registry.inc('alice_http_request_errors_total', {'endpoint': endpoint})
+        registry.maybe_flush()
+    return response
+
+@bp.route('/metrics')
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+def init_app(app):
+    """Register request timing hooks and the /metrics endpoint."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    registry.configure(
+        metrics_dir=app.config.get('METRICS_DIR'),
+        flush_interval=app.config.get('METRICS_FLUSH_SECONDS', 10),
+        buckets=app.config.get('METRICS_BUCKETS'),
+    )
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.register_blueprint(bp)
+    atexit.register(registry.maybe_flush, force=True)
@@ -0,0 +1,251 @@
+# File: app/migrations.py
+# Versioned schema migrations for existing databases. PRAGMA user_version
+# records the last migration applied; a new database created from
+# database.sql starts at SCHEMA_VERSION. Each migration is a list of
+# idempotent steps, so one interrupted half-way is simply run again.
+# Applied by create_app() when MIGRATE_ON_STARTUP is set (serve.py runs it
+# once, in the master, before any worker forks) and by database_migration.py.
+#
+# Index builds run in their own transaction, holding only SQLite's RESERVED
+# lock while the index is built in a large page cache: readers carry on and
+# only other writers wait (up to the busy timeout) for the short commit. In
+# WAL mode readers are never blocked at all.
+import time
+import sqlite3
+import logging
+from typing import Callable, Dict, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class Step(NamedTuple):
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    steps: Sequence[Step]
+
+
+def _exists(conn: sqlite3.Connection, kind: str, name: str) -> bool:
+    return conn.execute('SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?', (kind, name)).fetchone() is not None
+
+def _transaction(conn: sqlite3.Connection, *statements: str):
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+def execute(description: str, *statements: str) -> Step:
+    """Statements run in one transaction; they must be idempotent (IF NOT EXISTS and the like)."""
+    return Step(description, lambda conn: _transaction(conn, *statements))
+
+def add_column(table: str, column: str, declaration: str) -> Step:
+    def apply(conn):
+        if column not in [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]:
+            _transaction(conn, f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+    return Step(f'add column {table}.{column}', apply)
+
+def create_index(name: str, table: str, columns: str, unique: bool = False, cache_mb: int = 256) -> Step:
+    """
+    Builds the index unless it exists, keeping up to `cache_mb` of pages in
+    memory so the build never spills (which would lock out readers early), then
+    gathers its statistics so the planner starts using it right away.
+    """
+    def apply(conn):
+        if _exists(conn, 'index', name):
+            return
+        cache_size = conn.execute('PRAGMA cache_size').fetchone()[0]
+        conn.execute(f'PRAGMA cache_size = -{int(cache_mb) * 1024}')  # Negative: KiB rather than pages
+        try:
+            _transaction(conn, f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table}({columns})")
+        finally:
+            conn.execute(f'PRAGMA cache_size = {cache_size}')
+        conn.execute(f'ANALYZE {name}')
+    return Step(f'create index {name}', apply)
+
+def drop_index(name: str) -> Step:
+    return execute(f'drop index {name}', f'DROP INDEX IF EXISTS {name}')
+
+
+MIGRATIONS = (
+    # Everything the old ad hoc database_migration.py ensured
+    Migration(1, 'baseline', (
+        add_column('users', 'channel_id', 'TEXT'),
+        execute('create cached_videos', '''
+            CREATE TABLE IF NOT EXISTS cached_videos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                video_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                thumbnail_url TEXT,
+                published_at TEXT,
+                view_count INTEGER DEFAULT 0,
+                like_count INTEGER DEFAULT 0,
+                comment_count INTEGER DEFAULT 0,
+                duration TEXT,
+                has_captions BOOLEAN DEFAULT FALSE,
+                cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+                UNIQUE(user_id, video_id)
+            )
+        '''),
+        create_index('idx_cached_videos_user_id', 'cached_videos', 'user_id'),
+        create_index('idx_cached_videos_cached_at', 'cached_videos', 'cached_at'),
+        execute('create rate_limits', '''
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                user_id INTEGER NOT NULL,
+                endpoint TEXT NOT NULL,
+                day TEXT NOT NULL,
+                cost_used INTEGER DEFAULT 0,
+                PRIMARY KEY (user_id, endpoint, day),
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+        '''),
+        execute('create comment_analyses', '''
+            CREATE TABLE IF NOT EXISTS comment_analyses (
+                text_hash TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''),
+        execute('create video_comment_results', '''
+            CREATE TABLE IF NOT EXISTS video_comment_results (
+                video_id TEXT PRIMARY KEY,
+                comment_count INTEGER NOT NULL,
+                arrays BLOB NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''),
+        execute('create transcripts and transcript_blocks', '''
+            CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT PRIMARY KEY,
+                language TEXT,
+                segment_count INTEGER NOT NULL,
+                duration_ms INTEGER NOT NULL,
+                text_chars INTEGER NOT NULL,
+                stored_bytes INTEGER NOT NULL,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''', '''
+            CREATE TABLE IF NOT EXISTS transcript_blocks (
+                video_id TEXT NOT NULL,
+                start_ms INTEGER NOT NULL,
+                end_ms INTEGER NOT NULL,
+                segment_count INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (video_id, start_ms)
+            )
+        '''),
+        execute('create background_jobs', '''
+            CREATE TABLE IF NOT EXISTS background_jobs (
+                name TEXT PRIMARY KEY,
+                lease_until TIMESTAMP,
+                last_run_at TIMESTAMP,
+                last_summary TEXT,
+                budget_day TEXT,
+                quota_used INTEGER DEFAULT 0,
+                nlu_used INTEGER DEFAULT 0
+            )
+        '''),
+        execute('create iam_tokens', '''
+            CREATE TABLE IF NOT EXISTS iam_tokens (
+                key TEXT PRIMARY KEY,
+                access_token TEXT,
+                issued_at REAL,
+                expires_at REAL,
+                lease_until REAL
+            )
+        '''),
+        execute('create generation_cache', '''
+            CREATE TABLE IF NOT EXISTS generation_cache (
+                key TEXT PRIMARY KEY,
+                scope TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_hit_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                hits INTEGER DEFAULT 0
+            )
+        '''),
+        create_index('idx_generation_cache_last_hit', 'generation_cache', 'last_hit_at'),
+        execute('create posting_profiles', '''
+            CREATE TABLE IF NOT EXISTS posting_profiles (
+                user_id INTEGER PRIMARY KEY,
+                catalog_version TEXT NOT NULL,
+                profile TEXT NOT NULL,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+        '''),
+        create_index('idx_users_channel_id', 'users', 'channel_id'),
+        # Analysis history is paged by (user_id, created_at, id); the user_id index is a prefix of it
+        create_index('idx_analyses_user_history', 'analyses', 'user_id, created_at, id, type'),
+        drop_index('idx_analyses_user_id'),
+    )),
+    # The newest analysis of a video (the cache lookup of every analysis request) is one index seek,
+    # rather than a walk through the user's whole history
+    Migration(2, 'analysis lookup index', (
+        create_index('idx_analyses_video_latest', 'analyses', 'user_id, video_id, type, created_at'),
+    )),
+    # The cached catalog keeps the whole video record, so it can be served in place of a YouTube fetch
+    Migration(3, 'full cached video records', (
+        add_column('cached_videos', 'description', 'TEXT'),
+        add_column('cached_videos', 'duration_seconds', 'INTEGER DEFAULT 0'),
+        add_column('cached_videos', 'tags', 'TEXT'),
+        add_column('cached_videos', 'category_id', 'TEXT'),
+        add_column('cached_videos', 'default_language', 'TEXT'),
+    )),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version  # database.sql must create this version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def pending(conn: sqlite3.Connection, target: Optional[int] = None):
+    """The migrations not yet applied to the database, up to `target` (default: all)."""
+    version = schema_version(conn)
+    return [m for m in MIGRATIONS if version < m.version <= (target or SCHEMA_VERSION)]
+
+def migrate(path: str, target: Optional[int] = None, busy_timeout: float = 30) -> Optional[Dict]:
+    """
+    Applies the pending migrations to the database at `path` in order, timing
+    each step. Returns a report, or None if there is no database there yet
+    (database.sql creates the current schema). Other connections' writes wait
+    up to `busy_timeout` seconds for a step, and a step waits as long for them.
+    """
+    if not path or path == ':memory:':
+        return None
+    conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None)  # Transactions are explicit
+    try:
+        if not _exists(conn, 'table', 'users'):
+            return None
+        report = {'from_version': schema_version(conn), 'steps': []}
+        for migration in pending(conn, target):
+            for step in migration.steps:
+                start = time.perf_counter()
+                step.apply(conn)
+                seconds = round(time.perf_counter() - start, 3)
+                report['steps'].append({'version': migration.version, 'step': step.description, 'seconds': seconds})
+                logger.info(f"Migration {migration.version} ({migration.name}): {step.description} in {seconds:.3f}s")
+            conn.execute(f'PRAGMA user_version = {migration.version}')
+        report['to_version'] = schema_version(conn)
+        return report
+    finally:
+        conn.close()
+
+
+def init_app(app):
+    """With MIGRATE_ON_STARTUP, brings an existing database up to date before the app serves anything."""
+    if app.config.get('MIGRATE_ON_STARTUP', True):
+        report = migrate(app.config['DATABASE'], busy_timeout=app.config.get('MIGRATION_BUSY_TIMEOUT_SECONDS', 30))
+        if report and report['steps']:
+            app.logger.info(f"✅ Database migrated from version {report['from_version']} to {report['to_version']}")
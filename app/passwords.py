@@ -0,0 +1,177 @@
+# File: app/passwords.py
+import re
+import time
+import logging
+import threading
+import bcrypt
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Optional, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# bcrypt hashes look like $2b$12$<22 char salt><31 char hash>
+_COST_PATTERN = re.compile(rb'^\$2[abxy]?\$(\d{2})\$')
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 16
+# Never calibrate below this cost, even on very slow hosts.
+MIN_CALIBRATED_ROUNDS = 10
+
+
+class PasswordQueueFull(Exception):
+    """Raised when too many hashing jobs are already waiting for a worker."""
+
+
+# --- Worker Functions (run inside the process pool) ---
+def _hash_worker(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+def _check_worker(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+# --- Hasher ---
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated process pool so request threads never burn
+    CPU on password work. The number of jobs waiting for a worker is bounded;
+    callers beyond that limit, or whose job is not done within `timeout`,
+    get PasswordQueueFull instead of piling up.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 32, rounds: Optional[int] = None,
+                 target_ms: int = 250, timeout: float = 10.0):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.target_ms = target_ms
+        self.timeout = timeout
+        self._rounds = rounds
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+
+    @property
+    def rounds(self) -> int:
+        """The current work factor, calibrated on first use if not configured."""
+        if self._rounds is None:
+            with self._lock:
+                if self._rounds is None:
+                    self._rounds = calibrate_rounds(self.target_ms)
+                    logger.info(f"Calibrated bcrypt cost to {self._rounds} rounds (~{self.target_ms}ms target)")
+        return self._rounds
+
+    def _get_executor(self) -> 'ProcessPoolExecutor':
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # multiprocessing is only imported once the first password is hashed
+                    from concurrent.futures import ProcessPoolExecutor
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _submit(self, fn, *args) -> 'Future':
+        if not self._slots.acquire(blocking=False):
+            raise PasswordQueueFull("Password hashing queue is full, try again shortly.")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the job itself finishes, not just until this caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _run(self, fn, *args):
+        future = self._submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            raise PasswordQueueFull("Password hashing timed out, try again shortly.") from None
+
+    def hash(self, password: str) -> bytes:
+        return self._run(_hash_worker, password.encode('utf-8'), self.rounds)
+
+    def hash_in_background(self, password: str) -> 'Future':
+        """Like hash(), but returns the job's future instead of waiting for it."""
+        return self._submit(_hash_worker, password.encode('utf-8'), self.rounds)
+
+    def verify(self, password: str, hashed: Union[str, bytes]) -> bool:
+        hashed = _as_bytes(hashed)
+        if not hashed:
+            return False
+        try:
+            return self._run(_check_worker, password.encode('utf-8'), hashed)
+        except ValueError:
+            logger.warning("Stored password hash is malformed.")
+            return False
+
+    def needs_rehash(self, hashed: Union[str, bytes]) -> bool:
+        """True if the stored hash was made with a lower cost than the current one."""
+        cost = get_hash_rounds(hashed)
+        return cost is not None and cost < self.rounds
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+# --- Helpers ---
+def _as_bytes(hashed: Union[str, bytes, None]) -> bytes:
+    if hashed is None:
+        return b''
+    if isinstance(hashed, str):
+        return hashed.encode('utf-8')
+    return bytes(hashed)
+
+def get_hash_rounds(hashed: Union[str, bytes]) -> Optional[int]:
+    """Returns the cost factor encoded in a bcrypt hash, or None if unparseable."""
+    match = _COST_PATTERN.match(_as_bytes(hashed))
+    return int(match.group(1)) if match else None
+
+def calibrate_rounds(target_ms: int, floor: int = MIN_CALIBRATED_ROUNDS) -> int:
+    """
+    Picks the highest bcrypt cost whose hash time stays within target_ms on this host.
+    Each extra round doubles the work, so we time a cheap cost and extrapolate.
+    """
+    sample_rounds = 8
+    start = time.perf_counter()
+    bcrypt.hashpw(b'calibration-password', bcrypt.gensalt(rounds=sample_rounds))
+    sample_ms = max((time.perf_counter() - start) * 1000, 0.01)
+
+    rounds = sample_rounds
+    while rounds < MAX_ROUNDS and sample_ms * (2 ** (rounds + 1 - sample_rounds)) <= target_ms:
+        rounds += 1
+    return min(max(rounds, floor, MIN_ROUNDS), MAX_ROUNDS)
+
+
+# --- App Integration ---
+hasher = PasswordHasher()
+
+def init_app(app):
+    """Configure the shared hasher from the app config."""
+    global hasher
+    hasher.shutdown(wait=False)
+    hasher = PasswordHasher(
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+        queue_size=app.config.get('PASSWORD_HASH_QUEUE_SIZE', 32),
+        rounds=app.config.get('BCRYPT_ROUNDS'),
+        target_ms=app.config.get('BCRYPT_TARGET_MS', 250),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10.0),
+    )
+
+def hash_password(password: str) -> bytes:
+    return hasher.hash(password)
+
+def hash_password_in_background(password: str) -> 'Future':
+    return hasher.hash_in_background(password)
+
+def verify_password(password: str, hashed: Union[str, bytes]) -> bool:
+    return hasher.verify(password, hashed)
+
+def needs_rehash(hashed: Union[str, bytes]) -> bool:
+    return hasher.needs_rehash(hashed)
@@ -0,0 +1,111 @@
+# File: app/posting_times.py
+# Best posting weekday and hour learned from a channel's own uploads: each
+# video's performance (views adjusted for age, plus engagement rate) is
+# binned by the UTC weekday and hour it was published. Kept free of Flask
+# like analysis.py; the profile is cached per channel by the routes.
+from typing import Dict, List, Optional, Sequence
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+SLOTS = 7 * 24  # Weekday-hour bins, Monday 00:00 UTC first
+PRIOR_VIDEOS = 2.0  # Pseudo-count pulling sparsely populated bins towards the channel average
+
+
+def _np():
+    # Imported on first use, like comment_store: most requests never build a profile
+    import numpy
+    return numpy
+
+def _zscore(values):
+    np = _np()
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else np.zeros_like(values)
+
+def _scale(values) -> List[int]:
+    """0-100, relative to the best and worst bin."""
+    np = _np()
+    span = values.max() - values.min()
+    scaled = (values - values.min()) / span * 100 if span > 0 else np.full_like(values, 50.0)
+    return [int(round(v)) for v in scaled]
+
+def _smooth(values, axis=-1):
+    """Spreads each hour's score over its neighbours (hours wrap around)."""
+    np = _np()
+    return 0.5 * values + 0.25 * (np.roll(values, 1, axis=axis) + np.roll(values, -1, axis=axis))
+
+def performance_scores(published: Sequence[str], views, likes, comments, now: Optional[str] = None):
+    """
+    (publish times as datetime64[s], one score per video): z-scored log views
+    with the effect of the video's age regressed out, blended with the z-scored
+    engagement rate (likes and comments per view).
+    """
+    np = _np()
+    published = np.array([p[:19] for p in published], dtype='datetime64[s]')  # ISO 8601 in UTC, 'Z' dropped
+    now = np.datetime64(now[:19], 's') if now else np.datetime64('now', 's')
+    views = np.asarray(views, dtype=np.float64)
+    engagement = (np.asarray(likes, dtype=np.float64) + 2 * np.asarray(comments, dtype=np.float64)) / np.maximum(views, 1)
+
+    log_views = np.log1p(views)
+    log_age = np.log1p(np.maximum((now - published).astype(np.float64) / 86400, 0))
+    if np.unique(log_age).size >= 3:
+        slope, intercept = np.polyfit(log_age, log_views, 1)
+        log_views = log_views - (slope * log_age + intercept)
+    return published, 0.7 * _zscore(log_views) + 0.3 * _zscore(engagement)
+
+def build_profile(videos: Sequence[Dict], top_slots: int = 7, now: Optional[str] = None) -> Optional[Dict]:
+    """
+    Posting-time profile of a channel from its video records (published_at,
+    view_count, like_count, comment_count), or None without any usable video.
+    best_slots are ordered best first, at most one per weekday the channel has published on.
+    """
+    videos = [v for v in videos if v.get('published_at')]
+    if not videos:
+        return None
+    np = _np()
+    published, scores = performance_scores([v['published_at'] for v in videos],
+                                           [v.get('view_count') or 0 for v in videos],
+                                           [v.get('like_count') or 0 for v in videos],
+                                           [v.get('comment_count') or 0 for v in videos], now=now)
+    seconds = published.astype(np.int64)
+    weekday = (seconds // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+    hour = seconds // 3600 % 24
+    slot = weekday * 24 + hour
+
+    counts = np.bincount(slot, minlength=SLOTS).astype(np.float64)
+    totals = np.bincount(slot, weights=scores, minlength=SLOTS)
+    slot_scores = _smooth((totals / (counts + PRIOR_VIDEOS)).reshape(7, 24))
+    weekday_scores = np.bincount(weekday, weights=scores, minlength=7) / (np.bincount(weekday, minlength=7) + PRIOR_VIDEOS)
+    hour_scores = _smooth(np.bincount(hour, weights=scores, minlength=24) / (np.bincount(hour, minlength=24) + PRIOR_VIDEOS))
+
+    best_hours = slot_scores.argmax(axis=1)
+    best_values = slot_scores[np.arange(7), best_hours]
+    scaled = _scale(best_values)
+    day_counts = counts.reshape(7, 24).sum(axis=1)
+    order = [d for d in np.argsort(-best_values, kind='stable') if day_counts[d]][:top_slots]
+    return {
+        'videos': len(videos),
+        'best_slots': [{'weekday': int(d), 'day': WEEKDAYS[d], 'hour': int(best_hours[d]), 'score': scaled[d],
+                        'videos': int(day_counts[d])} for d in order],
+        'weekday_scores': _scale(weekday_scores),
+        'hour_scores': _scale(hour_scores),
+    }
+
+def ranked_slots(profile: Dict) -> List[Dict]:
+    """
+    One UTC slot for every weekday, best first: the profile's best_slots, then
+    the weekdays the channel hasn't published on by weekday score, each at the
+    channel's best hour. A week's nth post takes the nth slot, so a schedule
+    can post more often than the channel has so far without doubling up a day.
+    """
+    slots = list(profile['best_slots'])
+    weekday_scores, hour_scores = profile['weekday_scores'], profile['hour_scores']
+    best_hour = max(range(24), key=lambda h: hour_scores[h])
+    taken = {slot['weekday'] for slot in slots}
+    for weekday in sorted((d for d in range(7) if d not in taken), key=lambda d: -weekday_scores[d]):
+        slots.append({'weekday': weekday, 'day': WEEKDAYS[weekday], 'hour': best_hour, 'videos': 0,
+                      'score': int(round((weekday_scores[weekday] + hour_scores[best_hour]) / 2))})
+    return slots
+
+def shift_slot(weekday: int, hour: int, utc_offset_minutes: int):
+    """(weekday, hour) of a UTC slot in a timezone `utc_offset_minutes` ahead of UTC (whole hours)."""
+    slot = (weekday * 24 + hour + round(utc_offset_minutes / 60)) % SLOTS
+    return slot // 24, slot % 24
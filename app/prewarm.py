@@ -0,0 +1,193 @@
+# File: app/prewarm.py
+# Precomputes sentiment and theme analyses of verified creators' newest uploads
+# during off-peak hours, so their first click on a new video is a cache hit.
+# Run it from cron with `python prewarm.py`, or set PREWARM_TIMER_ENABLED and
+# every app process checks periodically; a lease in background_jobs makes sure
+# only one of them runs at a time.
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+from flask import current_app
+
+from . import database, services, comment_pipeline
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'prewarm'
+LEASE_MINUTES = 15  # Renewed before each channel, so it only has to outlast one channel's analyses
+
+# YouTube quota units: channels + playlistItems + videos per channel, one commentThreads page per analysis
+QUOTA_PER_CHANNEL = 3
+QUOTA_PER_ANALYSIS = 1
+
+# (analysis type, stored title prefix, comments fetched, pipeline function)
+ANALYSES = (
+    ('sentiment', 'Real Sentiment', comment_pipeline.SENTIMENT_SAMPLE, comment_pipeline.sentiment_analysis),
+    ('theme_cluster', 'Real Theme Cluster', comment_pipeline.THEME_SAMPLE, comment_pipeline.theme_cluster_analysis),
+)
+
+
+class Budget:
+    """What is left of today's YouTube quota and NLU call allowance."""
+
+    def __init__(self, quota_units: int, nlu_calls: int):
+        self.quota_units = quota_units
+        self.nlu_calls = nlu_calls
+        self.quota_spent = 0
+        self.nlu_spent = 0
+
+    def allows(self, quota_units: int, nlu_calls: int = 0) -> bool:
+        return self.quota_units >= quota_units and self.nlu_calls >= nlu_calls
+
+    def spend(self, quota_units: int, nlu_calls: int = 0):
+        self.quota_units -= quota_units
+        self.nlu_calls -= nlu_calls
+        self.quota_spent += quota_units
+        self.nlu_spent += nlu_calls
+
+
+def in_off_peak_window(window, now: Optional[datetime] = None) -> bool:
+    """Whether the UTC hour is within [start, end), where the window may wrap past midnight."""
+    start, end = window
+    hour = (now or datetime.now(timezone.utc)).hour
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+def recent_uploads(videos: Iterable[Dict], max_age_days: int, now: Optional[datetime] = None):
+    """Videos published within max_age_days that have comments to analyze, newest first."""
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=max_age_days)
+    recent = []
+    for video in videos:
+        try:
+            published = datetime.fromisoformat(video['published_at'].replace('Z', '+00:00'))
+        except (KeyError, ValueError):
+            continue
+        if published >= cutoff and video.get('comment_count'):
+            recent.append(video)
+    return sorted(recent, key=lambda v: v['published_at'], reverse=True)
+
+def run_prewarm(force: bool = False, dry_run: bool = False, user_ids=None, min_interval_minutes: int = 0) -> Dict:
+    """
+    One prewarming pass over every verified channel (or just `user_ids`).
+    Outside the off-peak window nothing happens unless `force` is set; with
+    `dry_run` the analyses that would run are counted but not computed.
+    Returns a summary of what was analyzed, skipped and spent.
+    """
+    config = current_app.config
+    if not force and not in_off_peak_window(config.get('PREWARM_WINDOW_UTC', (2, 6))):
+        return {'skipped': 'outside the off-peak window'}
+    claim = database.claim_job(JOB_NAME, LEASE_MINUTES, min_interval_minutes)
+    if not claim:
+        return {'skipped': 'another run holds the lease or ran recently'}
+
+    quota_used, nlu_used = database.get_job_usage(JOB_NAME)
+    budget = Budget(config.get('PREWARM_DAILY_QUOTA_UNITS', 2000) - quota_used,
+                    config.get('PREWARM_DAILY_NLU_CALLS', 5000) - nlu_used)
+    summary = {'channels': 0, 'videos': 0, 'analyzed': 0, 'fresh': 0, 'failed': 0, 'stopped': None}
+    start = time.perf_counter()
+    try:
+        for user in database.get_channel_owners(user_ids):
+            if not database.renew_job(JOB_NAME, LEASE_MINUTES, claim):
+                summary['stopped'] = 'lease lost'  # Another run may have started; don't overlap it
+                break
+            summary['stopped'] = _prewarm_channel(user, budget, summary, dry_run)
+            if summary['stopped']:
+                break
+    finally:
+        summary.update(quota_spent=budget.quota_spent, nlu_spent=budget.nlu_spent,
+                       seconds=round(time.perf_counter() - start, 3))
+        database.add_job_usage(JOB_NAME, budget.quota_spent, budget.nlu_spent)
+        database.release_job(JOB_NAME, summary, claim)
+    logger.info(f"Prewarm finished: {summary}")
+    return summary
+
+def _prewarm_channel(user, budget: Budget, summary: Dict, dry_run: bool) -> Optional[str]:
+    """Prewarms one creator's recent uploads; returns why the whole run must stop, if it must."""
+    config = current_app.config
+    if services.youtube_breaker.is_open or services.nlu_breaker.is_open:
+        return 'upstream unavailable'
+    if not budget.allows(QUOTA_PER_CHANNEL):
+        return 'daily quota budget exhausted'
+
+    budget.spend(QUOTA_PER_CHANNEL)
+    try:
+        videos = services.get_youtube_channel_videos(user['channel_id'],
+                                                     max_results=config.get('PREWARM_VIDEOS_PER_CHANNEL', 5))
+    except Exception as e:
+        logger.warning(f"Prewarm could not list the uploads of channel {user['channel_id']}: {e}")
+        summary['failed'] += 1
+        return None
+    summary['channels'] += 1
+
+    for video in recent_uploads(videos, config.get('PREWARM_MAX_VIDEO_AGE_DAYS', 14)):
+        summary['videos'] += 1
+        for analysis_type, title, sample, analyze in ANALYSES:
+            previous = database.get_latest_analysis(user['id'], video['video_id'], analysis_type)
+            if previous and comment_pipeline.is_fresh(previous, video['comment_count'], config):
+                summary['fresh'] += 1
+                continue
+            if not budget.allows(QUOTA_PER_ANALYSIS, sample):
+                return 'daily NLU or quota budget exhausted'
+            if dry_run:
+                summary['analyzed'] += 1
+                continue
+            if not _prewarm_analysis(user['id'], video, analysis_type, title, sample, analyze, budget):
+                summary['failed'] += 1
+                if services.youtube_breaker.is_open or services.nlu_breaker.is_open:
+                    return 'upstream unavailable'
+                continue
+            summary['analyzed'] += 1
+    return None
+
+def _prewarm_analysis(user_id, video, analysis_type, title, sample, analyze, budget: Budget) -> bool:
+    video_id = video['video_id']
+    budget.spend(QUOTA_PER_ANALYSIS)
+    try:
+        comments = services.get_youtube_comment_threads(video_id, max_results=sample)
+        if not comments:
+            return False
+        response_data, metadata = analyze(video_id, comments)
+    except Exception as e:
+        logger.warning(f"Prewarm {analysis_type} analysis of video_id {video_id} failed: {e}")
+        return False
+    budget.spend(0, metadata['nlu_calls'])
+    if response_data is None:
+        return False
+    metadata['prewarmed'] = True
+    database.save_analysis_data(user_id, analysis_type, f'https://www.youtube.com/watch?v={video_id}', video_id,
+                                f'{title}: {video_id}', response_data,
+                                comment_pipeline.with_comment_count(metadata, video['comment_count']))
+    return True
+
+# --- In-process timer ---
+_timer_lock = threading.Lock()
+_timer_pid = None
+
+
+def _timer_loop(app, interval_minutes):
+    while True:
+        time.sleep(interval_minutes * 60)
+        try:
+            with app.app_context():
+                # Every process's timer fires about once per interval; the first one claims the run
+                run_prewarm(min_interval_minutes=interval_minutes // 2)
+        except Exception:
+            logger.exception("Prewarm run failed")
+
+def _start_timer(app):
+    """Starts this process's timer thread; per pid, so forked workers each get their own."""
+    global _timer_pid
+    with _timer_lock:
+        if _timer_pid == os.getpid():
+            return
+        _timer_pid = os.getpid()
+    threading.Thread(target=_timer_loop, args=(app, app.config.get('PREWARM_INTERVAL_MINUTES', 30)),
+                     name='alice-prewarm', daemon=True).start()
+
+def init_app(app):
+    """With PREWARM_TIMER_ENABLED, each serving process starts its timer on its first request."""
+    if app.config.get('PREWARM_TIMER_ENABLED') and not app.testing:
+        app.before_request(lambda: _start_timer(app))
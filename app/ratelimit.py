@@ -0,0 +1,128 @@
+# File: app/ratelimit.py
+import time
+import sqlite3
+import logging
+import threading
+import datetime
+from collections import defaultdict, deque
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Per-user limiter for expensive endpoints.
+
+    Two budgets are enforced per (user, endpoint):
+      * a sliding one-minute request window, kept in memory
+      * a daily cost budget (in upstream cost units), persisted in SQLite so it
+        survives restarts and is shared between worker processes
+
+    Users already known to be over their daily budget are rejected from memory
+    without touching the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows = defaultdict(deque)   # (user_id, endpoint) -> request timestamps
+        self._exhausted = {}                 # (user_id, endpoint) -> day the budget ran out
+
+    def check(self, db, user_id, endpoint: str, limits: dict, cost: int = 1) -> Tuple[bool, int]:
+        """
+        Records a request and charges its cost if it fits within the limits.
+        Returns (allowed, retry_after_seconds).
+        """
+        allowed, retry_after = self.admit(user_id, endpoint, limits)
+        if not allowed:
+            return allowed, retry_after
+        return self.charge(db, user_id, endpoint, limits, cost)
+
+    def admit(self, user_id, endpoint: str, limits: dict) -> Tuple[bool, int]:
+        """
+        Records a request in the minute window, without charging any cost.
+        Returns (allowed, retry_after_seconds).
+        """
+        key = (user_id, endpoint)
+        now = time.time()
+        per_minute = limits.get('per_minute')
+
+        with self._lock:
+            if self._exhausted.get(key) == _utc_today():
+                return False, _seconds_until_utc_midnight()
+
+            window = self._windows[key]
+            while window and window[0] <= now - 60:
+                window.popleft()
+            if per_minute and len(window) >= per_minute:
+                return False, max(1, int(window[0] + 60 - now) + 1)
+            window.append(now)
+        return True, 0
+
+    def charge(self, db, user_id, endpoint: str, limits: dict, cost: int = 1) -> Tuple[bool, int]:
+        """
+        Charges an admitted request's cost to today's budget, once it is known to
+        need upstream work. Returns (allowed, retry_after_seconds).
+        """
+        key = (user_id, endpoint)
+        today = _utc_today()
+        daily_cost = limits.get('daily_cost')
+
+        if daily_cost:
+            allowed = self._charge_daily(db, user_id, endpoint, today, cost, daily_cost)
+            if not allowed:
+                with self._lock:
+                    self._exhausted[key] = today
+                    # Give back the minute slot since the request is not served
+                    if self._windows[key]:
+                        self._windows[key].pop()
+                return False, _seconds_until_utc_midnight()
+
+        return True, 0
+
+    def _charge_daily(self, db, user_id, endpoint, day, cost, limit) -> bool:
+        try:
+            db.execute(
+                'INSERT OR IGNORE INTO rate_limits (user_id, endpoint, day, cost_used) VALUES (?, ?, ?, 0)',
+                (user_id, endpoint, day)
+            )
+            cursor = db.execute('''
+                UPDATE rate_limits SET cost_used = cost_used + ?
+                WHERE user_id = ? AND endpoint = ? AND day = ? AND cost_used + ? <= ?
+            ''', (cost, user_id, endpoint, day, cost, limit))
+            db.commit()
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            # Never fail a request because the limiter's bookkeeping is unavailable
+            logger.warning(f"Rate limit persistence unavailable, allowing request: {e}")
+            return True
+
+    def get_usage(self, db, user_id, endpoint: str) -> int:
+        row = db.execute(
+            'SELECT cost_used FROM rate_limits WHERE user_id = ? AND endpoint = ? AND day = ?',
+            (user_id, endpoint, _utc_today())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+            self._exhausted.clear()
+
+
+def _utc_today() -> str:
+    return datetime.datetime.utcnow().strftime('%Y-%m-%d')
+
+def _seconds_until_utc_midnight() -> int:
+    now = datetime.datetime.utcnow()
+    midnight = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+limiter = RateLimiter()
+
+def get_limits(app_config, endpoint: str) -> Optional[dict]:
+    """Returns the configured limits for an endpoint, or None if it is unlimited."""
+    if not app_config.get('RATE_LIMIT_ENABLED', False):
+        return None
+    return app_config.get('RATE_LIMITS', {}).get(endpoint)
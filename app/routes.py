@@ -1,14 +1,125 @@
 # File: app/routes.py (Updated)
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, current_app
-from collections import defaultdict
+from flask import Blueprint, Response, render_template, request, jsonify, session, redirect, url_for, current_app, stream_with_context
+from itertools import islice
+import io
+import csv
+import json
 import time
+import base64
+import re
 import random
+import hashlib
+from datetime import datetime, timedelta, timezone
 
-from .auth import login_required
-from . import database, services, utils
+from .auth import login_required, rate_limited, charge_rate_limit
+from . import database, services, utils, metrics, comment_store, comment_pipeline, transcripts, generation_cache, posting_times
+from .circuitbreaker import CircuitOpenError
 
 bp = Blueprint('routes', __name__)
 
+def _degraded_response(video_id, analysis_type, retry_after):
+    """
+    Used when an upstream's circuit is open: serve the last stored analysis
+    for this video regardless of age, or tell the client when to retry.
+    """
+    stale_result = database.get_cached_analysis(session['user_id'], video_id, analysis_type, max_age_hours=None)
+    if stale_result:
+        current_app.logger.info(f"Upstream unavailable, serving stale {analysis_type} analysis for video_id: {video_id}")
+        stale_result['from_cache'] = True
+        stale_result['degraded'] = True
+        return jsonify(stale_result)
+    return jsonify({
+        'error': 'An upstream service is temporarily unavailable. Please try again shortly.',
+        'retry_after': retry_after
+    }), 503, {'Retry-After': str(retry_after)}
+
+def _open_breaker(*breakers):
+    """Returns the first breaker that is currently failing fast, if any."""
+    return next((b for b in breakers if b.is_open), None)
+
+# --- Conditional GET ---
+def _etag(*parts):
+    """Validator of a response built from these inputs (versions, ids, query string)."""
+    return hashlib.sha1(json.dumps(parts, default=str).encode('utf-8')).hexdigest()[:20]
+
+def _not_modified(etag, last_modified=None):
+    """
+    A 304 response if the client's copy is still current, else None. Call it
+    before the work the response needs: If-None-Match is compared with `etag`,
+    and If-Modified-Since with `last_modified` (naive UTC) only without one.
+    HTTP dates have whole seconds, so a sub-second `last_modified` is rounded
+    up: a change later in the same second as the client's copy isn't a 304.
+    """
+    if request.if_none_match:
+        current = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since:
+        modified = last_modified and last_modified.replace(tzinfo=timezone.utc)
+        if modified and modified.microsecond:
+            modified = modified.replace(microsecond=0) + timedelta(seconds=1)
+        current = bool(modified and modified <= request.if_modified_since)
+    else:
+        return None
+    metrics.record_cache('conditional_get', current)
+    return _with_validators(Response(status=304), etag, last_modified) if current else None
+
+def _with_validators(response, etag, last_modified=None):
+    """Adds ETag and Last-Modified; per-user data, so browsers keep it privately and always revalidate."""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def _cached_analysis(video_id, analysis_type):
+    """
+    Finds the newest stored analysis and decides whether it can still be served
+    (see comment_pipeline.is_fresh), looking up the video's commentCount if needed.
+    Returns (data to serve or None, the newest analysis or None, current commentCount or None).
+    """
+    config = current_app.config
+    previous = database.get_latest_analysis(session['user_id'], video_id, analysis_type)
+    if not config.get('ANALYSIS_FRESHNESS_CHECK_ENABLED', True):
+        fresh = previous is not None and previous['age_hours'] < config.get('ANALYSIS_CACHE_HOURS', 24)
+        return (previous['data'] if fresh else None), previous, None
+    if previous and previous['age_hours'] * 60 < config.get('ANALYSIS_FRESH_MINUTES', 15):
+        return previous['data'], previous, None
+
+    comment_count = _current_comment_count(video_id)
+    fresh = previous is not None and comment_pipeline.is_fresh(previous, comment_count, config)
+    return (previous['data'] if fresh else None), previous, comment_count
+
+def _current_comment_count(video_id):
+    """The video's current commentCount, or None when YouTube can't tell us right now."""
+    if services.youtube_breaker.is_open:
+        return None
+    try:
+        return services.get_video_comment_counts([video_id]).get(video_id)
+    except Exception as e:
+        current_app.logger.warning(f"Could not look up the comment count of video_id {video_id}: {e}")
+        return None
+
+def _refresh_sentiment(video_url, video_id, previous, new_comments, comment_count=None):
+    """Serves an expired sentiment analysis brought up to date with only the comments posted since."""
+    if not new_comments:
+        # Nothing was posted since: the stored analysis is still current. Renew it in place so the
+        # next requests are cache hits again, without a copy growing history
+        database.renew_analysis(previous['id'], comment_pipeline.with_comment_count(previous['metadata'], comment_count))
+        response_data = previous['data']
+        response_data['from_cache'] = True
+        return jsonify(response_data)
+
+    response_data, metadata = comment_pipeline.refresh_sentiment(video_id, previous, new_comments)
+    if response_data is None:
+        return _degraded_response(video_id, 'sentiment', services.nlu_breaker.retry_after())
+
+    current_app.logger.info(f"Incremental sentiment refresh for video_id: {video_id}, "
+                            f"{len(new_comments)} new comments, {metadata['nlu_calls']} NLU calls")
+    database.save_analysis_data(session['user_id'], 'sentiment', video_url, video_id, f'Real Sentiment: {video_id}',
+                                response_data, comment_pipeline.with_comment_count(metadata, comment_count))
+    response_data['from_cache'] = False
+    response_data['incremental'] = True
+    return jsonify(response_data)
+
 # --- Page Routes ---
 @bp.route('/')
 def index():
@@ -49,144 +160,178 @@ def smart_calendar(): return render_template('smart_calendar.html')
 @login_required
 def model_explorer(): return render_template('model_explorer.html')
 
+def _channel_catalog(user, refresh=False):
+    """
+    The user's latest uploads: the cached catalog while it is younger than
+    VIDEO_CACHE_HOURS, otherwise (or with `refresh`) fetched from YouTube and
+    cached again. The cache also feeds the posting-time profile.
+    """
+    if not refresh:
+        videos = database.get_cached_user_videos(user['id'], current_app.config.get('VIDEO_CACHE_HOURS', 24))
+        metrics.record_cache('channel_catalog', videos is not None)
+        if videos is not None:
+            return videos
+    videos = services.get_youtube_channel_videos(user['channel_id'],
+                                                 max_results=current_app.config.get('MAX_VIDEOS_PER_CHANNEL', 50))
+    if videos:
+        database.cache_user_videos(user['id'], videos)
+    return videos
+
+def _catalog_state(user):
+    """(version, cached_at, fresh) of the user's cached catalog; fresh while _channel_catalog serves it."""
+    version, cached_at = database.get_catalog_state(user['id'])
+    max_age = timedelta(hours=current_app.config.get('VIDEO_CACHE_HOURS', 24))
+    fresh = cached_at is not None and datetime.now(timezone.utc).replace(tzinfo=None) - cached_at < max_age
+    return version, cached_at, fresh
+
 @bp.route('/my-channel')
 @login_required
 def my_channel():
+    # Rendered from the user row and whatever catalog is cached, however old, without
+    # waiting on YouTube; the page then loads the videos from /api/my-videos
     user = database.get_user_by_id(session['user_id'])
     user_videos = []
-    user_transcripts = []
-    error_message = None
-    
     if user and user['channel_verified'] and user['channel_id']:
-        try:
-            # Fetch real videos from YouTube API
-            user_videos = services.get_youtube_channel_videos(user['channel_id'], max_results=50)
-            
-            # Filter videos that have captions (approximation for transcripts)
-            user_transcripts = [v for v in user_videos if v.get('has_captions', False)]
-            
-            current_app.logger.info(f"Loaded {len(user_videos)} videos for user {user['email']}")
-            
-        except Exception as e:
-            current_app.logger.error(f"Error fetching videos for user {user['email']}: {e}")
-            error_message = str(e)
-            # Fallback to empty list for now, or could use mock data
-            user_videos = []
-            user_transcripts = []
+        user_videos = database.get_cached_user_videos(user['id'], max_age_hours=None) or []
     
     return render_template('my_channel.html', 
                          user=user, 
                          user_videos=user_videos, 
-                         user_transcripts=user_transcripts,
-                         error_message=error_message)
+                         user_transcripts=[v for v in user_videos if v['has_captions']])
 
 # --- API Routes ---
 
 @bp.route('/api/analyze-sentiment', methods=['POST'])
 @login_required
+@rate_limited(charge=False)
 def analyze_sentiment():
-    video_url = request.json.get('video_url')
+    video_url = (request.get_json(silent=True) or {}).get('video_url')
     if not video_url: return jsonify({'error': 'Video URL is required'}), 400
     video_id = services.extract_video_id(video_url)
     if not video_id: return jsonify({'error': 'Invalid YouTube URL provided'}), 400
 
     # --- Caching Logic ---
-    cached_result = database.get_cached_analysis(session['user_id'], video_id, 'sentiment')
+    cached_result, previous, comment_count = _cached_analysis(video_id, 'sentiment')
+    metrics.record_cache('analysis', bool(cached_result))
     if cached_result:
         current_app.logger.info(f"Returning cached sentiment analysis for video_id: {video_id}")
         cached_result['from_cache'] = True
         return jsonify(cached_result)
 
+    if breaker := _open_breaker(services.youtube_breaker, services.nlu_breaker):
+        return _degraded_response(video_id, 'sentiment', breaker.retry_after())
+    if limited := charge_rate_limit():
+        return limited
+
     try:
-        comments = services.get_youtube_comments(video_id, max_results=50)
+        if previous and previous['metadata'].get('watermark') and current_app.config.get('INCREMENTAL_ANALYSIS_ENABLED', True):
+            new_comments = services.get_comments_since(
+                video_id, previous['metadata']['watermark'],
+                max_comments=current_app.config.get('INCREMENTAL_ANALYSIS_MAX_NEW_COMMENTS', 500))
+            if new_comments is not None:
+                return _refresh_sentiment(video_url, video_id, previous, new_comments, comment_count)
+
+        comments = services.get_youtube_comment_threads(video_id, max_results=comment_pipeline.SENTIMENT_SAMPLE)
         if not comments: return jsonify({'error': 'No comments found or comments are disabled.'}), 404
         
-        sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
-        emotion_totals = {'sadness': 0, 'joy': 0, 'fear': 0, 'disgust': 0, 'anger': 0}
-        analyzed_count = 0
-
-        for comment_text in comments:
-            clean_comment = comment_text.strip()
-            if len(clean_comment) < 10 or not any(c.isalnum() for c in clean_comment):
-                continue
-
-            analysis_result = services.nlu_service.analyze_sentiment_emotion(comment_text)
-            if analysis_result:
-                analyzed_count += 1
-                sentiment_label = analysis_result.get('sentiment', {}).get('document', {}).get('label', 'neutral')
-                sentiment_counts[sentiment_label] += 1
-                emotions = analysis_result.get('emotion', {}).get('document', {}).get('emotion', {})
-                for emotion, score in emotions.items():
-                    if emotion in emotion_totals: emotion_totals[emotion] += score
-        
-        if analyzed_count == 0: return jsonify({'error': 'Could not analyze any of the comments found.'}), 500
-
-        final_emotions = {e: t / analyzed_count for e, t in emotion_totals.items() if analyzed_count > 0}
-        response_data = {"sentiment_data": sentiment_counts, "emotion_data": final_emotions}
-        database.save_analysis_data(session['user_id'], 'sentiment', video_url, video_id, f'Real Sentiment: {video_id}', response_data, {'comments_analyzed': analyzed_count})
+        response_data, metadata = comment_pipeline.sentiment_analysis(video_id, comments)
+        if response_data is None:
+            if services.nlu_breaker.is_open:
+                return _degraded_response(video_id, 'sentiment', services.nlu_breaker.retry_after())
+            return jsonify({'error': 'Could not analyze any of the comments found.'}), 500
+
+        database.save_analysis_data(session['user_id'], 'sentiment', video_url, video_id, f'Real Sentiment: {video_id}',
+                                    response_data, comment_pipeline.with_comment_count(metadata, comment_count))
         response_data['from_cache'] = False
         return jsonify(response_data)
+    except CircuitOpenError as e:
+        return _degraded_response(video_id, 'sentiment', e.retry_after)
     except Exception as e:
         current_app.logger.error(f"Sentiment analysis failed: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/api/cluster-themes', methods=['POST'])
 @login_required
+@rate_limited(charge=False)
 def cluster_themes():
-    video_url = request.json.get('video_url')
+    video_url = (request.get_json(silent=True) or {}).get('video_url')
     if not video_url: return jsonify({'error': 'Video URL is required'}), 400
     video_id = services.extract_video_id(video_url)
     if not video_id: return jsonify({'error': 'Invalid YouTube URL provided'}), 400
 
     # --- Caching Logic ---
-    cached_result = database.get_cached_analysis(session['user_id'], video_id, 'theme_cluster')
+    cached_result, _, comment_count = _cached_analysis(video_id, 'theme_cluster')
+    metrics.record_cache('analysis', bool(cached_result))
     if cached_result:
         current_app.logger.info(f"Returning cached theme cluster for video_id: {video_id}")
         cached_result['from_cache'] = True
         return jsonify(cached_result)
 
+    if breaker := _open_breaker(services.youtube_breaker, services.nlu_breaker):
+        return _degraded_response(video_id, 'theme_cluster', breaker.retry_after())
+    if limited := charge_rate_limit():
+        return limited
+
     try:
-        comments = services.get_youtube_comments(video_id, max_results=80)
+        comments = services.get_youtube_comment_threads(video_id, max_results=comment_pipeline.THEME_SAMPLE)
         if not comments: return jsonify({'error': 'No comments found for this video.'}), 404
         
-        themes_with_comments = defaultdict(list)
-        
-        for comment_text in comments:
-            clean_comment = comment_text.strip()
-            if len(clean_comment) < 15 or not any(c.isalnum() for c in clean_comment):
-                continue
-            time.sleep(0.05)
-            analysis = services.nlu_service.analyze_themes(comment_text)
-            if analysis:
-                comment_themes = set()
-                comment_themes.update([c['text'].title() for c in analysis.get('concepts', []) if c['relevance'] > 0.6])
-                comment_themes.update([e['text'].title() for e in analysis.get('entities', []) if e['relevance'] > 0.5])
-                for theme in comment_themes:
-                    themes_with_comments[theme].append(comment_text)
-
-        if not themes_with_comments: return jsonify({'error': 'Could not extract meaningful themes.'}), 500
-            
-        sorted_themes = sorted(themes_with_comments.items(), key=lambda item: len(item[1]), reverse=True)
-        clusters, outliers = [], []
-        
-        for theme, associated_comments in sorted_themes:
-            if len(associated_comments) > 1 and len(clusters) < 5:
-                clusters.append({'summary': theme, 'comments': associated_comments})
-            elif len(outliers) < 5:
-                outliers.append({'summary': theme, 'comments': associated_comments})
-        
-        cluster_summaries = {c['summary'] for c in clusters}
-        outliers = [o for o in outliers if o['summary'] not in cluster_summaries]
-
-        response_data = {"clusters": clusters, "outliers": outliers[:3], "total_analyzed": len(comments)}
-        database.save_analysis_data(session['user_id'], 'theme_cluster', video_url, video_id, f'Real Theme Cluster: {video_id}', response_data, {'comments_analyzed': len(comments)})
+        response_data, metadata = comment_pipeline.theme_cluster_analysis(video_id, comments)
+        if response_data is None:
+            if services.nlu_breaker.is_open:
+                return _degraded_response(video_id, 'theme_cluster', services.nlu_breaker.retry_after())
+            return jsonify({'error': 'Could not extract meaningful themes.'}), 500
+
+        database.save_analysis_data(session['user_id'], 'theme_cluster', video_url, video_id, f'Real Theme Cluster: {video_id}',
+                                    response_data, comment_pipeline.with_comment_count(metadata, comment_count))
         response_data['from_cache'] = False
         return jsonify(response_data)
 
+    except CircuitOpenError as e:
+        return _degraded_response(video_id, 'theme_cluster', e.retry_after)
     except Exception as e:
         current_app.logger.error(f"Theme clustering failed: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/comment-results/<video_id>')
+@login_required
+def comment_results(video_id):
+    """
+    Re-aggregates a video's stored per-comment results without touching YouTube or NLU.
+    Query parameters: group_by (day, week, month or theme) and the drill-down
+    filters label, theme, min_score and max_score. Only videos the user has
+    analyzed or that are in their channel catalog are served.
+    """
+    if not database.user_knows_video(session['user_id'], video_id):
+        return jsonify({'error': 'No analyzed comments stored for this video yet.'}), 404
+    updated_at = database.get_comment_results_updated_at(video_id)
+    if updated_at is None:
+        return jsonify({'error': 'No analyzed comments stored for this video yet.'}), 404
+    etag = _etag('comment-results', video_id, updated_at, request.query_string)
+    if not_modified := _not_modified(etag, updated_at):
+        return not_modified
+
+    results = database.get_comment_results(video_id)
+    if results is None:
+        return jsonify({'error': 'No analyzed comments stored for this video yet.'}), 404
+
+    group_by = request.args.get('group_by')
+    if group_by and group_by != 'theme' and group_by not in comment_store.PERIODS:
+        return jsonify({'error': f"group_by must be one of: theme, {', '.join(comment_store.PERIODS)}"}), 400
+    selected = results.mask(
+        label=request.args.get('label'),
+        theme=request.args.get('theme'),
+        min_score=request.args.get('min_score', type=float),
+        max_score=request.args.get('max_score', type=float),
+    )
+
+    response_data = {'video_id': video_id, 'summary': results.summarize(selected)}
+    if group_by == 'theme':
+        response_data['groups'] = results.group_by_theme(selected)
+    elif group_by:
+        response_data['groups'] = results.group_by_period(group_by, selected)
+    return _with_validators(jsonify(response_data), etag, updated_at)
+
 @bp.route('/api/verify-channel', methods=['POST'])
 @login_required
 def verify_channel():
@@ -215,17 +360,24 @@ def refresh_channel_data():
 
 @bp.route('/api/analyze-competitors', methods=['POST'])
 @login_required
+@rate_limited(charge=False)
 def analyze_competitors():
     """Analyze competitor channels with enhanced error handling and data processing."""
-    channel_urls = request.json.get('channel_urls', [])
+    channel_urls = (request.get_json(silent=True) or {}).get('channel_urls')
     
-    if not channel_urls:
+    if not channel_urls or not isinstance(channel_urls, list):
         return jsonify({'error': 'Please provide at least one competitor channel URL.'}), 400
+    # One cost unit per channel requested
+    if limited := charge_rate_limit(len(channel_urls)):
+        return limited
 
     competitor_data = []
     errors = []
     
     for url in channel_urls:
+        if services.youtube_breaker.is_open:
+            errors.append(f"Skipped {url}: YouTube is temporarily unavailable")
+            continue
         try:
             # Add small delay to avoid rate limiting
             time.sleep(0.2)
@@ -313,15 +465,23 @@ def get_my_videos():
             'videos': []
         }), 400
     
+    refresh = request.args.get('refresh') in ('1', 'true')
+    version, cached_at, fresh = _catalog_state(user)
+    if fresh and not refresh:
+        if not_modified := _not_modified(_etag('my-videos', version, user['channel_name']), cached_at):
+            return not_modified
+    
     try:
-        videos = services.get_youtube_channel_videos(user['channel_id'], max_results=50)
+        videos = _channel_catalog(user, refresh=refresh)
+        if refresh or not fresh:
+            version, cached_at, _ = _catalog_state(user)
         
-        return jsonify({
+        return _with_validators(jsonify({
             'videos': videos,
             'total_count': len(videos),
             'channel_name': user['channel_name'],
             'success': True
-        })
+        }), _etag('my-videos', version, user['channel_name']), cached_at)
         
     except Exception as e:
         current_app.logger.error(f"Error fetching videos for user {user['email']}: {e}")
@@ -330,34 +490,59 @@ def get_my_videos():
             'videos': []
         }), 500
 
+def _stored_transcript(video_id):
+    """The video's transcripts row, downloading and storing the captions on first use; None if unavailable."""
+    info = database.get_transcript_info(video_id)
+    if info is None:
+        captions = services.get_video_captions(video_id)
+        if captions:
+            info = database.save_transcript(video_id, 'en', transcripts.parse_srt(transcripts.iter_lines([captions])))
+    return info if info and info['segment_count'] else None
+
+_TRANSCRIPT_CURSOR = re.compile(r'(\d+)-(\d+)')  # <block start_ms>-<index in block>, see iter_transcript_positions
+_TRANSCRIPT_UNAVAILABLE = ('Transcript not available. This could be because: '
+                           '1) Captions are disabled for this video, '
+                           '2) The video owner has restricted caption access, '
+                           '3) No captions exist for this video, or '
+                           '4) Additional authentication is required.')
+
 @bp.route('/api/video-transcript/<video_id>', methods=['GET'])
 @login_required
 def get_video_transcript(video_id):
     """
     Attempt to get transcript/captions for a specific video.
     Note: Most videos require OAuth for caption access.
+    Returns one page of timed segments: `start` (seconds) seeks, `limit` caps the
+    segments returned and `next_cursor` (pass it back as `cursor`) resumes exactly
+    where the page ended; `next_start` is the time the following page begins at.
     """
+    cursor = request.args.get('cursor')
+    position = _TRANSCRIPT_CURSOR.fullmatch(cursor) if cursor else None
+    if cursor and not position:
+        return jsonify({'error': 'Invalid cursor.'}), 400
     try:
-        # Try to get captions using the YouTube API
-        transcript = services.get_video_captions(video_id)
-        
-        if transcript:
-            return jsonify({
-                "video_id": video_id,
-                "transcript_text": transcript,
-                "language": "en",
-                "auto_generated": True,  # Most accessible captions are auto-generated
-                "success": True
-            })
-        else:
-            # Return a helpful message explaining why transcript might not be available
-            return jsonify({
-                'error': 'Transcript not available. This could be because: '
-                         '1) Captions are disabled for this video, '
-                         '2) The video owner has restricted caption access, '
-                         '3) No captions exist for this video, or '
-                         '4) Additional authentication is required.'
-            }), 404
+        info = _stored_transcript(video_id)
+        if info is None:
+            return jsonify({'error': _TRANSCRIPT_UNAVAILABLE}), 404
+
+        start_ms = max(0, round(request.args.get('start', 0, type=float) * 1000))
+        limit = min(max(1, request.args.get('limit', current_app.config.get('TRANSCRIPT_PAGE_SEGMENTS', 300), type=int)), 2000)
+        page = list(islice(database.iter_transcript_positions(
+            video_id, start_ms, (int(position[1]), int(position[2])) if position else None), limit + 1))
+        next_position, next_segment = page.pop() if len(page) > limit else (None, None)
+        page = [segment for _, segment in page]
+        return jsonify({
+            "video_id": video_id,
+            "transcript_text": ' '.join(segment.text for segment in page),
+            "segments": [{'start': s.start_ms / 1000, 'end': s.end_ms / 1000, 'text': s.text} for s in page],
+            "next_start": next_segment.start_ms / 1000 if next_segment else None,
+            "next_cursor": '{}-{}'.format(*next_position) if next_position else None,
+            "segment_count": info['segment_count'],
+            "duration_seconds": info['duration_ms'] / 1000,
+            "language": info['language'],
+            "auto_generated": True,  # Most accessible captions are auto-generated
+            "success": True
+        })
             
     except Exception as e:
         current_app.logger.error(f"Error fetching transcript for video {video_id}: {e}")
@@ -365,6 +550,51 @@ def get_video_transcript(video_id):
             'error': f'Failed to fetch transcript: {str(e)}'
         }), 500
 
+@bp.route('/api/analyze-transcript', methods=['POST'])
+@login_required
+@rate_limited(charge=False)
+def analyze_transcript():
+    """Sentiment, emotions and themes along a video's transcript, analyzed in time windows."""
+    video_url = (request.get_json(silent=True) or {}).get('video_url')
+    if not video_url: return jsonify({'error': 'Video URL is required'}), 400
+    video_id = services.extract_video_id(video_url)
+    if not video_id: return jsonify({'error': 'Invalid YouTube URL provided'}), 400
+
+    # A transcript doesn't change, so neither does its analysis
+    cached_result = database.get_cached_analysis(session['user_id'], video_id, 'transcript', max_age_hours=None)
+    metrics.record_cache('analysis', bool(cached_result))
+    if cached_result:
+        cached_result['from_cache'] = True
+        return jsonify(cached_result)
+
+    if breaker := _open_breaker(services.youtube_breaker, services.nlu_breaker):
+        return _degraded_response(video_id, 'transcript', breaker.retry_after())
+    if limited := charge_rate_limit():
+        return limited
+
+    try:
+        info = _stored_transcript(video_id)
+        if info is None:
+            return jsonify({'error': _TRANSCRIPT_UNAVAILABLE}), 404
+
+        response_data, metadata = comment_pipeline.transcript_analysis(video_id)
+        if response_data is None:
+            if services.nlu_breaker.is_open:
+                return _degraded_response(video_id, 'transcript', services.nlu_breaker.retry_after())
+            return jsonify({'error': 'Could not analyze the transcript.'}), 500
+
+        response_data['duration_seconds'] = info['duration_ms'] / 1000
+        response_data['truncated'] = metadata['truncated']
+        database.save_analysis_data(session['user_id'], 'transcript', video_url, video_id,
+                                    f'Transcript Analysis: {video_id}', response_data, metadata)
+        response_data['from_cache'] = False
+        return jsonify(response_data)
+    except CircuitOpenError as e:
+        return _degraded_response(video_id, 'transcript', e.retry_after)
+    except Exception as e:
+        current_app.logger.error(f"Transcript analysis failed: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/api/video-details/<video_id>', methods=['GET'])
 @login_required
 def get_video_details(video_id):
@@ -374,9 +604,15 @@ def get_video_details(video_id):
     if not user or not user['channel_verified']:
         return jsonify({'error': 'No verified channel connected'}), 400
     
+    version, cached_at, fresh = _catalog_state(user)
+    if fresh and (not_modified := _not_modified(_etag('video-details', version, video_id), cached_at)):
+        return not_modified
+    
     try:
-        # Get all channel videos (or implement caching to avoid repeated API calls)
-        videos = services.get_youtube_channel_videos(user['channel_id'], max_results=50)
+        # The channel's catalog, from the cache while it is fresh
+        videos = _channel_catalog(user)
+        if not fresh:
+            version, cached_at, _ = _catalog_state(user)
         
         # Find the specific video
         video_details = next((v for v in videos if v['video_id'] == video_id), None)
@@ -387,12 +623,12 @@ def get_video_details(video_id):
         # Try to get additional details like captions availability
         has_captions = video_details.get('has_captions', False)
         
-        return jsonify({
+        return _with_validators(jsonify({
             'video': video_details,
             'has_captions': has_captions,
             'video_url': f'https://www.youtube.com/watch?v={video_id}',
             'success': True
-        })
+        }), _etag('video-details', version, video_id), cached_at)
         
     except Exception as e:
         current_app.logger.error(f"Error fetching video details for {video_id}: {e}")
@@ -403,42 +639,227 @@ def get_video_details(video_id):
 @login_required
 def generate_script():
     data = request.get_json()
-    prompt = f"Create a YouTube script for a video with the topic of \"{data.get('topic')}\"."
-    script = services.watsonx_ai.generate_content(prompt, data.get('model_id'))
-    response_data = {"script": script, "suggestions": "Consider a strong call-to-action."}
-    database.save_analysis_data(session['user_id'], 'script', None, None, f"Script: {data.get('topic')}", response_data, {})
+    topic = data.get('topic')
+    prompt = f"Create a YouTube script for a video with the topic of \"{topic}\"."
+    watsonx = services.get_watsonx_ai()
+    model_id = data.get('model_id') or watsonx.DEFAULT_MODEL_ID
+
+    # Identical and near-identical topics reuse an earlier script unless the client asks for a new one
+    cache = generation_cache.get_cache()
+    params = watsonx.generation_parameters()
+    key = generation_cache.cache_key(prompt, model_id, params)
+    scope = generation_cache.scope_key(model_id, params)
+    cached = None
+    if cache and not (data.get('no_cache') or request.cache_control.no_cache):
+        cached = cache.get(key, scope, subject=topic or '')
+
+    if data.get('stream') or request.accept_mimetypes.best == 'text/event-stream':
+        return _stream_script(session['user_id'], topic, prompt, model_id, cached, cache, key, scope)
+    if cached:
+        response_data = _script_response(cached.text, cached)
+    else:
+        script = watsonx.generate_content(prompt, model_id, allow_fallback=False)
+        if script is None:
+            script = watsonx.fallback_script(prompt)
+        elif cache:
+            cache.put(key, scope, topic or '', script)
+        response_data = _script_response(script)
+    database.save_analysis_data(session['user_id'], 'script', None, None, f"Script: {topic}", response_data, {})
     return jsonify(response_data)
 
+def _script_response(script, cached=None):
+    response_data = {"script": script, "suggestions": "Consider a strong call-to-action."}
+    if cached:
+        response_data.update(from_cache=True, cache_match=cached.match)
+    return response_data
+
+def _posting_profile(user_id):
+    """
+    The channel's posting-time profile from its cached catalog, recomputed only
+    when the catalog has changed; None until enough videos are cached.
+    """
+    catalog_version = database.get_catalog_version(user_id)
+    if catalog_version is None:
+        return None
+    profile = database.get_posting_profile(user_id, catalog_version)
+    metrics.record_cache('posting_profile', profile is not None)
+    if profile is None:
+        videos = database.get_catalog_videos(user_id)
+        if len(videos) < current_app.config.get('POSTING_PROFILE_MIN_VIDEOS', 5):
+            return None
+        profile = posting_times.build_profile(videos)
+        database.save_posting_profile(user_id, catalog_version, profile)
+    return profile
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _relay_tokens(stream, pieces):
+    """A `token` event per piece of a text stream, collected into `pieces`; returns the stream's return value."""
+    while True:
+        try:
+            piece = next(stream)
+        except StopIteration as stop:
+            return stop.value
+        pieces.append(piece)
+        yield _sse('token', {'text': piece})
+
+def _stream_script(user_id, topic, prompt, model_id, cached, cache, key, scope):
+    """
+    Server-sent events for /api/generate-script: a `token` event per piece of
+    text as watsonx produces it (a cached script arrives as a single token),
+    then `done` with the same body the JSON response has. The script is saved
+    once the stream completes.
+    """
+    def generate():
+        if cached:
+            yield _sse('token', {'text': cached.text})
+            response_data = _script_response(cached.text, cached)
+        else:
+            watsonx = services.get_watsonx_ai()
+            pieces = []
+            complete = yield from _relay_tokens(watsonx.stream_content(prompt, model_id, allow_fallback=False), pieces)
+            if not pieces:
+                yield from _relay_tokens(watsonx.stream_fallback_script(prompt), pieces)
+            script = ''.join(pieces).strip()
+            if complete and cache:
+                cache.put(key, scope, topic or '', script)  # Never a fallback or a stream that broke off
+            response_data = _script_response(script)
+        database.save_analysis_data(user_id, 'script', None, None, f"Script: {topic}", response_data, {})
+        yield _sse('done', response_data)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @bp.route('/api/generate-calendar', methods=['POST'])
 @login_required
 def generate_calendar_route():
     data = request.get_json()
-    calendar_result = utils.generate_smart_calendar_content(data.get('content_goals'), data.get('platforms'), data.get('posting_frequency'), int(data.get('content_duration')))
+    profile = _posting_profile(session['user_id'])
+    calendar_result = utils.generate_smart_calendar_content(data.get('content_goals'), data.get('platforms'), data.get('posting_frequency'), int(data.get('content_duration')),
+                                                            posting_profile=profile, utc_offset_minutes=int(data.get('utc_offset_minutes') or 0))
     recommendations = utils.generate_ai_recommendations(calendar_result, data.get('content_goals'), data.get('platforms'))
     predictions = utils.generate_performance_predictions(calendar_result['metrics'], data.get('platforms'))
     response_data = {
         'calendar_items': calendar_result['calendar_items'], 'recommendations': recommendations, 'predictions': predictions,
-        'metrics': calendar_result['metrics'], 'success': True, 'ibm_ai_powered': services.watsonx_ai.is_available
+        'metrics': calendar_result['metrics'], 'success': True, 'ibm_ai_powered': services.get_watsonx_ai().is_available,
+        'posting_profile': profile
     }
     database.save_analysis_data(session['user_id'], 'calendar', None, None, f"Smart Calendar for {data.get('content_goals')}", response_data, {})
     return jsonify(response_data)
 
+_MODELS = [
+    {"label": "Granite 13B Chat v2", "model_id": "ibm/granite-13b-chat-v2", "provider": "IBM"},
+    {"label": "Llama 3 8B Instruct", "model_id": "meta-llama/llama-3-8b-instruct", "provider": "Meta"},
+]
+_MODELS_ETAG = _etag('list-models', _MODELS)
+
 @bp.route('/api/list-models')
 @login_required
 def list_models():
-    models = [
-        {"label": "Granite 13B Chat v2", "model_id": "ibm/granite-13b-chat-v2", "provider": "IBM"},
-        {"label": "Llama 3 8B Instruct", "model_id": "meta-llama/llama-3-8b-instruct", "provider": "Meta"},
-    ]
-    return jsonify({"resources": models})
+    if not_modified := _not_modified(_MODELS_ETAG):
+        return not_modified
+    return _with_validators(jsonify({"resources": _MODELS}), _MODELS_ETAG)
 
 @bp.route('/api/list-tasks')
 @login_required
 def list_tasks():
     return jsonify({"resources": [{"label": "Generation", "task_id": "generation"}, {"label": "Summarization", "task_id": "summarization"}]})
     
+@bp.route('/api/service-status')
+@login_required
+def service_status():
+    """Circuit breaker state for each upstream, so the UI can warn before a slow request."""
+    return jsonify({'upstreams': services.get_upstream_status()})
+
 @bp.route('/api/dashboard-stats')
 @login_required
 def dashboard_stats():
+    count, newest_id, last_modified = database.get_analyses_version(session['user_id'])
+    etag = _etag('dashboard-stats', count, newest_id)
+    if not_modified := _not_modified(etag, last_modified):
+        return not_modified
     stats = database.get_dashboard_stats(session['user_id'])
-    return jsonify(stats)
\ No newline at end of file
+    return _with_validators(jsonify(stats), etag, last_modified)
+
+def _encode_cursor(row):
+    return base64.urlsafe_b64encode(json.dumps([row['created_at'], row['id']]).encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    """(created_at, id) from an opaque cursor; ValueError if it was not made by _encode_cursor."""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(created_at, str) or not isinstance(row_id, int):
+        raise ValueError('Invalid cursor')
+    return created_at, row_id
+
+_EXPORT_COLUMNS = ('id', 'type', 'title', 'video_id', 'video_url', 'created_at', 'data')
+
+@bp.route('/api/analyses')
+@login_required
+def list_analyses():
+    """
+    The user's analysis history, newest first. Pages are `limit` rows; pass the
+    returned `next_cursor` as `cursor` for the next one. `type` filters by
+    analysis type. With format=csv or format=ndjson, every matching analysis
+    (including its data) is streamed as a download instead.
+    """
+    analysis_type = request.args.get('type') or None
+    export_format = request.args.get('format', 'json')
+    if export_format not in ('json', 'csv', 'ndjson'):
+        return jsonify({'error': 'format must be one of: json, csv, ndjson'}), 400
+
+    count, newest_id, last_modified = database.get_analyses_version(session['user_id'])
+    etag = _etag('analyses', count, newest_id, request.query_string)
+    if not_modified := _not_modified(etag, last_modified):
+        return not_modified
+    if export_format != 'json':
+        return _with_validators(_export_analyses(session['user_id'], analysis_type, export_format), etag, last_modified)
+
+    limit = min(max(1, request.args.get('limit', 20, type=int)), 100)
+    after = None
+    if request.args.get('cursor'):
+        try:
+            after = _decode_cursor(request.args['cursor'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    rows = database.get_analyses_page(session['user_id'], limit + 1, after, analysis_type)
+    page = rows[:limit]
+    return _with_validators(jsonify({
+        'analyses': [dict(row) for row in page],
+        'next_cursor': _encode_cursor(page[-1]) if len(rows) > limit else None,
+    }), etag, last_modified)
+
+def _export_analyses(user_id, analysis_type, export_format):
+    """Streams the history as CSV or NDJSON, one keyset page at a time."""
+    rows = database.iter_analyses(user_id, analysis_type,
+                                  page_size=current_app.config.get('ANALYSIS_EXPORT_PAGE_SIZE', 500))
+
+    def write_ndjson(buffer, row):
+        # data is already JSON text; splice it in instead of decoding and re-encoding it
+        record = json.dumps({column: row[column] for column in _EXPORT_COLUMNS[:-1]})
+        buffer.write(f'{record[:-1]}, "data": {row["data"]}}}\n')
+
+    def chunks():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == 'csv':
+            writer.writerow(_EXPORT_COLUMNS)
+        for row in rows:
+            if export_format == 'csv':
+                writer.writerow([row[column] for column in _EXPORT_COLUMNS])
+            else:
+                write_ndjson(buffer, row)
+            if buffer.tell() >= 64 * 1024:  # Send in chunks instead of one write per row
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+    filename = f"analyses{'-' + analysis_type if analysis_type else ''}.{export_format}"
+    return Response(stream_with_context(chunks()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
\ No newline at end of file
@@ -0,0 +1,269 @@
+# File: app/server.py
+# Pre-forking WSGI server for production: one listening socket shared by N
+# worker processes, each answering requests from a bounded thread pool.
+import gc
+import os
+import time
+import errno
+import random
+import signal
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler, select_address_family, get_sockaddr
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestHandler(WSGIRequestHandler):
+    # One request per connection, so an idle keep-alive client never pins a pool thread
+    protocol_version = 'HTTP/1.0'
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    Werkzeug server that hands accepted connections to a fixed thread pool.
+    It only accepts while a thread is free; until then connections wait in the
+    kernel backlog, where another worker process can pick them up.
+    After `max_requests` requests it stops accepting so the worker can be recycled.
+    """
+
+    multithread = True
+    accept_wait = 0.5  # Seconds to wait for a free thread before going back to the poll loop
+
+    def __init__(self, host, port, app, fd, threads=4, max_requests=0):
+        super().__init__(host, port, app, handler=_RequestHandler, fd=fd)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='alice-request')
+        self._free_threads = threading.Semaphore(threads)
+        self._max_requests = max_requests
+        self._handled = 0
+        self._in_flight = 0
+        self._count_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def verify_request(self, request, client_address):
+        return not self._stopping.is_set()
+
+    def _handle_request_noblock(self):
+        # Claim a thread before accept(): with every thread busy the connection stays in
+        # the shared backlog for another worker instead of queueing behind this one
+        if not self._free_threads.acquire(timeout=self.accept_wait):
+            return
+        if self._stopping.is_set():
+            # Recycling or stopping: leave the connection in the backlog for a sibling
+            self._free_threads.release()
+            return
+        try:
+            request, client_address = self.get_request()
+        except OSError:
+            self._free_threads.release()  # Another worker accepted it first
+            return
+        if not self.verify_request(request, client_address):
+            self.shutdown_request(request)
+            self._free_threads.release()
+            return
+        try:
+            self.process_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            self._free_threads.release()
+
+    def process_request(self, request, client_address):
+        """Runs on the accepting thread, which already holds a free thread's slot."""
+        with self._count_lock:
+            self._in_flight += 1
+        try:
+            self._pool.submit(self._process_in_thread, request, client_address)
+        except BaseException:
+            with self._count_lock:
+                self._in_flight -= 1
+            raise
+
+    def _process_in_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._free_threads.release()
+            self._count_request()
+
+    def _count_request(self):
+        with self._count_lock:
+            self._in_flight -= 1
+            self._handled += 1
+            recycle = self._max_requests and self._handled == self._max_requests
+        if recycle:
+            logger.info(f"Worker {os.getpid()} served {self._handled} requests, recycling")
+            self.stop()
+
+    def stop(self):
+        """Stops accepting connections; safe to call from any thread, including signal handlers."""
+        if not self._stopping.is_set():
+            self._stopping.set()
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def drain(self, timeout):
+        """Waits up to `timeout` seconds for in-flight requests to finish."""
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._pool.shutdown(wait=False)
+
+
+class PreforkServer:
+    """
+    Binds the socket, preloads the app in the master process and forks
+    `workers` children that share it. The master only supervises: it replaces
+    workers that exit (crashed or recycled) and, on SIGTERM/SIGINT, asks every
+    worker to finish its in-flight requests before shutting down.
+    """
+
+    def __init__(self, app, host='0.0.0.0', port=5001, workers=None, threads=4, max_requests=1000,
+                 max_requests_jitter=100, graceful_timeout=30):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = max(1, threads)
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self._children = {}  # pid -> start time
+        self._running = False
+        self._socket = None
+
+    # --- Master ---
+    def run(self):
+        self._socket = self._bind()
+        self._preload()
+        self._running = True
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        logger.info(f"Serving on http://{self.host}:{self.port} with {self.workers} workers x {self.threads} threads "
+                    f"(recycle after ~{self.max_requests or 'unlimited'} requests)")
+        try:
+            while self._running:
+                self._reap()
+                while self._running and len(self._children) < self.workers:
+                    self._spawn()
+                time.sleep(0.2)
+        finally:
+            self._stop_workers()
+            self._socket.close()
+            logger.info("Server stopped.")
+
+    def _bind(self):
+        family = select_address_family(self.host, self.port)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(get_sockaddr(self.host, int(self.port), family))
+        sock.listen(BaseWSGIServer.request_queue_size)
+        # Non-blocking accept: when several workers wake for one connection, the losers
+        # return to their poll loop instead of blocking in accept() and missing a shutdown.
+        sock.setblocking(False)
+        sock.set_inheritable(True)
+        if family != getattr(socket, 'AF_UNIX', None):
+            self.port = sock.getsockname()[1]
+        return sock
+
+    def _preload(self):
+        """Pays one-off costs here so every worker inherits them instead of repeating them."""
+        from . import passwords
+        import requests  # noqa: F401 - deferred by the app, but every worker needs them
+        import googleapiclient.discovery  # noqa: F401
+        import numpy  # noqa: F401
+        passwords.hasher.rounds  # bcrypt cost calibration
+
+        # Move everything allocated so far out of the collector's reach: the
+        # children's GC passes then never touch (and copy) these shared pages.
+        gc.collect()
+        gc.freeze()
+
+    def _spawn(self):
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            # Stagger recycling so workers don't all restart at the same moment
+            max_requests += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                exit_code = self._worker(max_requests)
+            except Exception:
+                logger.exception("Worker crashed")
+            finally:
+                os._exit(exit_code)
+        self._children[pid] = time.monotonic()
+
+    def _reap(self):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._children.clear()
+                return
+            if pid == 0:
+                return
+            started = self._children.pop(pid, None)
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                logger.warning(f"Worker {pid} exited with status {code}")
+                if started is not None and time.monotonic() - started < 1:
+                    time.sleep(1)  # Don't spin if workers die on startup
+
+    def _handle_stop(self, signum, frame):
+        self._running = False
+
+    def _handle_reload(self, signum, frame):
+        """
+        SIGHUP: gracefully replace every worker, e.g. to give back memory. The new
+        workers fork from this master and its preloaded app, so a deploy of code
+        or config still needs a restart.
+        """
+        for pid in list(self._children):
+            self._signal(pid, signal.SIGTERM)
+
+    def _signal(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
+
+    def _stop_workers(self):
+        for pid in list(self._children):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self._children):
+            logger.warning(f"Worker {pid} did not stop within {self.graceful_timeout}s, killing it")
+            self._signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self._children.clear()
+
+    # --- Worker ---
+    def _worker(self, max_requests):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the whole group; the master decides
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+        server = PooledWSGIServer(self.host, self.port, self.app, fd=self._socket.fileno(),
+                                  threads=self.threads, max_requests=max_requests)
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+        server.serve_forever()
+        server.drain(self.graceful_timeout)
+        flush_pending_writes()
+        return 0
+
+
+def flush_pending_writes():
+    """Persists what a worker holds in memory before it exits."""
+    from . import metrics, passwords
+    metrics.registry.maybe_flush(force=True)
+    passwords.hasher.shutdown(wait=True)
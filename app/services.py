@@ -1,19 +1,73 @@
 # File: app/services.py (Updated - Add this function)
-import requests
 import re
 import json
 import time
 import logging
 import random
+import threading
 from flask import current_app
-from typing import Optional, List, Dict
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from typing import Optional, List, Dict, Generator, Iterator, TYPE_CHECKING
+from .circuitbreaker import CircuitBreaker, CircuitOpenError
+from . import metrics, iam
+
+# requests and googleapiclient are imported on first use; together they roughly
+# double the cost of importing the app (see `python -m benchmarks startup`).
+if TYPE_CHECKING:
+    import requests
 
 logger = logging.getLogger(__name__)
 
+# --- Circuit Breakers (one per upstream) ---
+youtube_breaker = CircuitBreaker('youtube')
+nlu_breaker = CircuitBreaker('nlu')
+watsonx_breaker = CircuitBreaker('watsonx')
+breakers = {b.name: b for b in (youtube_breaker, nlu_breaker, watsonx_breaker)}
+
+def get_upstream_status() -> Dict:
+    """Reports each upstream's breaker state so callers can degrade early."""
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
+
 # --- YouTube Service ---
 
+_YOUTUBE_OUTAGE_REASONS = {'quotaExceeded', 'rateLimitExceeded', 'dailyLimitExceeded', 'backendError'}
+
+def youtube_http_error():
+    """The googleapiclient HttpError class, imported on demand (use as `except youtube_http_error()`)."""
+    from googleapiclient.errors import HttpError
+    return HttpError
+
+def _is_youtube_outage(error: Exception) -> bool:
+    """Only server-side and quota failures count against the breaker, not e.g. disabled comments."""
+    if isinstance(error, youtube_http_error()):
+        if error.resp.status >= 500 or error.resp.status == 429:
+            return True
+        try:
+            reason = json.loads(error.content).get('error', {}).get('errors', [{}])[0].get('reason')
+        except (ValueError, AttributeError, IndexError):
+            return False
+        return reason in _YOUTUBE_OUTAGE_REASONS
+    return True
+
+def _youtube_client(api_key: str):
+    """
+    Builds a YouTube Data API client, pointed at YOUTUBE_API_URL when one is
+    configured. Its socket timeout keeps a hanging upstream from holding a
+    request (and the breaker's verdict) indefinitely; it makes no retries.
+    """
+    import httplib2
+    from googleapiclient.discovery import build
+    api_url = current_app.config.get('YOUTUBE_API_URL')
+    client_options = {'api_endpoint': api_url} if api_url else None
+    http = httplib2.Http(timeout=current_app.config.get('YOUTUBE_TIMEOUT', 20))
+    return build('youtube', 'v3', developerKey=api_key, client_options=client_options, http=http)
+
+def _execute(request):
+    """Runs a YouTube API request through the YouTube circuit breaker."""
+    # methodId looks like 'youtube.commentThreads.list'
+    operation = (getattr(request, 'methodId', None) or 'unknown').replace('youtube.', '', 1)
+    with metrics.track_upstream('youtube', operation):
+        return youtube_breaker.call(request.execute, is_failure=_is_youtube_outage)
+
 def extract_video_id(url: str) -> Optional[str]:
     """Extracts the YouTube video ID from various URL formats."""
     patterns = [
@@ -28,33 +82,111 @@ def extract_video_id(url: str) -> Optional[str]:
     return None
 
 def get_youtube_comments(video_id: str, max_results: int = 50) -> List[str]:
-    """Fetches top-level comments from a YouTube video."""
+    """Fetches the text of top-level comments from a YouTube video."""
+    return [comment['text'] for comment in get_youtube_comment_threads(video_id, max_results)]
+
+def get_youtube_comment_threads(video_id: str, max_results: int = 50, order: str = 'relevance') -> List[Dict]:
+    """
+    Fetches top-level comments with their ids, author and publish time.
+    Returns dicts with comment_id, text, author_key (channel id, or display name) and published_at.
+    """
+    comments, _ = _fetch_comment_page(video_id, max_results, order)
+    return comments
+
+def get_comments_since(video_id: str, watermark: Dict, max_comments: int = 500) -> Optional[List[Dict]]:
+    """
+    Walks the video's comments newest first (order='time') until it reaches the
+    watermark ({'comment_id', 'published_at'} of the newest comment already
+    analyzed). Returns the comments published after it, or None if more than
+    max_comments arrived since, in which case a full re-analysis is cheaper.
+    Comments from the watermark's own second are kept until the watermark
+    itself is reached; only strictly older ones end the walk without it.
+    """
+    new_comments, page_token = [], None
+    while True:
+        page, page_token = _fetch_comment_page(video_id, 100, 'time', page_token)
+        for comment in page:
+            if comment['comment_id'] == watermark.get('comment_id') or \
+                    comment['published_at'] < watermark.get('published_at', ''):
+                return new_comments
+            new_comments.append(comment)
+        if len(new_comments) > max_comments:
+            return None
+        if not page_token:
+            return new_comments
+
+def _fetch_comment_page(video_id: str, max_results: int, order: str, page_token: Optional[str] = None):
+    """One commentThreads().list page as (comment records, next page token or None)."""
     api_key = current_app.config['YOUTUBE_API_KEY']
     if not api_key:
         logger.error("YouTube API Key is not configured.")
         raise Exception("Service is not configured to connect to YouTube.")
     try:
-        youtube = build('youtube', 'v3', developerKey=api_key)
+        youtube = _youtube_client(api_key)
+        params = {'pageToken': page_token} if page_token else {}
         request = youtube.commentThreads().list(
             part='snippet',
             videoId=video_id,
             maxResults=max_results,
-            order='relevance',
-            textFormat='plainText'
+            order=order,
+            textFormat='plainText',
+            **params
         )
-        response = request.execute()
-        return [item['snippet']['topLevelComment']['snippet']['textDisplay'] for item in response.get('items', []) if len(item.get('snippet', {}).get('topLevelComment', {}).get('snippet', {}).get('textDisplay', '').strip()) > 10]
-    except HttpError as e:
+        response = _execute(request)
+        comments = [record for record in map(build_comment_record, response.get('items', []))
+                    if len(record['text'].strip()) > 10]
+        return comments, response.get('nextPageToken')
+    except youtube_http_error() as e:
         err_details = json.loads(e.content).get('error', {}).get('errors', [{}])[0]
         reason = err_details.get('reason', 'unknown')
         logger.error(f"YouTube API error ({e.resp.status}): {reason}")
         if reason == 'commentsDisabled':
             raise Exception("Comments are disabled for this video.")
         raise Exception("YouTube API error. Check key and quotas.")
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error fetching YouTube comments: {e}")
         raise
 
+def comment_watermark(comments: List[Dict], previous: Optional[Dict] = None) -> Optional[Dict]:
+    """The newest of the comments (and the previous watermark), as {'comment_id', 'published_at'}."""
+    candidates = [{'comment_id': c['comment_id'], 'published_at': c['published_at']} for c in comments if c['published_at']]
+    if previous:
+        candidates.append(previous)
+    return max(candidates, key=lambda c: c['published_at'], default=None)
+
+def build_comment_record(thread: Dict) -> Dict:
+    """Shapes one commentThreads().list item into the record the comment pipeline uses."""
+    top_level = thread.get('snippet', {}).get('topLevelComment', {})
+    snippet = top_level.get('snippet', {})
+    return {
+        'comment_id': top_level.get('id') or thread.get('id'),
+        'text': snippet.get('textDisplay', ''),
+        'author_key': snippet.get('authorChannelId', {}).get('value') or snippet.get('authorDisplayName', ''),
+        'published_at': snippet.get('publishedAt', ''),
+    }
+
+def get_video_comment_counts(video_ids: List[str]) -> Dict[str, int]:
+    """
+    Current statistics.commentCount per video, as {video_id: count}. Costs one
+    quota unit per 50 videos; videos that are missing or hide their counts are left out.
+    """
+    api_key = current_app.config['YOUTUBE_API_KEY']
+    if not api_key:
+        logger.error("YouTube API Key is not configured.")
+        raise Exception("Service is not configured to connect to YouTube.")
+    youtube = _youtube_client(api_key)
+    video_ids = list(dict.fromkeys(video_ids))
+    counts = {}
+    for start in range(0, len(video_ids), 50):  # videos().list accepts at most 50 ids
+        response = _execute(youtube.videos().list(part='statistics', id=','.join(video_ids[start:start + 50])))
+        for item in response.get('items', []):
+            comment_count = item.get('statistics', {}).get('commentCount')
+            if comment_count is not None:
+                counts[item['id']] = int(comment_count)
+    return counts
+
 def get_youtube_channel_videos(channel_id: str, max_results: int = 50) -> List[Dict]:
     """
     Fetches videos from a YouTube channel with comprehensive metadata.
@@ -66,14 +198,14 @@ def get_youtube_channel_videos(channel_id: str, max_results: int = 50) -> List[D
         raise Exception("YouTube API service is not configured.")
     
     try:
-        youtube = build('youtube', 'v3', developerKey=api_key)
+        youtube = _youtube_client(api_key)
         
         # First, get the channel's uploads playlist ID
         channel_request = youtube.channels().list(
             part='contentDetails',
             id=channel_id
         )
-        channel_response = channel_request.execute()
+        channel_response = _execute(channel_request)
         
         if not channel_response.get('items'):
             logger.error(f"Channel not found: {channel_id}")
@@ -88,7 +220,7 @@ def get_youtube_channel_videos(channel_id: str, max_results: int = 50) -> List[D
             playlistId=uploads_playlist_id,
             maxResults=min(max_results, 50)  # YouTube API limit
         )
-        playlist_response = playlist_request.execute()
+        playlist_response = _execute(playlist_request)
         
         # Extract video IDs
         video_ids = [item['snippet']['resourceId']['videoId'] for item in playlist_response.get('items', [])]
@@ -102,43 +234,9 @@ def get_youtube_channel_videos(channel_id: str, max_results: int = 50) -> List[D
             part='snippet,statistics,contentDetails',
             id=','.join(video_ids)
         )
-        videos_response = videos_request.execute()
+        videos_response = _execute(videos_request)
         
-        videos = []
-        for video_data in videos_response.get('items', []):
-            snippet = video_data.get('snippet', {})
-            statistics = video_data.get('statistics', {})
-            content_details = video_data.get('contentDetails', {})
-            
-            # Get the best thumbnail
-            thumbnails = snippet.get('thumbnails', {})
-            thumbnail_url = ""
-            for quality in ['maxres', 'high', 'medium', 'default']:
-                if quality in thumbnails:
-                    thumbnail_url = thumbnails[quality].get('url', '')
-                    break
-            
-            # Parse duration (PT4M13S -> 4:13)
-            duration = content_details.get('duration', '')
-            duration_seconds = parse_youtube_duration(duration)
-            
-            video_info = {
-                'video_id': video_data.get('id'),
-                'title': snippet.get('title', 'Untitled Video'),
-                'description': snippet.get('description', '')[:200],  # Truncate description
-                'thumbnail_url': thumbnail_url,
-                'published_at': snippet.get('publishedAt', ''),
-                'view_count': int(statistics.get('viewCount', 0)),
-                'like_count': int(statistics.get('likeCount', 0)),
-                'comment_count': int(statistics.get('commentCount', 0)),
-                'duration': duration,
-                'duration_seconds': duration_seconds,
-                'tags': snippet.get('tags', [])[:5],  # Limit to first 5 tags
-                'category_id': snippet.get('categoryId'),
-                'default_language': snippet.get('defaultLanguage'),
-                'has_captions': content_details.get('caption') == 'true'
-            }
-            videos.append(video_info)
+        videos = [build_video_record(video_data) for video_data in videos_response.get('items', [])]
         
         # Sort by published date (newest first)
         videos.sort(key=lambda x: x['published_at'], reverse=True)
@@ -146,7 +244,7 @@ def get_youtube_channel_videos(channel_id: str, max_results: int = 50) -> List[D
         logger.info(f"Successfully fetched {len(videos)} videos for channel {channel_id}")
         return videos
         
-    except HttpError as e:
+    except youtube_http_error() as e:
         error_details = json.loads(e.content).get('error', {})
         error_reason = error_details.get('errors', [{}])[0].get('reason', 'unknown')
         logger.error(f"YouTube API HTTP error ({e.resp.status}) fetching videos for {channel_id}: {error_reason}")
@@ -158,10 +256,47 @@ def get_youtube_channel_videos(channel_id: str, max_results: int = 50) -> List[D
         else:
             raise Exception(f"YouTube API error: {error_reason}")
             
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error fetching videos for channel {channel_id}: {e}")
         raise Exception(f"Failed to fetch channel videos: {str(e)}")
 
+def build_video_record(video_data: Dict) -> Dict:
+    """Shapes one videos().list item into the record the app and templates use."""
+    snippet = video_data.get('snippet', {})
+    statistics = video_data.get('statistics', {})
+    content_details = video_data.get('contentDetails', {})
+    
+    # Get the best thumbnail
+    thumbnails = snippet.get('thumbnails', {})
+    thumbnail_url = ""
+    for quality in ['maxres', 'high', 'medium', 'default']:
+        if quality in thumbnails:
+            thumbnail_url = thumbnails[quality].get('url', '')
+            break
+    
+    # Parse duration (PT4M13S -> 4:13)
+    duration = content_details.get('duration', '')
+    duration_seconds = parse_youtube_duration(duration)
+    
+    return {
+        'video_id': video_data.get('id'),
+        'title': snippet.get('title', 'Untitled Video'),
+        'description': snippet.get('description', '')[:200],  # Truncate description
+        'thumbnail_url': thumbnail_url,
+        'published_at': snippet.get('publishedAt', ''),
+        'view_count': int(statistics.get('viewCount', 0)),
+        'like_count': int(statistics.get('likeCount', 0)),
+        'comment_count': int(statistics.get('commentCount', 0)),
+        'duration': duration,
+        'duration_seconds': duration_seconds,
+        'tags': snippet.get('tags', [])[:5],  # Limit to first 5 tags
+        'category_id': snippet.get('categoryId'),
+        'default_language': snippet.get('defaultLanguage'),
+        'has_captions': content_details.get('caption') == 'true'
+    }
+
 def parse_youtube_duration(duration: str) -> int:
     """
     Parse YouTube duration format (PT4M13S) to seconds.
@@ -211,14 +346,14 @@ def get_video_captions(video_id: str) -> Optional[str]:
         return None
     
     try:
-        youtube = build('youtube', 'v3', developerKey=api_key)
+        youtube = _youtube_client(api_key)
         
         # List available captions
         captions_request = youtube.captions().list(
             part='snippet',
             videoId=video_id
         )
-        captions_response = captions_request.execute()
+        captions_response = _execute(captions_request)
         
         # Look for English captions
         for caption in captions_response.get('items', []):
@@ -231,12 +366,12 @@ def get_video_captions(video_id: str) -> Optional[str]:
                     id=caption_id,
                     tfmt='srt'  # SubRip format
                 )
-                caption_content = download_request.execute()
+                caption_content = _execute(download_request)
                 return caption_content
         
         return None
         
-    except HttpError as e:
+    except youtube_http_error() as e:
         # Expected for most videos due to access restrictions
         logger.debug(f"Could not fetch captions for video {video_id}: {e}")
         return None
@@ -294,11 +429,11 @@ def get_youtube_channel_details(channel_url: str) -> Optional[Dict]:
         return None
 
     try:
-        youtube = build('youtube', 'v3', developerKey=api_key)
+        youtube = _youtube_client(api_key)
         
         # Try the parsed parameters first
         request = youtube.channels().list(part="snippet,statistics", **params)
-        response = request.execute()
+        response = _execute(request)
         
         # If no results and we used username/handle, try alternative approaches
         if not response.get("items") and username:
@@ -313,9 +448,11 @@ def get_youtube_channel_details(channel_url: str) -> Optional[Dict]:
                 if alt_params != params:  # Don't repeat the same query
                     try:
                         request = youtube.channels().list(part="snippet,statistics", **alt_params)
-                        response = request.execute()
+                        response = _execute(request)
                         if response.get("items"):
                             break
+                    except CircuitOpenError:
+                        raise
                     except:
                         continue
         
@@ -347,7 +484,7 @@ def get_youtube_channel_details(channel_url: str) -> Optional[Dict]:
             'created_at': snippet.get("publishedAt", "")
         }
         
-    except HttpError as e:
+    except youtube_http_error() as e:
         error_details = json.loads(e.content).get('error', {})
         error_reason = error_details.get('errors', [{}])[0].get('reason', 'unknown')
         logger.error(f"YouTube API HTTP error ({e.resp.status}) for {channel_url}: {error_reason}")
@@ -359,6 +496,8 @@ def get_youtube_channel_details(channel_url: str) -> Optional[Dict]:
         else:
             raise Exception(f"YouTube API error: {error_reason}")
             
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error fetching channel details for {channel_url}: {e}")
         raise Exception(f"Failed to fetch channel data: {str(e)}")
@@ -396,31 +535,167 @@ def validate_youtube_url(url: str) -> bool:
     channel_indicators = ['/@', '/channel/', '/c/', '/user/']
     return any(indicator in url for indicator in channel_indicators)
 
+# --- Shared HTTP Plumbing ---
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+MIN_ATTEMPT_SECONDS = 0.5  # No attempt is started with less time than this left before the deadline
+
+def build_http_session(pool_size: int = 20) -> 'requests.Session':
+    """Creates a keep-alive session whose connection pool is sized for concurrent workers."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+def request_with_retries(session: 'requests.Session', method: str, url: str, max_retries: int = 3,
+                         backoff_base: float = 0.5, backoff_max: float = 8.0,
+                         breaker: Optional[CircuitBreaker] = None, deadline: Optional[float] = None,
+                         **kwargs) -> 'requests.Response':
+    """
+    Sends a request, retrying connection errors and retryable statuses with
+    full-jitter exponential backoff. A Retry-After header from the server wins
+    over the computed delay. The last response (or error) is returned to the caller.
+
+    With a `breaker`, every attempt counts against it on its own (any requests
+    error and retryable statuses are failures), the first attempt
+    raises CircuitOpenError if it is open, and retrying stops as soon as it is
+    no longer closed. With a `deadline` (seconds), the attempts and backoff
+    together never take longer: each attempt's timeout is cut to the time left
+    and no retry is started that could not finish in time.
+    """
+    import requests
+    expires = time.monotonic() + deadline if deadline else None
+    for attempt in range(max_retries + 1):
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenError(breaker.name, breaker.retry_after())
+        if expires is not None:
+            kwargs['timeout'] = _remaining_timeout(kwargs.get('timeout'), expires - time.monotonic())
+        retry_after = None
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt == max_retries or not _may_retry(breaker, expires):
+                raise
+        except requests.exceptions.RequestException:
+            # Not retried, but still an outcome the breaker must see (a half-open trial waits on it)
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        else:
+            retryable = response.status_code in RETRYABLE_STATUSES
+            if breaker is not None:
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success(time.perf_counter() - start)
+            if not retryable or attempt == max_retries or not _may_retry(breaker, expires):
+                return response
+            retry_after = response.headers.get('Retry-After')
+            response.close()
+
+        if retry_after and retry_after.isdigit():
+            delay = min(float(retry_after), backoff_max)
+        else:
+            delay = random.uniform(0, min(backoff_max, backoff_base * (2 ** attempt)))
+        if expires is not None and time.monotonic() + delay >= expires:
+            delay = max(0.0, expires - time.monotonic())
+        logger.debug(f"Retrying {method} {url} in {delay:.2f}s (attempt {attempt + 1}/{max_retries})")
+        time.sleep(delay)
+
+def _may_retry(breaker: Optional[CircuitBreaker], expires: Optional[float]) -> bool:
+    """Retries only go to a closed breaker's upstream, and only with time left before the deadline."""
+    if breaker is not None and breaker.state != CircuitBreaker.CLOSED:
+        return False
+    return expires is None or expires - time.monotonic() > MIN_ATTEMPT_SECONDS
+
+def _remaining_timeout(timeout, remaining: float):
+    """The (connect, read) timeout of the next attempt, cut down to the time left before the deadline."""
+    remaining = max(remaining, MIN_ATTEMPT_SECONDS)
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(min(t, remaining) if t is not None else remaining for t in timeout)
+    return min(timeout, remaining)
+
 # --- IBM NLU Service ---
+# Union of the features the sentiment and theme tools need, so one call per comment serves both
+COMMENT_FEATURES = {
+    "sentiment": {},
+    "emotion": {},
+    "concepts": {"limit": 3},
+    "entities": {"limit": 3, "sentiment": False, "emotion": False},
+}
+
 class IBMNaturalLanguageUnderstanding:
-    
+
+    def __init__(self):
+        self._settings = None
+        self._session = None
+
+    def configure(self, config):
+        """Resolves credentials and endpoints once and builds the pooled session."""
+        api_key = config.get('IBM_NLU_API_KEY')
+        service_url = config.get('IBM_NLU_URL')
+        version = config.get('IBM_NLU_VERSION', '2022-04-07')
+        self._settings = {
+            'configured': all([api_key, service_url, version]),
+            'url': f"{(service_url or '').rstrip('/')}/v1/analyze?version={version}",
+            'auth': ('apikey', api_key),
+            'timeout': (config.get('HTTP_CONNECT_TIMEOUT', 5), config.get('IBM_NLU_TIMEOUT', 20)),
+            'max_retries': config.get('HTTP_MAX_RETRIES', 3),
+            'backoff_base': config.get('HTTP_BACKOFF_BASE', 0.5),
+            'backoff_max': config.get('HTTP_BACKOFF_MAX', 8.0),
+            'deadline': config.get('HTTP_DEADLINE_SECONDS', 45),
+        }
+        self._session = build_http_session(config.get('HTTP_POOL_SIZE', 20))
+
     def _make_request(self, text_to_analyze: str, features: Dict) -> Optional[Dict]:
-        api_key = current_app.config.get('IBM_NLU_API_KEY')
-        service_url = current_app.config.get('IBM_NLU_URL')
-        version = current_app.config.get('IBM_NLU_VERSION', '2022-04-07')
-        
-        if not all([api_key, service_url, version]):
+        import requests
+        settings = self._settings
+        if not settings['configured']:
             logger.error("IBM NLU is not configured.")
             return None
 
-        url = f"{service_url}/v1/analyze?version={version}"
-        headers = {"Content-Type": "application/json"}
-        auth = ('apikey', api_key)
         data = {"text": text_to_analyze, "features": features}
 
         try:
-            response = requests.post(url, headers=headers, auth=auth, json=data, timeout=20)
-            response.raise_for_status()
+            response = self._post(settings, data)
             return response.json()
+        except CircuitOpenError as e:
+            logger.debug(f"Skipping IBM NLU call: {e}")
+            return None
         except requests.exceptions.RequestException as e:
             logger.error(f"IBM NLU API call error: {e}")
             return None
 
+    def _post(self, settings: Dict, data: Dict) -> 'requests.Response':
+        with metrics.track_upstream('nlu', 'analyze'):
+            return self._send(settings, data)
+
+    def _send(self, settings: Dict, data: Dict) -> 'requests.Response':
+        # Each attempt counts against the breaker, so a hanging upstream opens it after
+        # CIRCUIT_FAILURE_THRESHOLD timeouts rather than as many exhausted retry loops
+        response = request_with_retries(
+            self._session, 'POST', settings['url'],
+            max_retries=settings['max_retries'],
+            backoff_base=settings['backoff_base'],
+            backoff_max=settings['backoff_max'],
+            breaker=nlu_breaker, deadline=settings['deadline'],
+            auth=settings['auth'], json=data, timeout=settings['timeout']
+        )
+        response.raise_for_status()
+        return response
+
+    def analyze_comment(self, text_to_analyze: str) -> Optional[Dict]:
+        """Analyzes a comment for everything the comment tools use (see COMMENT_FEATURES)."""
+        return self._make_request(text_to_analyze, COMMENT_FEATURES)
+
     def analyze_sentiment_emotion(self, text_to_analyze: str) -> Optional[Dict]:
         """Analyzes text for sentiment and emotion."""
         features = {"sentiment": {}, "emotion": {}}
@@ -436,14 +711,173 @@ class IBMNaturalLanguageUnderstanding:
 
 # --- IBM Watsonx AI Service ---
 class IBMWatsonxAI:
+    DEFAULT_MODEL_ID = "ibm/granite-13b-chat-v2"
+
     def __init__(self):
         self.is_available = False
-        logger.warning("IBM watsonx.ai connection is OFF for demo purposes, using fallback mode.")
+        self._settings = None
+        self._session = None
+        self._tokens = None
+
+    def configure(self, config):
+        """Resolves credentials and endpoints once and builds the pooled session."""
+        api_key = config.get('IBM_WATSONX_API_KEY')
+        project_id = config.get('IBM_WATSONX_PROJECT_ID')
+        base_url = (config.get('IBM_WATSONX_URL') or '').rstrip('/')
+        self._settings = {
+            'api_key': api_key,
+            'project_id': project_id,
+            'generation_url': f"{base_url}/ml/v1/text/generation?version={config.get('IBM_WATSONX_VERSION', '2023-05-29')}",
+            'stream_url': f"{base_url}/ml/v1/text/generation_stream?version={config.get('IBM_WATSONX_VERSION', '2023-05-29')}",
+            'iam_url': config.get('IBM_IAM_URL', 'https://iam.cloud.ibm.com/identity/token'),
+            'timeout': (config.get('HTTP_CONNECT_TIMEOUT', 5), config.get('IBM_WATSONX_TIMEOUT', 30)),
+            'max_retries': config.get('HTTP_MAX_RETRIES', 3),
+            'backoff_base': config.get('HTTP_BACKOFF_BASE', 0.5),
+            'backoff_max': config.get('HTTP_BACKOFF_MAX', 8.0),
+            'deadline': config.get('HTTP_DEADLINE_SECONDS', 45),
+        }
+        self._session = build_http_session(config.get('HTTP_POOL_SIZE', 20))
+        self.is_available = bool(config.get('IBM_WATSONX_ENABLED') and api_key and project_id and base_url)
+        if not self.is_available:
+            logger.warning("IBM watsonx.ai connection is OFF for demo purposes, using fallback mode.")
+        self._tokens = iam.TokenProvider(
+            self._request_access_token, iam.TokenStore(config.get('DATABASE')),
+            iam.token_key(self._settings['iam_url'], api_key or ''),
+            refresh_fraction=config.get('IAM_TOKEN_REFRESH_FRACTION', 0.8),
+            min_validity=config.get('IAM_TOKEN_MIN_VALIDITY_SECONDS', 60),
+            retry_seconds=config.get('IAM_TOKEN_RETRY_SECONDS', 30),
+            # A fetch's attempts and backoff end by the HTTP deadline; the lease outlasts them
+            lease_seconds=self._settings['deadline'] + self._settings['timeout'][0],
+        )
+
+    def _post(self, url: str, operation: str, **kwargs) -> 'requests.Response':
+        with metrics.track_upstream('watsonx', operation):
+            return self._send(url, **kwargs)
+
+    def _send(self, url: str, **kwargs) -> 'requests.Response':
+        settings = self._settings
+        response = request_with_retries(
+            self._session, 'POST', url,
+            max_retries=settings['max_retries'],
+            backoff_base=settings['backoff_base'],
+            backoff_max=settings['backoff_max'],
+            breaker=watsonx_breaker, deadline=settings['deadline'],
+            timeout=settings['timeout'], **kwargs
+        )
+        response.raise_for_status()
+        return response
+
+    def _get_access_token(self) -> Optional[str]:
+        """The IAM bearer token shared by all workers, renewed in the background (see iam.py)."""
+        return self._tokens.get_token()
+
+    def _request_access_token(self):
+        """Exchanges the API key for a new IAM token: (access_token, expires_in), or None on failure."""
+        import requests
+        try:
+            response = self._post(
+                self._settings['iam_url'], 'iam_token',
+                headers={"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"},
+                data={"grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": self._settings['api_key']}
+            )
+            token_data = response.json()
+            return token_data["access_token"], int(token_data.get('expires_in', 3600))
+        except (requests.exceptions.RequestException, CircuitOpenError, KeyError, ValueError) as e:
+            logger.error(f"Error getting IBM access token: {e}")
+            return None
+
+    @staticmethod
+    def generation_parameters(max_tokens: int = 500) -> Dict:
+        return {"decoding_method": "greedy", "max_new_tokens": max_tokens}
+
+    def _generation_payload(self, prompt: str, model_id: str, max_tokens: int) -> Dict:
+        return {
+            "input": prompt,
+            "parameters": self.generation_parameters(max_tokens),
+            "model_id": model_id or self.DEFAULT_MODEL_ID,
+            "project_id": self._settings['project_id']
+        }
+
+    def generate_content(self, prompt: str, model_id: str, max_tokens: int = 500,
+                         allow_fallback: bool = True) -> Optional[str]:
+        """The generated text; the fallback script if watsonx is unavailable, or None then without allow_fallback."""
+        if not self.is_available:
+            return self.fallback_script(prompt) if allow_fallback else None
+
+        import requests
+        token = self._get_access_token()
+        if token:
+            try:
+                response = self._post(
+                    self._settings['generation_url'], 'generate',
+                    headers={"Accept": "application/json", "Authorization": f"Bearer {token}"},
+                    json=self._generation_payload(prompt, model_id, max_tokens)
+                )
+                results = response.json().get('results', [])
+                if results:
+                    return results[0]['generated_text'].strip()
+            except (requests.exceptions.RequestException, CircuitOpenError, KeyError, ValueError) as e:
+                logger.error(f"Error calling watsonx.ai: {e}")
+        return self.fallback_script(prompt) if allow_fallback else None
+
+    def stream_content(self, prompt: str, model_id: str, max_tokens: int = 500,
+                       allow_fallback: bool = True) -> Generator[str, None, bool]:
+        """
+        Yields the generated text piece by piece as watsonx produces it
+        (text/generation_stream). If the stream can't be started, the fallback
+        script is yielded the same way (nothing without allow_fallback); if it
+        breaks part-way, the text so far stands. Returns whether the model's
+        stream ran to completion.
+        """
+        if not self.is_available:
+            if allow_fallback:
+                yield from self.stream_fallback_script(prompt)
+            return False
+
+        import requests
+        token = self._get_access_token()
+        response = None
+        if token:
+            try:
+                response = self._post(
+                    self._settings['stream_url'], 'generate_stream',
+                    headers={"Accept": "text/event-stream", "Authorization": f"Bearer {token}"},
+                    json=self._generation_payload(prompt, model_id, max_tokens),
+                    stream=True
+                )
+            except (requests.exceptions.RequestException, CircuitOpenError) as e:
+                logger.error(f"Error starting watsonx.ai stream: {e}")
+        if response is None:
+            if allow_fallback:
+                yield from self.stream_fallback_script(prompt)
+            return False
 
-    def generate_content(self, prompt: str, model_id: str, max_tokens: int = 500) -> str:
-        return self._generate_fallback_script(prompt)
+        produced = False
+        stop_reason = None
+        try:
+            for event in _iter_sse_events(response.iter_lines(decode_unicode=True)):
+                if event.get('event') == 'error':
+                    raise ValueError(event.get('data'))
+                results = json.loads(event['data']).get('results', []) if event.get('data') else []
+                text = results[0].get('generated_text', '') if results else ''
+                stop_reason = results[0].get('stop_reason', stop_reason) if results else stop_reason
+                if text:
+                    produced = True
+                    yield text
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            logger.error(f"watsonx.ai stream broke off: {e}")
+        finally:
+            response.close()
+        if not produced and allow_fallback:
+            yield from self.stream_fallback_script(prompt)
+        return produced and stop_reason not in (None, 'not_finished')
+
+    def stream_fallback_script(self, prompt: str) -> Iterator[str]:
+        """The fallback script, word by word (with its whitespace), like a model stream."""
+        for match in re.finditer(r'\s*\S+', self.fallback_script(prompt)):
+            yield match.group(0)
 
-    def _generate_fallback_script(self, prompt: str) -> str:
+    def fallback_script(self, prompt: str) -> str:
         topic = "your topic"
         if match := re.search(r'topic of "(.*?)"', prompt, re.IGNORECASE):
             topic = match.group(1)
@@ -470,6 +904,67 @@ class IBMWatsonxAI:
         
         return script
 
-# Instantiate services
-nlu_service = IBMNaturalLanguageUnderstanding()
-watsonx_ai = IBMWatsonxAI()
\ No newline at end of file
+def _iter_sse_events(lines) -> Iterator[Dict]:
+    """Server-sent events from a response's lines, as {'event': ..., 'data': ...} (multi-line data joined)."""
+    event = {}
+    for line in lines:
+        if not line:
+            if event:
+                yield event
+            event = {}
+        elif not line.startswith(':'):
+            field, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            event[field] = f"{event[field]}\n{value}" if field == 'data' and 'data' in event else value
+    if event:
+        yield event
+
+# --- Service Registry ---
+SERVICE_FACTORIES = {
+    'nlu': IBMNaturalLanguageUnderstanding,
+    'watsonx': IBMWatsonxAI,
+}
+
+class ServiceRegistry:
+    """
+    Per-app home of the upstream clients. Each one is constructed from the app
+    config the first time a request needs it, so startup and CLI commands such
+    as `flask init-db` never pay for HTTP sessions they will not use.
+    """
+
+    def __init__(self, config):
+        self._config = config
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        service = self._instances.get(name)
+        if service is None:
+            with self._lock:
+                service = self._instances.get(name)
+                if service is None:
+                    service = SERVICE_FACTORIES[name]()
+                    service.configure(self._config)
+                    self._instances[name] = service
+        return service
+
+def get_service(name: str):
+    """Looks up a service on the current app's registry."""
+    return current_app.extensions['services'].get(name)
+
+def get_nlu_service() -> IBMNaturalLanguageUnderstanding:
+    return get_service('nlu')
+
+def get_watsonx_ai() -> IBMWatsonxAI:
+    return get_service('watsonx')
+
+def init_app(app):
+    """Attach the service registry and apply the circuit breaker settings."""
+    app.extensions['services'] = ServiceRegistry(app.config)
+    for breaker in breakers.values():
+        breaker.configure(
+            failure_threshold=app.config.get('CIRCUIT_FAILURE_THRESHOLD', 5),
+            reset_timeout=app.config.get('CIRCUIT_RESET_SECONDS', 30),
+            slow_call_threshold=app.config.get('CIRCUIT_SLOW_CALL_SECONDS'),
+            half_open_max_calls=app.config.get('CIRCUIT_HALF_OPEN_CALLS', 1),
+        )
\ No newline at end of file
@@ -190,6 +190,10 @@
     };
 
     // ===== API UTILITIES =====
+    // Last ETag and parsed body of each GET URL: the request is sent with If-None-Match
+    // and a 304 Not Modified answer reuses the body instead of transferring it again
+    const validatedResponses = new Map();
+
     window.apiRequest = async function(url, options = {}) {
         const {
             method = 'GET',
@@ -220,6 +224,11 @@
             requestOptions.body = JSON.stringify(data);
         }
 
+        const validated = method === 'GET' ? validatedResponses.get(url) : null;
+        if (validated) {
+            defaultHeaders['If-None-Match'] = validated.etag;
+        }
+
         let lastError;
         
         for (let attempt = 1; attempt <= retries; attempt++) {
@@ -232,6 +241,13 @@
                 const response = await fetch(url, requestOptions);
                 clearTimeout(timeoutId);
                 
+                if (response.status === 304 && validated) {
+                    if (shouldShowLoading) {
+                        window.hideLoading();
+                    }
+                    return structuredClone(validated.result);
+                }
+                
                 if (!response.ok) {
                     const errorData = await response.json().catch(() => ({}));
                     throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
@@ -239,6 +255,11 @@
                 
                 const result = await response.json();
                 
+                const etag = response.headers.get('ETag');
+                if (method === 'GET' && etag) {
+                    validatedResponses.set(url, { etag, result: structuredClone(result) });
+                }
+                
                 if (shouldShowLoading) {
                     window.hideLoading();
                 }
@@ -0,0 +1,177 @@
+# File: app/transcripts.py
+# Video transcripts as timed segments: a streaming SRT parser, the compressed
+# block format they are stored in (see database.save_transcript), NLU-sized
+# windows over them and a bounded-memory timeline of per-window analyses.
+# Kept free of Flask like analysis.py.
+import re
+import zlib
+import codecs
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from .analysis import EMOTIONS, extract_comment_themes
+
+BLOCK_SEGMENTS = 256  # Segments per stored block; a seek decompresses at most one partial block
+
+_TIMING = re.compile(r'(\d+):(\d{2}):(\d{2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{1,3})')
+_MARKUP = re.compile(r'<[^>]*>|\{\\[^}]*\}')  # <i>, <font ...>, {\an8}
+
+
+class Segment(NamedTuple):
+    start_ms: int
+    end_ms: int
+    text: str
+
+
+class Window(NamedTuple):
+    start_ms: int
+    end_ms: int
+    text: str
+
+
+def _ms(hours, minutes, seconds, fraction) -> int:
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, '0'))
+
+# --- Parsing ---
+def iter_lines(chunks: Iterable[Union[bytes, str]]) -> Iterator[str]:
+    """Lines of a document arriving in chunks (bytes are decoded as UTF-8), without joining the chunks."""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    pending = ''
+    for chunk in chunks:
+        pending += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        *lines, pending = pending.split('\n')
+        yield from lines
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+def parse_srt(lines: Iterable[str]) -> Iterator[Segment]:
+    """
+    Yields one Segment per SRT cue as soon as the cue is complete. Tolerates
+    CRLF, a BOM, formatting tags, missing cue numbers and missing blank lines
+    between cues; lines outside a cue and unparseable timings are skipped.
+    """
+    timing, text_lines = None, []
+    for line in lines:
+        line = line.strip().lstrip('\ufeff')
+        match = _TIMING.search(line)
+        if match:
+            if timing:
+                if text_lines and text_lines[-1].isdigit():
+                    text_lines.pop()  # The next cue's number, not text: the blank line was missing
+                yield from _cue(timing, text_lines)
+            groups = match.groups()
+            timing, text_lines = (_ms(*groups[:4]), _ms(*groups[4:])), []
+        elif not line:
+            if timing:
+                yield from _cue(timing, text_lines)
+            timing, text_lines = None, []
+        elif timing:
+            text_lines.append(line)
+    if timing:
+        yield from _cue(timing, text_lines)
+
+def _cue(timing, text_lines) -> Iterator[Segment]:
+    text = ' '.join(_MARKUP.sub('', line) for line in text_lines).strip()
+    if text:
+        yield Segment(timing[0], max(timing), ' '.join(text.split()))
+
+# --- Storage blocks ---
+def blocks(segments: Iterable[Segment], size: int = BLOCK_SEGMENTS) -> Iterator[List[Segment]]:
+    """Consecutive runs of up to `size` segments."""
+    block = []
+    for segment in segments:
+        block.append(segment)
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+def encode_block(block: List[Segment]) -> bytes:
+    """zlib-compressed 'start<TAB>end<TAB>text' lines (segment text never contains tabs or newlines)."""
+    return zlib.compress('\n'.join(f'{s.start_ms}\t{s.end_ms}\t{s.text}' for s in block).encode('utf-8'), 6)
+
+def decode_block(data: bytes) -> List[Segment]:
+    segments = []
+    for line in zlib.decompress(data).decode('utf-8').split('\n'):
+        start_ms, end_ms, text = line.split('\t', 2)
+        segments.append(Segment(int(start_ms), int(end_ms), text))
+    return segments
+
+# --- Analysis ---
+def windows(segments: Iterable[Segment], max_chars: int = 1500, max_ms: int = 120_000) -> Iterator[Window]:
+    """
+    Groups consecutive segments into analysis windows of at most `max_chars`
+    characters and `max_ms` of video time (a single longer segment is its own window).
+    """
+    start_ms = end_ms = None
+    texts, chars = [], 0
+    for segment in segments:
+        if texts and (chars + len(segment.text) + 1 > max_chars or segment.end_ms - start_ms > max_ms):
+            yield Window(start_ms, end_ms, ' '.join(texts))
+            texts, chars = [], 0
+        if not texts:
+            start_ms = segment.start_ms
+        texts.append(segment.text)
+        chars += len(segment.text) + 1
+        end_ms = segment.end_ms
+    if texts:
+        yield Window(start_ms, end_ms, ' '.join(texts))
+
+
+class TranscriptTimeline:
+    """
+    Folds per-window NLU results into transcript-wide aggregates as they arrive:
+    memory grows with the number of windows (one small timeline point each) and
+    distinct themes, never with the transcript text.
+    """
+
+    def __init__(self, moments_per_theme: int = 10):
+        self.moments_per_theme = moments_per_theme
+        self.points = []
+        self.label_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
+        self.emotion_totals = {e: 0.0 for e in EMOTIONS}
+        self.score_total = 0.0
+        self.weight = 0  # Characters analyzed
+        self.failed = 0
+        self.themes: Dict[str, Dict] = {}
+
+    def add(self, window: Window, result: Optional[Dict]):
+        if not result:
+            self.failed += 1
+            return
+        document = result.get('sentiment', {}).get('document', {})
+        label = document.get('label', 'neutral')
+        score = document.get('score', 0.0)
+        weight = len(window.text)
+        emotions = result.get('emotion', {}).get('document', {}).get('emotion', {})
+
+        self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        self.score_total += score * weight
+        for emotion in EMOTIONS:
+            self.emotion_totals[emotion] += emotions.get(emotion, 0.0) * weight
+        self.weight += weight
+
+        point = {'start': window.start_ms / 1000, 'end': window.end_ms / 1000, 'score': score, 'label': label}
+        if emotions:
+            point['emotion'] = max(emotions, key=emotions.get)
+        self.points.append(point)
+
+        for theme in sorted(extract_comment_themes(result)):
+            entry = self.themes.setdefault(theme, {'theme': theme, 'windows': 0, 'moments': []})
+            entry['windows'] += 1
+            if len(entry['moments']) < self.moments_per_theme:
+                entry['moments'].append(window.start_ms / 1000)
+
+    def summary(self, top_themes: int = 15) -> Dict:
+        analyzed = len(self.points)
+        themes = sorted(self.themes.values(), key=lambda t: (-t['windows'], t['moments'][0]))[:top_themes]
+        return {
+            'sentiment_data': dict(self.label_counts),
+            'mean_score': self.score_total / self.weight if self.weight else None,
+            'emotion_data': {e: t / self.weight for e, t in self.emotion_totals.items()} if self.weight else {},
+            'timeline': self.points,
+            'themes': themes,
+            'windows_analyzed': analyzed,
+            'windows_failed': self.failed,
+        }
@@ -4,6 +4,8 @@ import re
 import datetime
 from datetime import timedelta, date
 
+from . import posting_times
+
 # --- Context Processor ---
 def utility_processor():
     """Makes utility functions available in all templates."""
@@ -53,28 +55,53 @@ def generate_mock_videos(count=12):
         })
     return sorted(videos, key=lambda x: x['published_at'], reverse=True)
 
-def generate_smart_calendar_content(content_goals, platforms, posting_frequency, content_duration):
+def _format_hour(hour):
+    return f"{hour % 12 or 12}:00 {'AM' if hour < 12 else 'PM'}"
+
+def generate_smart_calendar_content(content_goals, platforms, posting_frequency, content_duration,
+                                    posting_profile=None, utc_offset_minutes=0):
+    """
+    Lays out the posts of the coming weeks. With a posting profile of the user's
+    channel (see posting_times.build_profile), YouTube posts go to the channel's
+    best-performing weekdays and hours (shifted into the user's timezone) and
+    are scored from that history; other platforms keep the generic times.
+    """
     freq_map = {'daily': 7, 'frequent': 5, 'regular': 3, 'weekly': 1}
     posts_per_week = freq_map.get(posting_frequency, 5)
     total_posts = posts_per_week * content_duration
     topics = re.findall(r'\b[A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b', content_goals) or ["New Content"]
     content_types = {'youtube': ['Video', 'Short'], 'instagram': ['Post', 'Reel'], 'tiktok': ['Video'], 'twitter': ['Tweet', 'Thread']}
     optimal_times = {'youtube': '6:00 PM', 'instagram': '11:00 AM', 'tiktok': '9:00 PM', 'twitter': '9:00 AM'}
+    best_slots = posting_times.ranked_slots(posting_profile) if posting_profile else []
     
     calendar_items = []
+    data_driven = 0
+    youtube_posts_by_week = {}
     today = date.today()
     for i in range(total_posts):
         platform = random.choice(platforms)
         post_date = today + timedelta(days=int((i / posts_per_week) * 7))
+        post_time = optimal_times.get(platform, '12:00 PM')
+        engagement_score = random.randint(65, 95)
+        if platform == 'youtube' and best_slots:
+            week = i // posts_per_week
+            nth = youtube_posts_by_week[week] = youtube_posts_by_week.get(week, -1) + 1  # Best slot first
+            slot = best_slots[nth % len(best_slots)]  # One weekday per slot, and at most 7 posts a week
+            weekday, hour = posting_times.shift_slot(slot['weekday'], slot['hour'], utc_offset_minutes)
+            week_start = today + timedelta(weeks=week)
+            post_date = week_start + timedelta(days=(weekday - week_start.weekday()) % 7)
+            post_time = _format_hour(hour)
+            engagement_score = 65 + round(slot['score'] * 0.3)
+            data_driven += 1
         calendar_items.append({
             'date': post_date.strftime('%Y-%m-%d'), 'day': post_date.strftime('%A'),
-            'time': optimal_times.get(platform, '12:00 PM'), 'title': f"{random.choice(topics)} Post",
+            'time': post_time, 'title': f"{random.choice(topics)} Post",
             'platform': platform, 'content_type': random.choice(content_types.get(platform, ['Post'])),
-            'engagement_score': random.randint(65, 95)
+            'engagement_score': engagement_score
         })
     
     metrics = {
-        'total_posts': total_posts, 'optimal_time_coverage': total_posts,
+        'total_posts': total_posts, 'optimal_time_coverage': data_driven if posting_profile else total_posts,
         'content_types_used': len(set(i['content_type'] for i in calendar_items)),
         'avg_engagement': sum(item['engagement_score'] for item in calendar_items) / total_posts if total_posts > 0 else 0
     }
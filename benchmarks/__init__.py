@@ -0,0 +1,9 @@
+# File: benchmarks/__init__.py
+# Micro-benchmarks for the service and database hot paths.
+#
+#   python -m benchmarks run --output baseline.json
+#   python -m benchmarks run --output candidate.json
+#   python -m benchmarks compare baseline.json candidate.json
+#   python -m benchmarks startup --budget-ms 400   # create_app() cold start + import budget
+#
+# bench_login.py is a separate throughput benchmark for the login endpoint.
@@ -0,0 +1,78 @@
+# File: benchmarks/__main__.py
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from . import harness
+
+
+def _load_benchmarks():
+    # Importing the modules registers their benchmarks
+    from . import bench_services, bench_database  # noqa: F401
+
+def cmd_run(args):
+    _load_benchmarks()
+    report = harness.run_benchmarks(args.filter, repeat=args.repeat, warmup=args.warmup, min_time=args.min_time)
+    if args.output:
+        harness.save_report(report, args.output)
+        print(f"\nSaved {len(report['results'])} results to {args.output}")
+    return 0
+
+def cmd_compare(args):
+    rows = harness.compare_reports(harness.load_report(args.baseline), harness.load_report(args.candidate),
+                                   threshold=args.threshold, alpha=args.alpha)
+    regressions = 0
+    for row in rows:
+        if 'ratio' not in row:
+            print(f"{row['name']:<45} {row['status']}")
+            continue
+        marker = {'regression': '!!', 'improvement': '++'}.get(row['status'], '  ')
+        print(f"{marker} {row['name']:<42} {harness.format_seconds(row['baseline_p50']):>10} -> "
+              f"{harness.format_seconds(row['candidate_p50']):>10}  x{row['ratio']:.2f}  "
+              f"p={row['p_value']:.3f}  {row['status']}")
+        regressions += row['status'] == 'regression'
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%} at alpha={args.alpha}")
+    return 1 if regressions else 0
+
+def cmd_startup(args):
+    from . import startup
+    problems = startup.check_startup(args.budget_ms, runs=args.runs, top=args.top)
+    for problem in problems:
+        print(f"!! {problem}")
+    print(f"\n{'FAIL' if problems else 'OK'}: {len(problems)} startup problem(s)")
+    return 1 if problems else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Alice Insight micro-benchmarks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='Run benchmarks and optionally write JSON results')
+    run.add_argument('--output', '-o', help='Path of the JSON report to write')
+    run.add_argument('--filter', '-k', help='Only run benchmarks whose name contains this string')
+    run.add_argument('--repeat', type=int, default=30, help='Timed repetitions per benchmark')
+    run.add_argument('--warmup', type=int, default=3, help='Untimed repetitions before measuring')
+    run.add_argument('--min-time', type=float, default=0.01, help='Minimum seconds per repetition')
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser('compare', help='Flag regressions between two JSON reports')
+    compare.add_argument('baseline')
+    compare.add_argument('candidate')
+    compare.add_argument('--threshold', type=float, default=0.10, help='Relative change of the median to flag')
+    compare.add_argument('--alpha', type=float, default=0.05, help='Significance level for the Mann-Whitney U test')
+    compare.set_defaults(func=cmd_compare)
+
+    startup = sub.add_parser('startup', help='Check create_app() cold start against a time budget')
+    startup.add_argument('--budget-ms', type=float, default=float(os.environ.get('STARTUP_BUDGET_MS', 400)),
+                         help='Maximum best-of-runs create_app() time (default: $STARTUP_BUDGET_MS or 400)')
+    startup.add_argument('--runs', type=int, default=5, help='Cold starts to measure')
+    startup.add_argument('--top', type=int, default=15, help='Slowest top-level imports to list')
+    startup.set_defaults(func=cmd_startup)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+# File: benchmarks/bench_database.py
+# Query timings in app/database.py against a populated throwaway database.
+
+from app import database
+from app.services import build_video_record
+from . import fixtures
+from .fixtures import BENCH_USER_ID
+from .harness import benchmark
+
+VIDEOS = [build_video_record(item) for item in fixtures.video_items()]
+context = fixtures.populated_database
+
+
+@benchmark('database.get_user_by_id', context=context)
+def bench_get_user_by_id():
+    database.get_user_by_id(BENCH_USER_ID)
+
+@benchmark('database.get_user_by_email', context=context)
+def bench_get_user_by_email():
+    database.get_user_by_email('bench0@alice.io')
+
+@benchmark('database.get_recent_analyses', context=context)
+def bench_get_recent_analyses():
+    database.get_recent_analyses(BENCH_USER_ID)
+
+@benchmark('database.get_analyses_page[deep cursor]', context=context)
+def bench_get_analyses_page_deep():
+    database.get_analyses_page(BENCH_USER_ID, 20, after=('2024-06-01 00:00:00', 1))
+
+@benchmark('database.get_dashboard_stats', context=context)
+def bench_get_dashboard_stats():
+    database.get_dashboard_stats(BENCH_USER_ID)
+
+@benchmark('database.get_cached_analysis[hit]', context=context)
+def bench_get_cached_analysis_hit():
+    database.get_cached_analysis(BENCH_USER_ID, 'vid00000000', 'sentiment')
+
+@benchmark('database.get_cached_analysis[miss]', context=context)
+def bench_get_cached_analysis_miss():
+    database.get_cached_analysis(BENCH_USER_ID, 'vid00000001', 'theme_cluster')
+
+@benchmark('database.get_cached_user_videos', context=context)
+def bench_get_cached_user_videos():
+    database.get_cached_user_videos(BENCH_USER_ID)
+
+@benchmark('database.cache_user_videos[50 videos]', context=context)
+def bench_cache_user_videos():
+    database.cache_user_videos(BENCH_USER_ID, VIDEOS)
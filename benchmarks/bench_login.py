@@ -0,0 +1,70 @@
+# File: benchmarks/bench_login.py
+# Measures login throughput against a throwaway database.
+# Usage: python benchmarks/bench_login.py --logins 200 --concurrency 8
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app, database
+
+
+def build_app(db_path, rounds):
+    class BenchConfig(Config):
+        TESTING = True
+        DATABASE = db_path
+        BCRYPT_ROUNDS = rounds
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        database.init_db()
+        database.create_user_with_channel('bench@alice.io', 'bench-password')
+    return app
+
+
+def run(logins, concurrency, rounds):
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        app = build_app(db_path, rounds)
+        payload = {'email': 'bench@alice.io', 'password': 'bench-password'}
+
+        def login_once(_):
+            client = app.test_client()
+            start = time.perf_counter()
+            response = client.post('/auth/api/login', json=payload)
+            return response.status_code, (time.perf_counter() - start) * 1000
+
+        # Warm up the worker pool so process start-up is not measured
+        login_once(0)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(login_once, range(logins)))
+        elapsed = time.perf_counter() - start
+    finally:
+        os.remove(db_path)
+
+    latencies = sorted(ms for status, ms in results if status == 200)
+    failures = sum(1 for status, _ in results if status != 200)
+    print(f"Logins: {logins}  Concurrency: {concurrency}  Cost: {rounds} rounds")
+    print(f"Throughput: {logins / elapsed:.1f} logins/s  Failures: {failures}")
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"Latency: p50 {statistics.median(latencies):.1f}ms  p95 {p95:.1f}ms  max {latencies[-1]:.1f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Login throughput benchmark')
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+    run(args.logins, args.concurrency, args.rounds)
@@ -0,0 +1,52 @@
+# File: benchmarks/bench_services.py
+# Pure-CPU hot paths in app/services.py, app/analysis.py and app/dedup.py.
+
+from collections import defaultdict
+
+from app import services, analysis, dedup
+from . import fixtures
+from .harness import benchmark
+
+URLS = fixtures.video_urls()
+DURATIONS = fixtures.durations()
+VIDEO_ITEMS = fixtures.video_items()
+SENTIMENT_RESULTS = fixtures.sentiment_results()
+COMMENTS = fixtures.comment_texts()
+THEME_RESULTS = fixtures.theme_results()
+
+
+@benchmark('services.extract_video_id[200 urls]')
+def bench_extract_video_id():
+    for url in URLS:
+        services.extract_video_id(url)
+
+@benchmark('services.parse_youtube_duration[200]')
+def bench_parse_youtube_duration():
+    for duration in DURATIONS:
+        services.parse_youtube_duration(duration)
+
+@benchmark('services.build_video_record[50 videos]')
+def bench_build_video_records():
+    videos = [services.build_video_record(item) for item in VIDEO_ITEMS]
+    videos.sort(key=lambda x: x['published_at'], reverse=True)
+
+@benchmark('analysis.aggregate_sentiment[50 comments]')
+def bench_aggregate_sentiment():
+    analysis.aggregate_sentiment(SENTIMENT_RESULTS)
+
+@benchmark('analysis.is_analyzable[80 comments]')
+def bench_is_analyzable():
+    for comment in COMMENTS:
+        analysis.is_analyzable(comment, min_length=15)
+
+@benchmark('analysis.cluster_themes[80 comments]')
+def bench_cluster_themes():
+    themes_with_comments = defaultdict(list)
+    for comment, result in zip(COMMENTS, THEME_RESULTS):
+        for theme in analysis.extract_comment_themes(result):
+            themes_with_comments[theme].append(comment)
+    analysis.build_theme_clusters(themes_with_comments)
+
+@benchmark('dedup.dedupe_comments[80 comments]')
+def bench_dedupe_comments():
+    dedup.dedupe_comments(COMMENTS)
@@ -0,0 +1,134 @@
+# File: benchmarks/fixtures.py
+# Deterministic inputs for the benchmarks. Everything derives from a fixed seed
+# so two runs on different commits time exactly the same work.
+
+import os
+import random
+import tempfile
+import contextlib
+from datetime import datetime, timedelta
+
+SEED = 20240601
+BENCH_USER_ID = 2  # id 1 is the demo user seeded by database.sql
+
+WORDS = ['great', 'video', 'tutorial', 'python', 'editing', 'camera', 'music', 'love', 'thanks',
+         'explained', 'first', 'subscribe', 'audio', 'lighting', 'tips', 'awesome', 'helpful', 'why']
+
+
+def video_urls(count=200):
+    rng = random.Random(SEED)
+    alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-'
+    formats = ['https://www.youtube.com/watch?v={}&t=42s', 'https://youtu.be/{}',
+               'https://www.youtube.com/embed/{}', 'https://example.com/not-youtube/{}']
+    return [rng.choice(formats).format(''.join(rng.choice(alphabet) for _ in range(11))) for _ in range(count)]
+
+def durations(count=200):
+    rng = random.Random(SEED)
+    values = []
+    for _ in range(count):
+        hours, minutes, seconds = rng.choice([0, 0, 0, 1, 2]), rng.randint(0, 59), rng.randint(0, 59)
+        value = 'PT' + (f'{hours}H' if hours else '') + (f'{minutes}M' if minutes else '') + f'{seconds}S'
+        values.append(value)
+    return values
+
+def comment_texts(count=80):
+    rng = random.Random(SEED)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 25))) for _ in range(count)]
+
+def video_items(count=50):
+    """Items shaped like a videos().list response with snippet,statistics,contentDetails."""
+    rng = random.Random(SEED)
+    start = datetime(2024, 1, 1)
+    items = []
+    for i, duration in enumerate(durations(count)):
+        items.append({
+            'id': f'vid{i:08d}',
+            'snippet': {
+                'title': f'Benchmark video {i}',
+                'description': ' '.join(rng.choice(WORDS) for _ in range(80)),
+                'publishedAt': (start + timedelta(hours=rng.randint(0, 8760))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'thumbnails': {q: {'url': f'https://i.ytimg.com/vi/vid{i}/{q}.jpg'}
+                               for q in rng.sample(['maxres', 'high', 'medium', 'default'], 2)},
+                'tags': rng.sample(WORDS, 8),
+                'categoryId': '27',
+                'defaultLanguage': 'en',
+            },
+            'statistics': {'viewCount': str(rng.randint(100, 10**6)), 'likeCount': str(rng.randint(0, 10**4)),
+                           'commentCount': str(rng.randint(0, 2000))},
+            'contentDetails': {'duration': duration, 'caption': rng.choice(['true', 'false'])},
+        })
+    return items
+
+def sentiment_results(count=50):
+    """Per-comment NLU responses for features sentiment+emotion; roughly 5% failures (None)."""
+    rng = random.Random(SEED)
+    results = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            results.append(None)
+            continue
+        results.append({
+            'sentiment': {'document': {'label': rng.choice(['positive', 'positive', 'neutral', 'negative']),
+                                       'score': rng.uniform(-1, 1)}},
+            'emotion': {'document': {'emotion': {e: rng.random() for e in
+                                                 ('sadness', 'joy', 'fear', 'disgust', 'anger')}}},
+        })
+    return results
+
+def theme_results(count=80):
+    """Per-comment NLU responses for features concepts+entities."""
+    rng = random.Random(SEED)
+    return [{
+        'concepts': [{'text': rng.choice(WORDS), 'relevance': rng.random()} for _ in range(3)],
+        'entities': [{'text': rng.choice(WORDS), 'relevance': rng.random()} for _ in range(rng.randint(0, 3))],
+    } for _ in range(count)]
+
+
+@contextlib.contextmanager
+def populated_database(users=50, analyses_per_user=200, videos_per_user=50):
+    """
+    Pushes an app context backed by a throwaway SQLite file filled with
+    deterministic users, analyses and cached videos. BENCH_USER_ID (the first
+    user added, after the demo user) is the benchmark user.
+    """
+    from config import Config
+    from app import create_app, database
+    from app.services import build_video_record
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    class BenchConfig(Config):
+        TESTING = True
+        DATABASE = db_path
+        BCRYPT_ROUNDS = 4
+        METRICS_ENABLED = False
+
+    app = create_app(BenchConfig)
+    rng = random.Random(SEED)
+    types = ['sentiment', 'theme_cluster', 'competitor', 'script', 'calendar']
+    videos = [build_video_record(item) for item in video_items(videos_per_user)]
+    try:
+        with app.app_context():
+            database.init_db()
+            db = database.get_db()
+            for u in range(users):
+                user_id = db.execute('INSERT INTO users (email, password_hash) VALUES (?, ?)',
+                                     (f'bench{u}@alice.io', b'x')).lastrowid
+                for a in range(analyses_per_user):
+                    video_id = f'vid{rng.randint(0, videos_per_user - 1):08d}'
+                    created_at = datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 500000))
+                    db.execute(
+                        'INSERT INTO analyses (user_id, type, video_url, video_id, title, data, metadata, created_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (user_id, rng.choice(types), None, video_id, f'Analysis {a}',
+                         '{"sentiment_data": {"positive": 10, "neutral": 5, "negative": 1}}', '{}',
+                         created_at.strftime('%Y-%m-%d %H:%M:%S'))
+                    )
+            db.commit()
+            database.cache_user_videos(BENCH_USER_ID, videos)
+            # A fresh analysis so cache lookups hit
+            database.save_analysis_data(BENCH_USER_ID, 'sentiment', None, 'vid00000000', 'Fresh', {'ok': True}, {})
+            yield
+    finally:
+        os.remove(db_path)
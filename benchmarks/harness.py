@@ -0,0 +1,188 @@
+# File: benchmarks/harness.py
+# Registration, timing, statistics and comparison for the micro-benchmarks.
+
+import gc
+import json
+import math
+import time
+import platform
+import subprocess
+import statistics
+import contextlib
+from datetime import datetime, timezone
+
+BENCHMARKS = {}  # name -> (fn, context factory or None)
+
+
+def benchmark(name, context=None):
+    """
+    Registers a zero-argument function that performs one unit of work.
+    `context` is an optional context-manager factory entered once around all
+    benchmarks that share it (e.g. an app context with a populated database).
+    """
+    def decorator(fn):
+        BENCHMARKS[name] = (fn, context)
+        return fn
+    return decorator
+
+
+# --- Timing ---
+def _time_loops(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+def _calibrate(fn, min_time):
+    """Finds a loop count that makes one repetition last at least min_time seconds."""
+    number = 1
+    while number < 1_000_000:
+        if _time_loops(fn, number) >= min_time:
+            break
+        number *= 2
+    return number
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lower, upper = math.floor(k), math.ceil(k)
+    if lower == upper:
+        return sorted_values[int(k)]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+def measure(fn, repeat=30, warmup=3, min_time=0.01):
+    """
+    Times fn with garbage collection paused, the way timeit does.
+    Each of the `repeat` samples is the mean per-call time over `number` loops.
+    """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = _calibrate(fn, min_time)
+        for _ in range(warmup):
+            _time_loops(fn, number)
+        samples = [_time_loops(fn, number) / number for _ in range(repeat)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    ordered = sorted(samples)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+        'samples': samples,
+    }
+
+
+# --- Running ---
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'git_commit': commit,
+    }
+
+def run_benchmarks(name_filter=None, repeat=30, warmup=3, min_time=0.01, progress=print):
+    """Runs every registered benchmark (optionally filtered by substring) and returns the report."""
+    selected = {n: b for n, b in sorted(BENCHMARKS.items()) if not name_filter or name_filter in n}
+
+    # Group by context so each expensive fixture is built only once
+    groups = {}
+    for name, (fn, context) in selected.items():
+        groups.setdefault(context, []).append((name, fn))
+
+    results = {}
+    for context, entries in groups.items():
+        with (context() if context else contextlib.nullcontext()):
+            for name, fn in entries:
+                stats = measure(fn, repeat=repeat, warmup=warmup, min_time=min_time)
+                results[name] = stats
+                progress(f"{name:<45} p50 {format_seconds(stats['p50']):>10}  "
+                         f"p95 {format_seconds(stats['p95']):>10}  (x{stats['number']})")
+
+    return {'environment': _environment(), 'config': {'repeat': repeat, 'warmup': warmup, 'min_time': min_time},
+            'results': results}
+
+def save_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- Comparison ---
+def mann_whitney_p(a, b):
+    """
+    Two-sided p-value of the Mann-Whitney U test (normal approximation with
+    average ranks for ties). Distribution-free, so it suits skewed timing samples.
+    """
+    n1, n2 = len(a), len(b)
+    if n1 < 2 or n2 < 2:
+        return 1.0
+    combined = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    ranks = [0.0] * len(combined)
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        average_rank = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            ranks[k] = average_rank
+        i = j + 1
+    rank_sum_a = sum(r for r, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    mean_u = n1 * n2 / 2
+    sigma_u = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    if sigma_u == 0:
+        return 1.0
+    z = abs(u - mean_u) / sigma_u
+    return math.erfc(z / math.sqrt(2))
+
+def compare_reports(baseline, candidate, threshold=0.10, alpha=0.05):
+    """
+    Compares medians benchmark by benchmark. A change is only reported when it
+    exceeds `threshold` (relative) AND the samples differ significantly at `alpha`.
+    """
+    rows = []
+    base_results, new_results = baseline['results'], candidate['results']
+    for name in sorted(set(base_results) | set(new_results)):
+        if name not in base_results or name not in new_results:
+            rows.append({'name': name, 'status': 'added' if name in new_results else 'removed'})
+            continue
+        base, new = base_results[name], new_results[name]
+        ratio = new['p50'] / base['p50'] if base['p50'] else float('inf')
+        p_value = mann_whitney_p(base.get('samples', []), new.get('samples', []))
+        status = 'unchanged'
+        if p_value < alpha and ratio > 1 + threshold:
+            status = 'regression'
+        elif p_value < alpha and ratio < 1 - threshold:
+            status = 'improvement'
+        rows.append({'name': name, 'status': status, 'baseline_p50': base['p50'],
+                     'candidate_p50': new['p50'], 'ratio': ratio, 'p_value': p_value})
+    return rows
+
+def format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.1f}ns"
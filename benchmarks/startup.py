@@ -0,0 +1,71 @@
+# File: benchmarks/startup.py
+# Cold-start report: runs `python -X importtime` on a fresh interpreter that
+# imports the app and calls create_app(), then checks the total against a budget
+# and that heavy dependencies stay out of the startup path.
+
+import os
+import re
+import sys
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Imported on first use by the services; pulling one in at startup is a regression.
+DEFERRED_MODULES = ('googleapiclient.discovery', 'googleapiclient.errors', 'requests', 'multiprocessing', 'numpy')
+
+_STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+from config import TestingConfig
+from app import create_app
+create_app(TestingConfig)
+print('create_app_ms=%.3f' % ((time.perf_counter() - start) * 1000))
+"""
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def parse_importtime(stderr):
+    """Returns [(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+def measure_startup(python=sys.executable):
+    """Runs one cold start in a subprocess and returns its wall time and import table."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1', METRICS_ENABLED='false')
+    result = subprocess.run([python, '-X', 'importtime', '-c', _STARTUP_SCRIPT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(f"create_app() failed:\n{result.stderr[-2000:]}")
+    create_app_ms = float(re.search(r'create_app_ms=([\d.]+)', result.stdout).group(1))
+    return {'create_app_ms': create_app_ms, 'imports': parse_importtime(result.stderr)}
+
+def check_startup(budget_ms, runs=5, top=15, progress=print):
+    """
+    Reports the slowest top-level imports of the best of `runs` cold starts and
+    returns a list of problems: over budget, or a deferred module imported eagerly.
+    """
+    samples = [measure_startup() for _ in range(runs)]
+    best = min(samples, key=lambda s: s['create_app_ms'])
+    imports = best['imports']
+
+    progress(f"create_app() cold start: best {best['create_app_ms']:.1f}ms of {runs} "
+             f"(worst {max(s['create_app_ms'] for s in samples):.1f}ms), budget {budget_ms:.0f}ms")
+    progress(f"\n{'cumulative ms':>14}{'self ms':>10}  top-level import")
+    for module, self_us, cumulative_us, _ in sorted((r for r in imports if r[3] == 0),
+                                                    key=lambda r: r[2], reverse=True)[:top]:
+        progress(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {module}")
+
+    problems = []
+    if best['create_app_ms'] > budget_ms:
+        problems.append(f"create_app() took {best['create_app_ms']:.1f}ms, over the {budget_ms:.0f}ms budget")
+    loaded = {r[0] for r in imports}
+    for module in DEFERRED_MODULES:
+        if module in loaded:
+            problems.append(f"{module} is imported during startup but should load on first use")
+    return problems
@@ -11,10 +11,20 @@ class Config:
     # --- Flask Configuration ---
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-in-production'
     DATABASE = os.environ.get('DATABASE_PATH') or 'alice_insight.db'
-    DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
+    # Pending schema migrations (app/migrations.py) are applied when the app is created
+    MIGRATE_ON_STARTUP = os.environ.get('MIGRATE_ON_STARTUP', 'True').lower() == 'true'
+    MIGRATION_BUSY_TIMEOUT_SECONDS = 30  # How long a migration step waits for other writers
+    DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     HOST = os.environ.get('FLASK_HOST', '0.0.0.0')
     PORT = int(os.environ.get('FLASK_PORT', 5001))
     
+    # --- Production Server (serve.py) ---
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 0)) or os.cpu_count() or 1
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 8))  # Request threads per worker
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 1000))  # Recycle a worker after this many; 0 = never
+    SERVER_MAX_REQUESTS_JITTER = int(os.environ.get('SERVER_MAX_REQUESTS_JITTER', 100))  # Staggers recycling
+    SERVER_GRACEFUL_TIMEOUT = 30  # Seconds a stopping worker gets to finish in-flight requests
+    
     # --- YouTube Data API v3 Configuration ---
     # CRITICAL: This is required for real video data functionality
     YOUTUBE_API_KEY = os.environ.get('YOUTUBE_API_KEY')
@@ -22,6 +32,8 @@ class Config:
     # YouTube API settings
     YOUTUBE_API_VERSION = 'v3'
     YOUTUBE_API_SERVICE_NAME = 'youtube'
+    # Override the API host, e.g. to point at the load-test stand-in server
+    YOUTUBE_API_URL = os.environ.get('YOUTUBE_API_URL')
     
     # --- IBM Watson NLU Configuration ---
     IBM_NLU_API_KEY = os.environ.get('IBM_NLU_API_KEY')
@@ -33,17 +45,132 @@ class Config:
     IBM_WATSONX_PROJECT_ID = os.environ.get('IBM_WATSONX_PROJECT_ID')
     IBM_WATSONX_URL = os.environ.get('IBM_WATSONX_URL', 'https://us-south.ml.cloud.ibm.com')
     
+    # Live generation is opt-in; without it the script helper uses its template
+    IBM_WATSONX_ENABLED = os.environ.get('IBM_WATSONX_ENABLED', 'False').lower() == 'true'
+    IBM_WATSONX_VERSION = '2023-05-29'
+    IBM_IAM_URL = os.environ.get('IBM_IAM_URL', 'https://iam.cloud.ibm.com/identity/token')
+    IAM_TOKEN_REFRESH_FRACTION = 0.8  # Renew once this much of a token's expires_in has passed
+    IAM_TOKEN_MIN_VALIDITY_SECONDS = 60  # Never send a token this close to expiry
+    IAM_TOKEN_RETRY_SECONDS = 30  # Between background refresh attempts after a failure
+    
+    # --- Outbound HTTP (IBM NLU / watsonx) ---
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 20))  # Keep-alive connections per host
+    HTTP_CONNECT_TIMEOUT = 5
+    HTTP_MAX_RETRIES = 3  # Retries on connection errors, 429 and 5xx
+    HTTP_BACKOFF_BASE = 0.5  # Seconds; doubled per attempt with full jitter
+    HTTP_BACKOFF_MAX = 8.0
+    HTTP_DEADLINE_SECONDS = 45  # Cap on one call's attempts and backoff together
+    YOUTUBE_TIMEOUT = 20  # Socket timeout of YouTube Data API calls, which are not retried
+    IBM_NLU_TIMEOUT = 20
+    IBM_WATSONX_TIMEOUT = 30
+    
+    # --- Circuit Breakers (YouTube / NLU / watsonx) ---
+    CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failed attempts (each retry counts) before failing fast
+    CIRCUIT_SLOW_CALL_SECONDS = 10  # Calls slower than this count as failures
+    CIRCUIT_RESET_SECONDS = 30  # How long to stay open before a half-open probe
+    CIRCUIT_HALF_OPEN_CALLS = 1
+    
     # --- Application Settings ---
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file upload
     
+    # --- Password Hashing ---
+    # Leave BCRYPT_ROUNDS unset to calibrate the cost to BCRYPT_TARGET_MS on first use
+    BCRYPT_ROUNDS = int(os.environ['BCRYPT_ROUNDS']) if os.environ.get('BCRYPT_ROUNDS') else None
+    BCRYPT_TARGET_MS = int(os.environ.get('BCRYPT_TARGET_MS', 250))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 32))
+    PASSWORD_HASH_TIMEOUT = 10  # Seconds to wait for a hashing worker
+    
     # Rate limiting for API calls
     YOUTUBE_API_QUOTA_LIMIT = 10000  # Daily quota limit
     RATE_LIMIT_ENABLED = True
     
+    # Per-user limits for expensive endpoints, keyed by Flask endpoint name.
+    # 'cost' is charged against 'daily_cost' per request, in upstream call units; requests
+    # rejected as invalid and those answered from the analysis cache are not charged.
+    RATE_LIMITS = {
+        'routes.analyze_sentiment': {'per_minute': 5, 'daily_cost': 2500, 'cost': 51},
+        'routes.cluster_themes': {'per_minute': 5, 'daily_cost': 2500, 'cost': 81},
+        'routes.analyze_transcript': {'per_minute': 2, 'daily_cost': 2500, 'cost': 201},  # up to TRANSCRIPT_MAX_WINDOWS + captions
+        'routes.analyze_competitors': {'per_minute': 3, 'daily_cost': 200},  # cost = channels requested
+    }
+    
+    # Near-duplicate comments (spam, "first!" variants, bot replies) are analyzed once and weighted
+    COMMENT_DEDUP_ENABLED = os.environ.get('COMMENT_DEDUP_ENABLED', 'True').lower() == 'true'
+    COMMENT_DEDUP_THRESHOLD = 0.8  # Jaccard similarity of 5-character shingles
+    
+    # /api/analyses?format=csv|ndjson reads the history this many rows at a time
+    ANALYSIS_EXPORT_PAGE_SIZE = 500
+    
+    # The smart calendar schedules YouTube posts from the channel's own publish times once
+    # this many videos are in its cached catalog (filled whenever the catalog is fetched)
+    POSTING_PROFILE_MIN_VIDEOS = 5
+    
+    # Generated scripts are reused for the same normalized prompt, model and parameters,
+    # and, with GENERATION_CACHE_SIMILARITY set, for near-identical topics with the same
+    # numbers ("python tips" / "Python Tip!"); send no_cache to regenerate
+    GENERATION_CACHE_ENABLED = os.environ.get('GENERATION_CACHE_ENABLED', 'True').lower() == 'true'
+    GENERATION_CACHE_SIZE = 256  # Entries held in memory per process (LRU); all are kept in SQLite
+    GENERATION_CACHE_DAYS = 30
+    GENERATION_CACHE_SIMILARITY = None  # e.g. 0.85: Jaccard similarity of topic 3-character shingles; None = exact only
+    
+    # Expired sentiment analyses are refreshed from the comments posted since, unless
+    # more than this many arrived (then the video is re-analyzed from scratch)
+    INCREMENTAL_ANALYSIS_ENABLED = os.environ.get('INCREMENTAL_ANALYSIS_ENABLED', 'True').lower() == 'true'
+    INCREMENTAL_ANALYSIS_MAX_NEW_COMMENTS = 500
+    
+    # Cached analyses stay valid while the video's commentCount (one quota unit to look up)
+    # drifted less than the threshold; without a recorded count they expire after ANALYSIS_CACHE_HOURS
+    ANALYSIS_FRESHNESS_CHECK_ENABLED = os.environ.get('ANALYSIS_FRESHNESS_CHECK_ENABLED', 'True').lower() == 'true'
+    ANALYSIS_CACHE_HOURS = 24
+    ANALYSIS_FRESH_MINUTES = 15  # Younger analyses are served without a lookup
+    ANALYSIS_MAX_CACHE_HOURS = 24 * 7  # Older analyses are refreshed however quiet the video is
+    ANALYSIS_COMMENT_DRIFT_THRESHOLD = 0.05  # Fraction of the recorded commentCount
+    ANALYSIS_COMMENT_DRIFT_MIN = 5
+    
+    # Transcripts are stored once as compressed, time-indexed segments; analysis runs over
+    # NLU-sized windows of them, at most TRANSCRIPT_MAX_WINDOWS per video
+    TRANSCRIPT_PAGE_SEGMENTS = 300  # Default segments per /api/video-transcript response
+    TRANSCRIPT_WINDOW_CHARS = 1500
+    TRANSCRIPT_WINDOW_SECONDS = 120
+    TRANSCRIPT_MAX_WINDOWS = 200
+    TRANSCRIPT_ANALYSIS_BATCH = 20  # Windows analyzed (and held in memory) at a time
+    
+    # Off-peak prewarming of analyses for creators' newest uploads (python prewarm.py, or the in-process timer)
+    PREWARM_TIMER_ENABLED = os.environ.get('PREWARM_TIMER_ENABLED', 'False').lower() == 'true'
+    PREWARM_INTERVAL_MINUTES = 30
+    PREWARM_WINDOW_UTC = (2, 6)  # Start and end hour; a window may wrap past midnight, e.g. (22, 5)
+    PREWARM_VIDEOS_PER_CHANNEL = 5  # Newest uploads looked at per channel
+    PREWARM_MAX_VIDEO_AGE_DAYS = 14
+    PREWARM_DAILY_QUOTA_UNITS = int(os.environ.get('PREWARM_DAILY_QUOTA_UNITS', 2000))  # YouTube quota units
+    PREWARM_DAILY_NLU_CALLS = int(os.environ.get('PREWARM_DAILY_NLU_CALLS', 5000))
+    
+    # Retention of stored analyses (python maintain.py, e.g. nightly from cron). Per type, only the newest
+    # keep_latest rows of each (user, video) are kept, and rows older than max_age_days (None = no limit)
+    # are dropped; identical payloads of the same (user, video, type) are first collapsed into the newest.
+    # Scripts, calendars and competitor analyses have no video, so their limits apply per user.
+    ANALYSIS_RETENTION = {
+        'sentiment': {'keep_latest': 3, 'max_age_days': 180},
+        'theme_cluster': {'keep_latest': 3, 'max_age_days': 180},
+        'transcript': {'keep_latest': 2, 'max_age_days': 365},
+        'competitor': {'keep_latest': 20, 'max_age_days': 180},
+        'script': {'keep_latest': 200, 'max_age_days': None},
+        'calendar': {'keep_latest': 20, 'max_age_days': 365},
+    }
+    ANALYSIS_RETENTION_DEFAULT = {'keep_latest': 10, 'max_age_days': None}  # Types not listed above
+    MAINTENANCE_BATCH_SIZE = 500  # Rows scanned and deleted per transaction, so requests are never blocked for long
+    MAINTENANCE_VACUUM_PAGES = 2000  # Free pages returned to the filesystem per incremental_vacuum step
+    
     # Video caching settings
     VIDEO_CACHE_HOURS = 24  # How long to cache video data
     MAX_VIDEOS_PER_CHANNEL = 50  # Maximum videos to fetch per channel
     
+    # --- Metrics (/metrics, Prometheus text format) ---
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    # Set when running several worker processes so a scrape of any worker sees all of them
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_SECONDS = 10
+    
     # --- Logging Configuration ---
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_TO_FILE = os.environ.get('LOG_TO_FILE', 'False').lower() == 'true'
@@ -158,6 +285,9 @@ class TestingConfig(Config):
     YOUTUBE_API_KEY = 'test_key'
     IBM_NLU_API_KEY = 'test_key'
     
+    # Cheap hashes keep the test suite fast
+    BCRYPT_ROUNDS = 4
+    
     # Disable rate limiting for tests
     RATE_LIMIT_ENABLED = False
 
@@ -1,12 +1,19 @@
 # File: database_migration.py
-# Run this script to update your existing database with the new video caching functionality
+# Brings an existing database up to the current schema by applying the pending
+# versioned migrations in app/migrations.py (the app also does this at startup
+# unless MIGRATE_ON_STARTUP is off). Safe to run against a live database.
+#
+#   python database_migration.py                    # alice_insight.db
+#   python database_migration.py --db data.db --status
 
 import sqlite3
 import os
+import argparse
+from app import migrations
 
-def migrate_database(db_path='alice_insight.db'):
+def migrate_database(db_path='alice_insight.db', target=None):
     """
-    Migrate existing database to add video caching and ensure channel_id field exists.
+    Apply the pending migrations to an existing database, printing each timed step.
     """
     if not os.path.exists(db_path):
         print(f"Database {db_path} not found. Please run init_db.py first.")
@@ -15,60 +22,27 @@ def migrate_database(db_path='alice_insight.db'):
     print(f"Migrating database: {db_path}")
     
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Check if channel_id column exists in users table
-        cursor.execute("PRAGMA table_info(users)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        if 'channel_id' not in columns:
-            print("Adding channel_id column to users table...")
-            cursor.execute("ALTER TABLE users ADD COLUMN channel_id TEXT")
-            conn.commit()
-            print("✅ Added channel_id column")
-        else:
-            print("✅ channel_id column already exists")
-        
-        # Check if cached_videos table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='cached_videos'")
-        if not cursor.fetchone():
-            print("Creating cached_videos table...")
-            cursor.execute('''
-                CREATE TABLE cached_videos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    video_id TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    thumbnail_url TEXT,
-                    published_at TEXT,
-                    view_count INTEGER DEFAULT 0,
-                    like_count INTEGER DEFAULT 0,
-                    comment_count INTEGER DEFAULT 0,
-                    duration TEXT,
-                    has_captions BOOLEAN DEFAULT FALSE,
-                    cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-                    UNIQUE(user_id, video_id)
-                )
-            ''')
-            
-            # Create indexes for performance
-            cursor.execute("CREATE INDEX idx_cached_videos_user_id ON cached_videos(user_id)")
-            cursor.execute("CREATE INDEX idx_cached_videos_cached_at ON cached_videos(cached_at)")
-            
-            conn.commit()
-            print("✅ Created cached_videos table with indexes")
+        report = migrations.migrate(db_path, target=target)
+        if report is None:
+            print(f"Database {db_path} has no tables. Please run init_db.py first.")
+            return False
+        for step in report['steps']:
+            print(f"✅ [{step['version']}] {step['step']} ({step['seconds']:.3f}s)")
+        if report['steps']:
+            print(f"✅ Schema version {report['from_version']} -> {report['to_version']}")
         else:
-            print("✅ cached_videos table already exists")
+            print(f"✅ Schema version {report['to_version']} is up to date")
         
-        # Add indexes that might be missing
-        try:
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_channel_id ON users(channel_id)")
-            conn.commit()
-            print("✅ Ensured channel_id index exists")
-        except sqlite3.Error as e:
-            print(f"Note: Channel ID index may already exist: {e}")
+        # Maintenance returns freed pages with incremental_vacuum, which needs this mode;
+        # switching an existing database takes one full VACUUM, so it is left out of the startup migrations
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] != 2:
+            print("Enabling incremental auto-vacuum (one full VACUUM, may take a while)...")
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+        print("✅ Ensured incremental auto-vacuum is enabled")
         
         print("\n🎉 Database migration completed successfully!")
         print("\nNext steps:")
@@ -87,6 +61,16 @@ def migrate_database(db_path='alice_insight.db'):
         print(f"❌ Unexpected error during migration: {e}")
         return False
 
+def print_status(db_path='alice_insight.db'):
+    """
+    Show the database's schema version and the migrations still to apply.
+    """
+    conn = sqlite3.connect(db_path)
+    print(f"{db_path}: schema version {migrations.schema_version(conn)} of {migrations.SCHEMA_VERSION}")
+    for migration in migrations.pending(conn):
+        print(f"  pending [{migration.version}] {migration.name} ({len(migration.steps)} steps)")
+    conn.close()
+
 def verify_migration(db_path='alice_insight.db'):
     """
     Verify that the migration was successful.
@@ -142,12 +126,22 @@ def verify_migration(db_path='alice_insight.db'):
         return False
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply pending schema migrations')
+    parser.add_argument('--db', default='alice_insight.db', help='Database file (default: alice_insight.db)')
+    parser.add_argument('--status', action='store_true', help='Only show the schema version and pending migrations')
+    parser.add_argument('--target', type=int, help='Stop after this schema version')
+    args = parser.parse_args()
+    
+    if args.status:
+        print_status(args.db)
+        raise SystemExit(0)
+    
     # Run the migration
-    success = migrate_database()
+    success = migrate_database(args.db, args.target)
     
     if success:
         # Verify the migration
-        verify_migration()
+        verify_migration(args.db)
         
         print("\n" + "="*50)
         print("MIGRATION COMPLETE!")
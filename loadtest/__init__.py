@@ -0,0 +1,3 @@
+# File: loadtest/__init__.py
+# End-to-end load testing against local stand-ins for YouTube and IBM NLU,
+# so no real API quota is spent. See __main__.py for usage.
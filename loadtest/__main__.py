@@ -0,0 +1,251 @@
+# File: loadtest/__main__.py
+# Drives the app at a target request rate and reports throughput, latency
+# percentiles and error rates per scenario.
+#
+#   python -m loadtest --rps 20 --duration 60                  # self-contained run
+#   python -m loadtest --target http://127.0.0.1:5001 --rps 5  # app already pointed at the fakes
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from .fake_upstreams import (start_fake_upstreams, add_settings_arguments, settings_from_args, video_id_for)
+
+PASSWORD = 'loadtest-password'
+DEFAULT_MIX = 'login=1,my_videos=5,sentiment=3,themes=1,competitors=1'
+
+
+# --- App Under Test ---
+def start_local_app(youtube_url, nlu_url, rate_limit):
+    """Runs the app on a threaded local server, configured to use the fake upstreams."""
+    from werkzeug.serving import make_server
+    from config import Config
+    from app import create_app, database
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    class LoadTestConfig(Config):
+        DEBUG = False
+        DATABASE = db_path
+        YOUTUBE_API_KEY = 'loadtest'
+        YOUTUBE_API_URL = youtube_url
+        IBM_NLU_API_KEY = 'loadtest'
+        IBM_NLU_URL = nlu_url
+        RATE_LIMIT_ENABLED = rate_limit
+        BCRYPT_ROUNDS = 10
+
+    app = create_app(LoadTestConfig)
+    with app.app_context():
+        database.init_db()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop():
+        server.shutdown()
+        os.remove(db_path)
+
+    return f'http://127.0.0.1:{server.server_port}', stop
+
+
+# --- Virtual Users ---
+class VirtualUser:
+    def __init__(self, target, index):
+        self.target = target
+        self.index = index
+        self.email = f'loadtest{index}@alice.io'
+        self.cookies = None
+
+    def sign_in(self):
+        """Registers (linking fake channel @loadtest<N>) or logs in, keeping the session cookie."""
+        session = requests.Session()
+        response = session.post(f'{self.target}/auth/api/register', json={
+            'email': self.email, 'password': PASSWORD, 'confirm_password': PASSWORD,
+            'channel_url': f'https://youtube.com/@loadtest{self.index}'
+        }, timeout=60)
+        if response.status_code == 409:
+            response = session.post(f'{self.target}/auth/api/login',
+                                    json={'email': self.email, 'password': PASSWORD}, timeout=60)
+        if response.status_code >= 400:
+            raise RuntimeError(f"Could not sign in {self.email}: {response.status_code} {response.text[:200]}")
+        self.cookies = session.cookies.get_dict()
+
+
+_local = threading.local()
+
+def _session():
+    # One keep-alive session per load generator thread
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def _video_url(rng, channels, videos_per_channel):
+    video_id = video_id_for(rng.randrange(channels), rng.randrange(videos_per_channel))
+    return f'https://www.youtube.com/watch?v={video_id}'
+
+def build_scenarios(args):
+    def login(user, rng):
+        return _session().post(f'{user.target}/auth/api/login', json={'email': user.email, 'password': PASSWORD},
+                               timeout=args.timeout)
+
+    def my_videos(user, rng):
+        return _session().get(f'{user.target}/api/my-videos', cookies=user.cookies, timeout=args.timeout)
+
+    def sentiment(user, rng):
+        return _session().post(f'{user.target}/api/analyze-sentiment', cookies=user.cookies, timeout=args.timeout,
+                               json={'video_url': _video_url(rng, args.channels, args.videos_per_channel)})
+
+    def themes(user, rng):
+        return _session().post(f'{user.target}/api/cluster-themes', cookies=user.cookies, timeout=args.timeout,
+                               json={'video_url': _video_url(rng, args.channels, args.videos_per_channel)})
+
+    def competitors(user, rng):
+        urls = [f'https://youtube.com/@loadtest{rng.randrange(args.channels)}' for _ in range(3)]
+        return _session().post(f'{user.target}/api/analyze-competitors', cookies=user.cookies,
+                               timeout=args.timeout, json={'channel_urls': urls})
+
+    return {'login': login, 'my_videos': my_videos, 'sentiment': sentiment, 'themes': themes,
+            'competitors': competitors}
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+# --- Driving Load ---
+def run_load(users, scenarios, weights, rps, duration, concurrency, seed):
+    """
+    Open-loop generator: requests are scheduled at a fixed rate regardless of
+    how fast the app answers, and latency is measured from the scheduled
+    start, so queueing delay is not hidden (no coordinated omission).
+    """
+    rng = random.Random(seed)
+    names = [n for n in weights if n in scenarios]
+    name_weights = [weights[n] for n in names]
+    results = []
+    results_lock = threading.Lock()
+
+    def execute(name, user, scheduled_at, request_seed):
+        status, error = None, None
+        try:
+            response = scenarios[name](user, random.Random(request_seed))
+            status = response.status_code
+        except requests.exceptions.RequestException as e:
+            error = type(e).__name__
+        latency = time.perf_counter() - scheduled_at
+        with results_lock:
+            results.append((name, status, error, latency))
+
+    interval = 1.0 / rps
+    total = int(rps * duration)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            scheduled_at = start + i * interval
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            name = rng.choices(names, weights=name_weights)[0]
+            pool.submit(execute, name, rng.choice(users), scheduled_at, rng.random())
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(results, elapsed):
+    by_scenario = defaultdict(list)
+    for row in results:
+        by_scenario[row[0]].append(row)
+    by_scenario['ALL'] = list(results)
+
+    summary = {}
+    for name, rows in sorted(by_scenario.items()):
+        latencies = sorted(r[3] * 1000 for r in rows)
+        errors = sum(1 for r in rows if r[2] is not None or (r[1] or 0) >= 500)
+        client_errors = sum(1 for r in rows if r[1] is not None and 400 <= r[1] < 500)
+        summary[name] = {
+            'requests': len(rows),
+            'throughput_rps': len(rows) / elapsed if elapsed else 0.0,
+            'error_rate': errors / len(rows) if rows else 0.0,
+            'client_error_rate': client_errors / len(rows) if rows else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': latencies[-1] if latencies else 0.0,
+        }
+    return summary
+
+def print_summary(summary, elapsed):
+    print(f"\nCompleted in {elapsed:.1f}s")
+    print(f"{'scenario':<14}{'reqs':>7}{'rps':>8}{'err%':>8}{'4xx%':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in summary.items():
+        print(f"{name:<14}{s['requests']:>7}{s['throughput_rps']:>8.1f}{s['error_rate'] * 100:>8.1f}"
+              f"{s['client_error_rate'] * 100:>8.1f}{s['p50_ms']:>10.0f}{s['p95_ms']:>10.0f}{s['p99_ms']:>10.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description='Alice Insight load test')
+    parser.add_argument('--target', help='Base URL of a running app; omit to start one locally with fake upstreams')
+    parser.add_argument('--rps', type=float, default=10.0, help='Target request rate')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to generate load')
+    parser.add_argument('--users', type=int, default=10, help='Virtual users (each links channel @loadtest<N>)')
+    parser.add_argument('--concurrency', type=int, default=64, help='Maximum in-flight requests')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Scenario weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Per-request timeout in seconds')
+    parser.add_argument('--rate-limit', action='store_true', help='Keep per-user rate limiting enabled')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', '-o', help='Write the summary as JSON to this path')
+    add_settings_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.users > args.channels:
+        parser.error('--users cannot exceed --channels, each user links its own fake channel')
+
+    stops = []
+    try:
+        target = args.target
+        if not target:
+            youtube_url, nlu_url, stop_upstreams = start_fake_upstreams(settings_from_args(args))
+            stops.append(stop_upstreams)
+            target, stop_app = start_local_app(youtube_url, nlu_url, args.rate_limit)
+            stops.append(stop_app)
+            print(f"App at {target}, fake YouTube at {youtube_url}, fake NLU at {nlu_url}")
+
+        users = [VirtualUser(target, i) for i in range(args.users)]
+        for user in users:
+            user.sign_in()
+        print(f"Signed in {len(users)} users; driving {args.rps} rps for {args.duration}s ({args.mix})")
+
+        results, elapsed = run_load(users, build_scenarios(args), parse_mix(args.mix),
+                                    args.rps, args.duration, args.concurrency, args.seed)
+        summary = summarize(results, elapsed)
+        print_summary(summary, elapsed)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({'config': vars(args), 'elapsed_s': elapsed, 'scenarios': summary}, f, indent=2)
+    finally:
+        for stop in reversed(stops):
+            stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
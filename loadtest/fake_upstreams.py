@@ -0,0 +1,347 @@
+# File: loadtest/fake_upstreams.py
+# Local stand-ins for the YouTube Data API v3 endpoints the app uses and the
+# IBM NLU /v1/analyze endpoint, with configurable latency, errors and corpus size.
+# A watsonx.ai stand-in (IAM token, text generation and its SSE stream) is
+# started separately with start_fake_watsonx.
+#
+# Standalone: python -m loadtest.fake_upstreams --youtube-port 8081 --nlu-port 8082 --watsonx-port 8083
+# then start the app with YOUTUBE_API_URL=http://127.0.0.1:8081 IBM_NLU_URL=http://127.0.0.1:8082
+# (and the IBM_WATSONX_* / IBM_IAM_URL values it prints)
+
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+WORDS = ['great', 'video', 'tutorial', 'python', 'editing', 'camera', 'music', 'love', 'thanks', 'explained',
+         'subscribe', 'audio', 'lighting', 'tips', 'awesome', 'helpful', 'boring', 'confusing', 'amazing', 'quality']
+EMOTIONS = ('sadness', 'joy', 'fear', 'disgust', 'anger')
+
+
+@dataclass
+class UpstreamSettings:
+    latency_ms: float = 50.0        # Mean added latency per request
+    latency_jitter_ms: float = 20.0  # Standard deviation of the added latency
+    error_rate: float = 0.0          # Fraction of requests answered with a 503
+    channels: int = 100              # Channels resolvable as @loadtest<N>
+    videos_per_channel: int = 50
+    comments_per_video: int = 100
+    caption_cues: int = 600          # SRT cues per video transcript (about 3 seconds each)
+    generated_tokens: int = 200      # Tokens per watsonx generation
+    token_ms: float = 20.0           # Delay between generated tokens
+
+
+def video_id_for(channel: int, index: int) -> str:
+    """11-character ids, so they pass extract_video_id."""
+    return f'v{channel:05d}{index:05d}'
+
+def channel_id_for(channel: int) -> str:
+    return f'UCloadtest{channel:014d}'
+
+def _srt_time(ms: int) -> str:
+    return f'{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}'
+
+def _rng(*parts) -> random.Random:
+    """Deterministic RNG per resource, so repeated requests see the same data."""
+    return random.Random(zlib.crc32('|'.join(map(str, parts)).encode()))
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    settings = UpstreamSettings()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        self._send_text(status, json.dumps(payload), 'application/json')
+
+    def _send_text(self, status, text, content_type):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate_upstream(self) -> bool:
+        """Sleeps for the configured latency; returns False if this request should fail."""
+        settings = self.settings
+        delay = random.gauss(settings.latency_ms, settings.latency_jitter_ms) / 1000
+        if delay > 0:
+            time.sleep(delay)
+        if settings.error_rate and random.random() < settings.error_rate:
+            self._send_json(503, {'error': {'code': 503, 'message': 'Simulated outage',
+                                            'errors': [{'reason': 'backendError'}]}})
+            return False
+        return True
+
+
+class FakeYouTubeHandler(_FakeHandler):
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        if not self._simulate_upstream():
+            return
+        resource = parsed.path.rstrip('/').split('/youtube/v3/', 1)[-1]
+        if resource.startswith('captions/'):
+            self._send_text(200, self._caption_file(resource.split('/', 1)[1]), 'application/x-subrip')
+            return
+        handler = {
+            'commentThreads': self._comment_threads,
+            'videos': self._videos,
+            'channels': self._channels,
+            'playlistItems': self._playlist_items,
+            'captions': self._captions,
+        }.get(resource)
+        if handler is None:
+            self._send_json(404, {'error': {'code': 404, 'errors': [{'reason': 'notFound'}]}})
+            return
+        self._send_json(200, handler(query))
+
+    def _comment_threads(self, query):
+        """
+        Comment i of a video is posted 3 hours after comment i-1, so raising
+        comments_per_video while running simulates new activity. Supports
+        order=time (newest first) and pageToken pagination.
+        """
+        video_id = query.get('videoId', '')
+        rng = _rng('comments', video_id)
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        comments = []
+        for i in range(self.settings.comments_per_video):
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 30)))
+            published = start + timedelta(hours=3 * i, minutes=rng.randint(0, 179))
+            comments.append({'id': f'{video_id}c{i}', 'snippet': {'topLevelComment': {'snippet': {
+                'textDisplay': text, 'authorDisplayName': f'viewer{rng.randint(1, 5000)}',
+                'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ')}}}})
+        if query.get('order') == 'time':
+            comments.reverse()
+
+        offset = int(query.get('pageToken') or 0)
+        count = min(int(query.get('maxResults', 20)), 100)
+        response = {'items': comments[offset:offset + count]}
+        if offset + count < len(comments):
+            response['nextPageToken'] = str(offset + count)
+        return response
+
+    def _videos(self, query):
+        items = []
+        for video_id in filter(None, query.get('id', '').split(',')):
+            rng = _rng('video', video_id)
+            items.append({
+                'id': video_id,
+                'snippet': {'title': f'Load test video {video_id}', 'description': 'Generated.',
+                            'publishedAt': f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z',
+                            'thumbnails': {'high': {'url': f'https://i.ytimg.com/vi/{video_id}/hqdefault.jpg'}},
+                            'tags': rng.sample(WORDS, 3), 'categoryId': '27'},
+                'statistics': {'viewCount': str(rng.randint(100, 10**6)), 'likeCount': str(rng.randint(0, 10**4)),
+                               'commentCount': str(self.settings.comments_per_video)},
+                'contentDetails': {'duration': f'PT{rng.randint(1, 59)}M{rng.randint(0, 59)}S',
+                                   'caption': rng.choice(['true', 'false'])},
+            })
+        return {'items': items}
+
+    def _channels(self, query):
+        handle = query.get('forHandle') or query.get('forUsername') or ''
+        channel_id = query.get('id', '')
+        number = None
+        if handle.lstrip('@').startswith('loadtest'):
+            number = handle.lstrip('@')[len('loadtest'):]
+        elif channel_id.startswith('UCloadtest'):
+            number = channel_id[len('UCloadtest'):]
+        if not number or not number.isdigit() or int(number) >= self.settings.channels:
+            return {'items': []}
+        channel = int(number)
+        rng = _rng('channel', channel)
+        return {'items': [{
+            'id': channel_id_for(channel),
+            'snippet': {'title': f'Load Test Channel {channel}', 'description': 'Generated channel.',
+                        'customUrl': f'@loadtest{channel}', 'publishedAt': '2020-01-01T00:00:00Z',
+                        'thumbnails': {'high': {'url': 'https://yt3.ggpht.com/loadtest.jpg'}}},
+            'statistics': {'subscriberCount': str(rng.randint(1000, 10**6)), 'videoCount': str(self.settings.videos_per_channel),
+                           'viewCount': str(rng.randint(10**5, 10**8))},
+            'contentDetails': {'relatedPlaylists': {'uploads': f'UU{channel:05d}'}},
+        }]}
+
+    def _playlist_items(self, query):
+        playlist_id = query.get('playlistId', '')
+        if not playlist_id.startswith('UU') or not playlist_id[2:].isdigit():
+            return {'items': []}
+        channel = int(playlist_id[2:])
+        count = min(int(query.get('maxResults', 5)), self.settings.videos_per_channel)
+        return {'items': [{'snippet': {'resourceId': {'videoId': video_id_for(channel, i)}}} for i in range(count)]}
+
+    def _captions(self, query):
+        video_id = query.get('videoId', '')
+        return {'items': [{'id': f'{video_id}-en', 'snippet': {'videoId': video_id, 'language': 'en',
+                                                              'trackKind': 'asr'}}]}
+
+    def _caption_file(self, caption_id):
+        """An SRT transcript of `caption_cues` cues, three seconds each."""
+        rng = _rng('captions', caption_id)
+        cues = []
+        for i in range(self.settings.caption_cues):
+            start, end = i * 3000, i * 3000 + 2800
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+            cues.append(f'{i + 1}\n{_srt_time(start)} --> {_srt_time(end)}\n{text}\n')
+        return '\n'.join(cues)
+
+
+class FakeNLUHandler(_FakeHandler):
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if not urlparse(self.path).path.endswith('/v1/analyze'):
+            self._send_json(404, {'error': 'Not found', 'code': 404})
+            return
+        if not self._simulate_upstream():
+            return
+        text = payload.get('text', '')
+        features = payload.get('features', {})
+        rng = _rng('nlu', text)
+        result = {'language': 'en', 'usage': {'text_units': 1, 'features': len(features)}}
+        if 'sentiment' in features:
+            score = rng.uniform(-1, 1)
+            label = 'positive' if score > 0.25 else 'negative' if score < -0.25 else 'neutral'
+            result['sentiment'] = {'document': {'score': score, 'label': label}}
+        if 'emotion' in features:
+            result['emotion'] = {'document': {'emotion': {e: rng.random() for e in EMOTIONS}}}
+        words = [w for w in text.split() if w in WORDS] or WORDS[:1]
+        if 'concepts' in features:
+            limit = features['concepts'].get('limit', 3)
+            result['concepts'] = [{'text': w, 'relevance': rng.random()} for w in rng.sample(words, min(limit, len(words)))]
+        if 'entities' in features:
+            limit = features['entities'].get('limit', 3)
+            result['entities'] = [{'type': 'Keyword', 'text': w, 'relevance': rng.random(), 'count': 1}
+                                  for w in rng.sample(words, min(limit, len(words)))]
+        self._send_json(200, result)
+
+
+class FakeWatsonxHandler(_FakeHandler):
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        path = urlparse(self.path).path
+        if path == '/identity/token':
+            self._send_json(200, {'access_token': 'fake-token', 'token_type': 'Bearer', 'expires_in': 3600})
+            return
+        if path not in ('/ml/v1/text/generation', '/ml/v1/text/generation_stream'):
+            self._send_json(404, {'errors': [{'code': 'not_found', 'message': 'Not found'}]})
+            return
+        if not self._simulate_upstream():
+            return
+        payload = json.loads(body or b'{}')
+        rng = _rng('watsonx', payload.get('input', ''))
+        limit = min(self.settings.generated_tokens, payload.get('parameters', {}).get('max_new_tokens', 500))
+        tokens = [(' ' if i else '') + rng.choice(WORDS) for i in range(limit)]
+        if path.endswith('_stream'):
+            self._stream(payload, tokens)
+        else:
+            time.sleep(self.settings.token_ms * len(tokens) / 1000)
+            self._send_json(200, {'model_id': payload.get('model_id'),
+                                  'results': [{'generated_text': ''.join(tokens), 'generated_token_count': len(tokens),
+                                               'stop_reason': 'max_tokens'}]})
+
+    def _stream(self, payload, tokens):
+        """Server-sent events, one `message` per token, like text/generation_stream."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        for i, token in enumerate(tokens):
+            time.sleep(self.settings.token_ms / 1000)
+            result = {'generated_text': token, 'generated_token_count': i + 1,
+                      'stop_reason': 'max_tokens' if i == len(tokens) - 1 else 'not_finished'}
+            event = {'model_id': payload.get('model_id'), 'results': [result]}
+            self.wfile.write(f'id: {i + 1}\nevent: message\ndata: {json.dumps(event)}\n\n'.encode('utf-8'))
+            self.wfile.flush()
+
+
+def _serve(handler_class, settings, host, port):
+    handler = type(handler_class.__name__, (handler_class,), {'settings': settings})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_fake_upstreams(settings=None, host='127.0.0.1', youtube_port=0, nlu_port=0):
+    """
+    Starts both stand-in servers on background threads.
+    Returns (youtube_url, nlu_url, stop) where stop() shuts both down.
+    """
+    settings = settings or UpstreamSettings()
+    youtube = _serve(FakeYouTubeHandler, settings, host, youtube_port)
+    nlu = _serve(FakeNLUHandler, settings, host, nlu_port)
+
+    def stop():
+        for server in (youtube, nlu):
+            server.shutdown()
+            server.server_close()
+
+    return (f'http://{host}:{youtube.server_port}', f'http://{host}:{nlu.server_port}', stop)
+
+def start_fake_watsonx(settings=None, host='127.0.0.1', port=0):
+    """
+    Starts the watsonx.ai stand-in on a background thread. Returns (url, stop);
+    point IBM_WATSONX_URL at url and IBM_IAM_URL at url + '/identity/token'.
+    """
+    server = _serve(FakeWatsonxHandler, settings or UpstreamSettings(), host, port)
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+
+    return f'http://{host}:{server.server_port}', stop
+
+def add_settings_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Mean upstream latency')
+    parser.add_argument('--latency-jitter-ms', type=float, default=20.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of upstream calls failing with 503')
+    parser.add_argument('--channels', type=int, default=100)
+    parser.add_argument('--videos-per-channel', type=int, default=50)
+    parser.add_argument('--comments-per-video', type=int, default=100)
+    parser.add_argument('--caption-cues', type=int, default=600)
+    parser.add_argument('--generated-tokens', type=int, default=200, help='Tokens per watsonx generation')
+    parser.add_argument('--token-ms', type=float, default=20.0, help='Delay between generated tokens')
+
+def settings_from_args(args) -> UpstreamSettings:
+    return UpstreamSettings(latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms,
+                            error_rate=args.error_rate, channels=args.channels,
+                            videos_per_channel=args.videos_per_channel, comments_per_video=args.comments_per_video,
+                            caption_cues=args.caption_cues, generated_tokens=args.generated_tokens,
+                            token_ms=args.token_ms)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake YouTube Data API and IBM NLU servers')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--youtube-port', type=int, default=8081)
+    parser.add_argument('--nlu-port', type=int, default=8082)
+    parser.add_argument('--watsonx-port', type=int, default=8083)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+    settings = settings_from_args(args)
+    youtube_url, nlu_url, stop = start_fake_upstreams(settings, args.host, args.youtube_port, args.nlu_port)
+    watsonx_url, stop_watsonx = start_fake_watsonx(settings, args.host, args.watsonx_port)
+    print(f"YOUTUBE_API_URL={youtube_url}")
+    print(f"IBM_NLU_URL={nlu_url}")
+    print(f"IBM_WATSONX_URL={watsonx_url}")
+    print(f"IBM_IAM_URL={watsonx_url}/identity/token")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stop()
+        stop_watsonx()
@@ -0,0 +1,30 @@
+# File: maintain.py
+# Applies analysis retention and compacts the database (see app/maintenance.py).
+# Meant for cron during off-peak hours; prints a JSON report of the run.
+#
+#   python maintain.py                # retention, incremental vacuum, ANALYZE
+#   python maintain.py --dry-run      # only count the analyses that would be deleted
+import sys
+import json
+import argparse
+from config import Config, config as configs
+from app import create_app
+from app.maintenance import run_maintenance
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply analysis retention and compact the database')
+    parser.add_argument('--config', choices=sorted(configs), help='Configuration to load (default: Config)')
+    parser.add_argument('--dry-run', action='store_true', help='Count the analyses that would be deleted without deleting them')
+    parser.add_argument('--no-vacuum', action='store_true', help='Leave freed pages in the file for SQLite to reuse')
+    args = parser.parse_args(argv)
+
+    app = create_app(configs[args.config] if args.config else Config)
+    with app.app_context():
+        summary = run_maintenance(dry_run=args.dry_run, vacuum=not args.no_vacuum)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,31 @@
+# File: prewarm.py
+# Precomputes analyses of verified creators' newest uploads (see app/prewarm.py).
+# Meant for cron during off-peak hours; stays within the daily PREWARM_* budgets.
+#
+#   python prewarm.py                 # does nothing outside PREWARM_WINDOW_UTC
+#   python prewarm.py --force --dry-run --user 3
+import sys
+import json
+import argparse
+from config import Config, config as configs
+from app import create_app
+from app.prewarm import run_prewarm
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prewarm analyses of recent uploads')
+    parser.add_argument('--config', choices=sorted(configs), help='Configuration to load (default: Config)')
+    parser.add_argument('--force', action='store_true', help='Run even outside the off-peak window')
+    parser.add_argument('--dry-run', action='store_true', help='Count the analyses that would run without running them')
+    parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only this user id (repeatable)')
+    args = parser.parse_args(argv)
+
+    app = create_app(configs[args.config] if args.config else Config)
+    with app.app_context():
+        summary = run_prewarm(force=args.force, dry_run=args.dry_run, user_ids=args.user_ids)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
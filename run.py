@@ -1,4 +1,5 @@
 # File: run.py
+# Development server. In production use serve.py (pre-forked workers, no debugger).
 import os
 from app import create_app, database
 
@@ -0,0 +1,59 @@
+# File: serve.py
+# Production entry point: a pre-forking, multi-threaded server with the app
+# preloaded in the master. Use run.py only for local development.
+#
+#   python serve.py                          # SERVER_WORKERS workers on FLASK_HOST:FLASK_PORT
+#   python serve.py --workers 4 --threads 8 --config production
+#
+# SIGTERM/SIGINT stop gracefully. SIGHUP only recycles the workers: they fork
+# from the already-loaded master, so code or config changes need a restart.
+import os
+import sys
+import argparse
+from config import Config, config as configs
+from app import create_app, database
+from app.server import PreforkServer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Alice Insight Suite production server')
+    parser.add_argument('--config', choices=sorted(configs), help='Configuration to load (default: Config)')
+    parser.add_argument('--host', help='Interface to bind (default: FLASK_HOST)')
+    parser.add_argument('--port', type=int, help='Port to bind (default: FLASK_PORT)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: SERVER_WORKERS, the core count)')
+    parser.add_argument('--threads', type=int, help='Request threads per worker (default: SERVER_THREADS)')
+    parser.add_argument('--max-requests', type=int, help='Recycle a worker after this many requests, 0 = never')
+    args = parser.parse_args(argv)
+
+    config_class = configs[args.config] if args.config else Config
+    app = create_app(config_class)
+    if app.debug:
+        # The debugger allows arbitrary code execution and doesn't survive forking
+        app.logger.warning("DEBUG is enabled in the configuration; serve.py always runs with it off.")
+        app.debug = False
+
+    with app.app_context():
+        if app.config['DATABASE'] != ':memory:' and not os.path.exists(app.config['DATABASE']):
+            app.logger.info("Database not found. Initializing...")
+            database.init_db()
+
+    workers = args.workers or app.config['SERVER_WORKERS']
+    if workers > 1 and app.config.get('METRICS_ENABLED') and not app.config.get('METRICS_DIR'):
+        app.logger.warning("METRICS_DIR is not set; /metrics will only report the worker that answers the scrape.")
+
+    server = PreforkServer(
+        app,
+        host=args.host or app.config['HOST'],
+        port=args.port if args.port is not None else app.config['PORT'],
+        workers=workers,
+        threads=args.threads or app.config['SERVER_THREADS'],
+        max_requests=args.max_requests if args.max_requests is not None else app.config['SERVER_MAX_REQUESTS'],
+        max_requests_jitter=app.config['SERVER_MAX_REQUESTS_JITTER'],
+        graceful_timeout=app.config['SERVER_GRACEFUL_TIMEOUT'],
+    )
+    server.run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())